@@ -0,0 +1,152 @@
+"""Baseline: the schema previously created by create_all
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.types import Geography
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+    op.create_table(
+        "app_users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_app_users_id", "app_users", ["id"])
+    op.create_index("ix_app_users_email", "app_users", ["email"], unique=True)
+
+    op.create_table(
+        "providers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("app_users.id"), nullable=False),
+        sa.Column("business_name", sa.String()),
+        sa.Column("bio", sa.Text()),
+        sa.Column("rating", sa.Float(), server_default="0"),
+        sa.Column("verified", sa.Boolean(), server_default="false"),
+        sa.Column("is_active", sa.Boolean(), server_default="true"),
+        sa.Column("is_suspended", sa.Boolean(), server_default="false"),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_providers_id", "providers", ["id"])
+
+    op.create_table(
+        "services",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("providers.id"), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("category", sa.String()),
+        sa.Column("price", sa.Numeric()),
+        sa.Column(
+            "location",
+            Geography(geometry_type="POINT", srid=4326),
+        ),
+        sa.Column("flagged", sa.Boolean()),
+        sa.Column("flag_reason", sa.Text(), nullable=True),
+        sa.Column("approved", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_services_id", "services", ["id"])
+    op.create_index("ix_services_category", "services", ["category"])
+    # the index geoalchemy2 used to add during create_all
+    op.create_index("idx_services_location", "services", ["location"], postgresql_using="gist")
+
+    op.create_table(
+        "bookings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("app_users.id"), nullable=False),
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("providers.id"), nullable=False),
+        sa.Column("scheduled_at", sa.DateTime(), nullable=False),
+        sa.Column("notes", sa.Text()),
+        sa.Column("status", sa.String()),
+        sa.Column("price", sa.Numeric(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_bookings_id", "bookings", ["id"])
+
+    op.create_table(
+        "addresses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("app_users.id"), nullable=False),
+        sa.Column("label", sa.String(), nullable=False),
+        sa.Column("line1", sa.String(), nullable=False),
+        sa.Column("line2", sa.String(), nullable=True),
+        sa.Column("city", sa.String(), nullable=False),
+        sa.Column("pincode", sa.String(), nullable=False),
+        sa.Column("lat", sa.Numeric(), nullable=True),
+        sa.Column("lon", sa.Numeric(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_addresses_id", "addresses", ["id"])
+
+    op.create_table(
+        "provider_payout_settings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "provider_id", sa.Integer(), sa.ForeignKey("providers.id"), nullable=False, unique=True
+        ),
+        sa.Column("upi_id", sa.String(), nullable=True),
+        sa.Column("bank_acc_no", sa.String(), nullable=True),
+        sa.Column("bank_ifsc", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_provider_payout_settings_id", "provider_payout_settings", ["id"])
+
+    op.create_table(
+        "reports",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("reporter_id", sa.Integer(), sa.ForeignKey("app_users.id"), nullable=False),
+        sa.Column("report_type", sa.String(), nullable=False),
+        sa.Column("target_type", sa.String(), nullable=True),
+        sa.Column("target_id", sa.Integer(), nullable=False),
+        sa.Column("reason", sa.Text(), nullable=False),
+        sa.Column("status", sa.String()),
+        sa.Column("admin_notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("resolved_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_reports_id", "reports", ["id"])
+
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("actor_id", sa.Integer(), sa.ForeignKey("app_users.id"), nullable=True),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("target_type", sa.String(), nullable=False),
+        sa.Column("target_id", sa.Integer(), nullable=True),
+        sa.Column("metadata", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+
+
+def downgrade() -> None:
+    for table in (
+        "audit_logs",
+        "reports",
+        "provider_payout_settings",
+        "addresses",
+        "bookings",
+        "services",
+        "providers",
+        "app_users",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,22 @@
+"""Indexes for keyset-paginated booking lists
+
+Revision ID: 0002_booking_list_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0002_booking_list_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_bookings_provider_scheduled_at", "bookings", ["provider_id", "scheduled_at"], if_not_exists=True)
+    op.create_index("ix_bookings_user_created_at", "bookings", ["user_id", "created_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_user_created_at", table_name="bookings")
+    op.drop_index("ix_bookings_provider_scheduled_at", table_name="bookings")
@@ -0,0 +1,80 @@
+"""Provider availability: durations, working hours, no overlapping bookings
+
+Revision ID: 0005_provider_availability
+Revises: 0004_idempotency_keys
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_provider_availability"
+down_revision = "0004_idempotency_keys"
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IN ('pending', 'accepted')"
+
+
+def upgrade() -> None:
+    # "=" operator class on integers for the exclusion constraint
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    op.add_column("services", sa.Column("duration_minutes", sa.Integer(), server_default="60"), if_not_exists=True)
+    op.add_column("bookings", sa.Column("ends_at", sa.DateTime(), nullable=True), if_not_exists=True)
+
+    op.execute(
+        """
+        UPDATE bookings b
+        SET ends_at = b.scheduled_at + make_interval(mins => COALESCE(s.duration_minutes, 60))
+        FROM services s
+        WHERE s.id = b.service_id AND b.ends_at IS NULL
+        """
+    )
+    # Existing active bookings may already overlap; leave the later ones
+    # without an end so the constraint below can be created. They are
+    # ignored by availability checks, as before.
+    op.execute(
+        f"""
+        UPDATE bookings b SET ends_at = NULL
+        WHERE b.{ACTIVE} AND EXISTS (
+            SELECT 1 FROM bookings o
+            WHERE o.provider_id = b.provider_id AND o.id < b.id AND o.{ACTIVE}
+              AND tsrange(o.scheduled_at, o.ends_at) && tsrange(b.scheduled_at, b.ends_at)
+        )
+        """
+    )
+    op.execute(
+        f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ex_bookings_provider_overlap') THEN
+                ALTER TABLE bookings ADD CONSTRAINT ex_bookings_provider_overlap
+                EXCLUDE USING gist (provider_id WITH =, tsrange(scheduled_at, ends_at) WITH &&)
+                WHERE ({ACTIVE} AND ends_at IS NOT NULL);
+            END IF;
+        END $$
+        """
+    )
+
+    op.create_table(
+        "provider_working_hours",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("providers.id"), nullable=False),
+        sa.Column("weekday", sa.Integer(), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("end_time", sa.Time(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_provider_working_hours_id", "provider_working_hours", ["id"], if_not_exists=True)
+    op.create_index(
+        "ix_provider_working_hours_provider_weekday",
+        "provider_working_hours",
+        ["provider_id", "weekday"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("provider_working_hours")
+    op.drop_constraint("ex_bookings_provider_overlap", "bookings")
+    op.drop_column("bookings", "ends_at")
+    op.drop_column("services", "duration_minutes")
@@ -0,0 +1,52 @@
+"""Recurring booking series
+
+Revision ID: 0006_booking_series
+Revises: 0005_provider_availability
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_booking_series"
+down_revision = "0005_provider_availability"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "booking_series",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("app_users.id"), nullable=False),
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("providers.id"), nullable=False),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=False),
+        sa.Column("frequency", sa.String(), nullable=False),
+        sa.Column("interval", sa.Integer(), nullable=False),
+        sa.Column("occurrences", sa.Integer(), nullable=False),
+        sa.Column("starts_at", sa.DateTime(), nullable=False),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_booking_series_id", "booking_series", ["id"], if_not_exists=True)
+    op.create_index("ix_booking_series_user_id", "booking_series", ["user_id"], if_not_exists=True)
+
+    op.add_column("bookings", sa.Column("series_id", sa.Integer(), nullable=True), if_not_exists=True)
+    # named as create_all names it, so databases that already have it are left alone
+    op.execute(
+        """
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'bookings_series_id_fkey') THEN
+                ALTER TABLE bookings ADD CONSTRAINT bookings_series_id_fkey
+                FOREIGN KEY (series_id) REFERENCES booking_series (id);
+            END IF;
+        END $$
+        """
+    )
+    op.create_index("ix_bookings_series_id", "bookings", ["series_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_series_id", table_name="bookings")
+    op.drop_column("bookings", "series_id")
+    op.drop_table("booking_series")
@@ -0,0 +1,25 @@
+"""Per-user token epoch for revocation
+
+Revision ID: 0007_token_epoch
+Revises: 0006_booking_series
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_token_epoch"
+down_revision = "0006_booking_series"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "app_users",
+        sa.Column("token_epoch", sa.Integer(), nullable=False, server_default="0"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("app_users", "token_epoch")
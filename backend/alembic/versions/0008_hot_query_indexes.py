@@ -0,0 +1,70 @@
+"""Indexes for matching, search, trust scoring, earnings and analytics
+
+Revision ID: 0008_hot_query_indexes
+Revises: 0007_token_epoch
+Create Date: 2026-10-19
+
+Plans for these queries are checked by tests/test_query_plans.py.
+
+The indexes are built with CREATE INDEX CONCURRENTLY outside the migration
+transaction, so bookings and services keep taking writes during the build.
+A build that fails leaves an INVALID index behind: drop it and re-run.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_hot_query_indexes"
+down_revision = "0007_token_epoch"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_bookings_provider_status",
+            "bookings",
+            ["provider_id", "status"],
+            postgresql_include=["price"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_bookings_active_scheduled_at",
+            "bookings",
+            ["scheduled_at", "provider_id"],
+            postgresql_where=sa.text("status IN ('pending', 'accepted')"),
+            postgresql_concurrently=True,
+        )
+        op.create_index("ix_bookings_created_at", "bookings", ["created_at"], postgresql_concurrently=True)
+        op.create_index(
+            "ix_reports_target", "reports", ["target_id", "target_type"], postgresql_concurrently=True
+        )
+        op.create_index("ix_services_provider_id", "services", ["provider_id"], postgresql_concurrently=True)
+        op.create_index(
+            "ix_services_location_approved",
+            "services",
+            ["location"],
+            postgresql_using="gist",
+            postgresql_where=sa.text("approved"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_services_approved_created_at",
+            "services",
+            ["created_at"],
+            postgresql_where=sa.text("approved"),
+            postgresql_concurrently=True,
+        )
+        op.create_index("ix_providers_user_id", "providers", ["user_id"], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_providers_user_id", table_name="providers", postgresql_concurrently=True)
+        op.drop_index("ix_services_approved_created_at", table_name="services", postgresql_concurrently=True)
+        op.drop_index("ix_services_location_approved", table_name="services", postgresql_concurrently=True)
+        op.drop_index("ix_services_provider_id", table_name="services", postgresql_concurrently=True)
+        op.drop_index("ix_reports_target", table_name="reports", postgresql_concurrently=True)
+        op.drop_index("ix_bookings_created_at", table_name="bookings", postgresql_concurrently=True)
+        op.drop_index("ix_bookings_active_scheduled_at", table_name="bookings", postgresql_concurrently=True)
+        op.drop_index("ix_bookings_provider_status", table_name="bookings", postgresql_concurrently=True)
@@ -0,0 +1,51 @@
+"""Daily rollups for the admin dashboard
+
+Revision ID: 0009_daily_metrics
+Revises: 0008_hot_query_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_daily_metrics"
+down_revision = "0008_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_metrics",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("users", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("providers", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("services", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("bookings", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Numeric(), nullable=False, server_default="0"),
+    )
+    # same rebuild as app.core.rollups.backfill
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    op.execute(
+        """
+        INSERT INTO daily_metrics (day, users, providers, services, bookings, revenue)
+        SELECT day, sum(users), sum(providers), sum(services), sum(bookings), sum(revenue)
+        FROM (
+            SELECT coalesce(created_at, now())::date AS day,
+                   1 AS users, 0 AS providers, 0 AS services, 0 AS bookings, 0 AS revenue
+            FROM app_users
+            UNION ALL
+            SELECT coalesce(created_at, now())::date, 0, 1, 0, 0, 0 FROM providers
+            UNION ALL
+            SELECT coalesce(created_at, now())::date, 0, 0, 1, 0, 0 FROM services
+            UNION ALL
+            SELECT coalesce(created_at, now())::date, 0, 0, 0, 1,
+                   CASE WHEN status = 'accepted' THEN coalesce(price, 0) ELSE 0 END
+            FROM bookings
+        ) changes
+        GROUP BY day
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_metrics")
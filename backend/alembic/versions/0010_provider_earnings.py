@@ -0,0 +1,43 @@
+"""Monthly provider earnings ledger
+
+Revision ID: 0010_provider_earnings
+Revises: 0009_daily_metrics
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_provider_earnings"
+down_revision = "0009_daily_metrics"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "provider_earnings",
+        sa.Column(
+            "provider_id",
+            sa.Integer(),
+            sa.ForeignKey("providers.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("amount", sa.Numeric(), nullable=False, server_default="0"),
+        sa.Column("booking_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # same rebuild as app.core.rollups.backfill_earnings
+    op.execute(
+        """
+        INSERT INTO provider_earnings (provider_id, month, amount, booking_count)
+        SELECT provider_id, date_trunc('month', scheduled_at)::date,
+               sum(coalesce(price, 0)), count(*)
+        FROM bookings
+        WHERE status = 'accepted'
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("provider_earnings")
@@ -0,0 +1,62 @@
+"""Payout runs and the bookings they claim
+
+Revision ID: 0011_payout_runs
+Revises: 0010_provider_earnings
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_payout_runs"
+down_revision = "0010_provider_earnings"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payout_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("period_start", sa.DateTime(), nullable=False),
+        sa.Column("period_end", sa.DateTime(), nullable=False),
+        sa.Column(
+            "created_by", sa.Integer(), sa.ForeignKey("app_users.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("provider_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("booking_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_amount", sa.Numeric(), nullable=False, server_default="0"),
+        sa.Column("skipped_providers", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_payout_runs_id", "payout_runs", ["id"])
+    op.create_table(
+        "payout_lines",
+        sa.Column(
+            "run_id", sa.Integer(), sa.ForeignKey("payout_runs.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("providers.id"), primary_key=True),
+        sa.Column("amount", sa.Numeric(), nullable=False),
+        sa.Column("booking_count", sa.Integer(), nullable=False),
+        sa.Column("method", sa.String(), nullable=False),
+        sa.Column("destination", sa.String(), nullable=False),
+        sa.Column("bank_ifsc", sa.String(), nullable=True),
+    )
+
+    op.add_column(
+        "bookings",
+        sa.Column("payout_run_id", sa.Integer(), sa.ForeignKey("payout_runs.id"), nullable=True),
+    )
+    op.create_index(
+        "ix_bookings_unpaid_scheduled_at",
+        "bookings",
+        ["scheduled_at"],
+        postgresql_where=sa.text("payout_run_id IS NULL AND status IN ('accepted', 'completed')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_unpaid_scheduled_at", table_name="bookings")
+    op.drop_column("bookings", "payout_run_id")
+    op.drop_table("payout_lines")
+    op.drop_index("ix_payout_runs_id", table_name="payout_runs")
+    op.drop_table("payout_runs")
@@ -0,0 +1,29 @@
+"""Booking change times for calendar sync
+
+Revision ID: 0012_booking_updated_at
+Revises: 0011_payout_runs
+Create Date: 2026-10-19
+
+Existing bookings get the migration time, so the first sync after upgrading
+returns them all, as a first sync does anyway.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012_booking_updated_at"
+down_revision = "0011_payout_runs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "bookings",
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_bookings_provider_updated_at", "bookings", ["provider_id", "updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_provider_updated_at", table_name="bookings")
+    op.drop_column("bookings", "updated_at")
@@ -0,0 +1,43 @@
+"""Provider trust leaderboard snapshot
+
+Revision ID: 0013_provider_trust_scores
+Revises: 0012_booking_updated_at
+Create Date: 2026-10-19
+
+The table starts empty; until the first refresh (scripts/rollups.py
+refresh-trust-snapshot or TRUST_SNAPSHOT_REFRESH_SECONDS) snapshot reads
+fall back to live scores.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013_provider_trust_scores"
+down_revision = "0012_booking_updated_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "provider_trust_scores",
+        sa.Column(
+            "provider_id",
+            sa.Integer(),
+            sa.ForeignKey("providers.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("trust_score", sa.Float(), nullable=False),
+        sa.Column("accepted_ratio", sa.Float(), nullable=False),
+        sa.Column("cancel_ratio", sa.Float(), nullable=False),
+        sa.Column("rating_norm", sa.Float(), nullable=False),
+        sa.Column("reports_penalty", sa.Float(), nullable=False),
+        sa.Column("total_bookings", sa.Integer(), nullable=False),
+        sa.Column("reports_count", sa.Integer(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_provider_trust_scores_trust_score", "provider_trust_scores", ["trust_score"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_provider_trust_scores_trust_score", table_name="provider_trust_scores")
+    op.drop_table("provider_trust_scores")
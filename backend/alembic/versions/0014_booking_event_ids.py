@@ -0,0 +1,24 @@
+"""Booking event id sequence
+
+Revision ID: 0014_booking_event_ids
+Revises: 0013_provider_trust_scores
+Create Date: 2026-10-19
+
+Event ids used to be taken from the wall clock when an event was staged;
+they now come from this sequence at commit (see app.core.events).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0014_booking_event_ids"
+down_revision = "0013_provider_trust_scores"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence("booking_event_ids")))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence("booking_event_ids")))
@@ -0,0 +1,72 @@
+"""Count completed bookings in revenue and earnings
+
+Revision ID: 0015_count_completed_earnings
+Revises: 0014_booking_event_ids
+Create Date: 2026-10-19
+
+Revenue and the earnings ledger used to count accepted bookings only, so
+completing a booking subtracted it. The ledger is rebuilt from accepted and
+completed bookings (as app.core.rollups.backfill_earnings does). Daily
+revenue gets completed bookings added back on their creation day, as the
+rollups backfill does, leaving the other daily counts untouched.
+"""
+from alembic import op
+
+revision = "0015_count_completed_earnings"
+down_revision = "0014_booking_event_ids"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("LOCK TABLE provider_earnings, daily_metrics IN EXCLUSIVE MODE")
+    op.execute("DELETE FROM provider_earnings")
+    op.execute(
+        """
+        INSERT INTO provider_earnings (provider_id, month, amount, booking_count)
+        SELECT provider_id, date_trunc('month', scheduled_at)::date,
+               sum(coalesce(price, 0)), count(*)
+        FROM bookings
+        WHERE status IN ('accepted', 'completed')
+        GROUP BY 1, 2
+        """
+    )
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    op.execute(
+        """
+        INSERT INTO daily_metrics (day, revenue)
+        SELECT coalesce(created_at, now())::date, sum(coalesce(price, 0))
+        FROM bookings
+        WHERE status = 'completed'
+        GROUP BY 1
+        ON CONFLICT (day) DO UPDATE SET revenue = daily_metrics.revenue + excluded.revenue
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE provider_earnings, daily_metrics IN EXCLUSIVE MODE")
+    op.execute("DELETE FROM provider_earnings")
+    op.execute(
+        """
+        INSERT INTO provider_earnings (provider_id, month, amount, booking_count)
+        SELECT provider_id, date_trunc('month', scheduled_at)::date,
+               sum(coalesce(price, 0)), count(*)
+        FROM bookings
+        WHERE status = 'accepted'
+        GROUP BY 1, 2
+        """
+    )
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    op.execute(
+        """
+        UPDATE daily_metrics SET revenue = daily_metrics.revenue - completed.revenue
+        FROM (
+            SELECT coalesce(created_at, now())::date AS day, sum(coalesce(price, 0)) AS revenue
+            FROM bookings
+            WHERE status = 'completed'
+            GROUP BY 1
+        ) completed
+        WHERE daily_metrics.day = completed.day
+        """
+    )
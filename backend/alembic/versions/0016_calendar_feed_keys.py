@@ -0,0 +1,26 @@
+"""Per-provider calendar feed keys
+
+Revision ID: 0016_calendar_feed_keys
+Revises: 0015_count_completed_earnings
+Create Date: 2026-10-19
+
+The iCal feed used to take an access token in its query string; it now takes
+a feed key whose hash is stored here (see app.api.calendar).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0016_calendar_feed_keys"
+down_revision = "0015_count_completed_earnings"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("providers", sa.Column("calendar_feed_hash", sa.String(length=64), nullable=True))
+    op.create_unique_constraint("providers_calendar_feed_hash_key", "providers", ["calendar_feed_hash"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("providers_calendar_feed_hash_key", "providers", type_="unique")
+    op.drop_column("providers", "calendar_feed_hash")
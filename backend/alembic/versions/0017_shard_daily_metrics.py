@@ -0,0 +1,47 @@
+"""Shard daily metrics rows
+
+Revision ID: 0017_shard_daily_metrics
+Revises: 0016_calendar_feed_keys
+Create Date: 2026-10-19
+
+Every counted write used to upsert the one ``daily_metrics`` row for today and
+hold its lock until commit. Rows are now keyed by ``(day, shard)``, and
+readers sum the shards (see app.core.rollups). Existing rows become shard 0.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0017_shard_daily_metrics"
+down_revision = "0016_calendar_feed_keys"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("daily_metrics", sa.Column("shard", sa.SmallInteger(), nullable=False, server_default="0"))
+    op.drop_constraint("daily_metrics_pkey", "daily_metrics", type_="primary")
+    op.create_primary_key("daily_metrics_pkey", "daily_metrics", ["day", "shard"])
+
+
+def downgrade() -> None:
+    # fold the shards back into one row per day
+    op.execute("LOCK TABLE daily_metrics IN EXCLUSIVE MODE")
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE daily_metrics_folded ON COMMIT DROP AS
+        SELECT day, sum(users) AS users, sum(providers) AS providers, sum(services) AS services,
+               sum(bookings) AS bookings, sum(revenue) AS revenue
+        FROM daily_metrics
+        GROUP BY day
+        """
+    )
+    op.execute("DELETE FROM daily_metrics")
+    op.execute(
+        """
+        INSERT INTO daily_metrics (day, shard, users, providers, services, bookings, revenue)
+        SELECT day, 0, users, providers, services, bookings, revenue FROM daily_metrics_folded
+        """
+    )
+    op.drop_constraint("daily_metrics_pkey", "daily_metrics", type_="primary")
+    op.drop_column("daily_metrics", "shard")
+    op.create_primary_key("daily_metrics_pkey", "daily_metrics", ["day"])
@@ -1,18 +1,32 @@
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, and_, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, and_, or_, select
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_admin
-from app.models import User, Provider, Service, Booking, Report, AuditLog
+from app.api import utils as api_utils
+from app.api.deps import get_db, get_current_admin, get_read_db
+from app.api.pagination import MAX_PAGE_SIZE, finish_id_page, paginate_by_id
+from app.core import exports, payouts, principals, trust
+from app.core.audit import record_audit
+from app.core.config import settings
+from app.core.principals import Principal
+from app.core.revocation import revoke_tokens
+from app.db.timeouts import statement_budget
+from app.models import User, Provider, Service, Booking, DailyMetric, PayoutRun, Report
 from app import schemas
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+ExportFormat = Literal["csv", "ndjson"]
+TrustSort = Literal[
+    "trust_score", "accepted_ratio", "cancel_ratio", "rating_norm", "reports_penalty", "total_bookings", "reports_count"
+]
+
 
 # ========== USER MANAGEMENT ==========
 
@@ -24,7 +38,7 @@ def list_users(
     role: Optional[str] = None,
     is_active: Optional[bool] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """List all users with pagination and filters"""
     query = db.query(User)
@@ -58,7 +72,7 @@ def list_users(
 def get_user(
     user_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """Get user by ID"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -72,25 +86,32 @@ def update_user(
     user_id: int,
     user_update: schemas.UserUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """Update user (role, is_active, etc.)"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    revoke = False
     if user_update.role is not None:
         if user_update.role not in ["user", "provider", "admin"]:
             raise HTTPException(status_code=400, detail="Invalid role")
+        revoke = revoke or user_update.role != user.role
         user.role = user_update.role
     
     if user_update.is_active is not None:
+        revoke = revoke or user_update.is_active != user.is_active
         user.is_active = user_update.is_active
     
     if user_update.name is not None:
         user.name = user_update.name
     
+    if revoke:
+        # existing tokens carry the old role / active state
+        revoke_tokens(db, user.id)
     db.commit()
+    principals.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -99,7 +120,7 @@ def update_user(
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """Delete user (soft delete by setting is_active=False)"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -110,107 +131,115 @@ def delete_user(
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
     user.is_active = False
+    revoke_tokens(db, user.id)
     db.commit()
+    principals.invalidate(user.id)
     return {"message": "User deactivated"}
 
 
 # ========== PROVIDER VERIFICATION ==========
 
+def _provider_filters(is_verified: Optional[bool] = None, is_suspended: Optional[bool] = None) -> list:
+    filters = []
+    if is_verified is not None:
+        filters.append(Provider.is_verified == is_verified)
+    if is_suspended is not None:
+        filters.append(Provider.is_suspended == is_suspended)
+    return filters
+
+
 @router.get("/providers/pending", response_model=List[schemas.ProviderOut])
 def get_pending_providers(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
-    """Get all pending provider verification requests"""
-    providers = db.query(Provider).filter(Provider.is_verified == False).all()
-    return providers
+    """Pending provider verification requests, newest first; follow ``X-Next-Cursor``"""
+    query = db.query(Provider).filter(*_provider_filters(is_verified=False))
+    return finish_id_page(paginate_by_id(query, Provider.id, cursor, limit).all(), limit, response)
 
 
 @router.get("/providers", response_model=List[schemas.ProviderOut])
 def list_providers_admin(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    is_verified: Optional[bool] = None,
+    is_suspended: Optional[bool] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
-    return db.query(Provider).all()
-
-
-def _audit(db: Session, actor_id: int, action: str, target_type: str, target_id: int, metadata: dict = None):
-    log = AuditLog(
-        actor_id=actor_id,
-        action=action,
-        target_type=target_type,
-        target_id=target_id,
-        meta=str(metadata or {}),
-    )
-    db.add(log)
-    db.commit()
+    """Providers, newest first; follow ``X-Next-Cursor``"""
+    query = db.query(Provider).filter(*_provider_filters(is_verified, is_suspended))
+    return finish_id_page(paginate_by_id(query, Provider.id, cursor, limit).all(), limit, response)
 
 
-def _compute_trust_score(db: Session, provider_id: int) -> schemas.TrustScoreOut:
-    total_bookings = (
-        db.query(func.count(Booking.id))
-        .filter(Booking.provider_id == provider_id)
-        .scalar()
-        or 0
-    )
-    accepted = (
-        db.query(func.count(Booking.id))
-        .filter(Booking.provider_id == provider_id, Booking.status == "accepted")
-        .scalar()
-        or 0
-    )
-    cancelled = (
-        db.query(func.count(Booking.id))
-        .filter(Booking.provider_id == provider_id, Booking.status == "cancelled")
-        .scalar()
-        or 0
+def _trust_out(row) -> schemas.TrustScoreOut:
+    return schemas.TrustScoreOut(
+        provider_id=row.provider_id,
+        trust_score=round(row.trust_score, 4),
+        accepted_ratio=round(row.accepted_ratio, 4),
+        cancel_ratio=round(row.cancel_ratio, 4),
+        rating_norm=round(row.rating_norm, 4),
+        reports_penalty=round(row.reports_penalty, 4),
+        total_bookings=int(row.total_bookings),
+        reports_count=int(row.reports_count),
     )
-    provider = db.query(Provider).filter(Provider.id == provider_id).first()
-    rating = float(provider.rating or 0) if provider else 0
-    rating_norm = min(max(rating / 5.0, 0.0), 1.0)
 
-    reports_count = (
-        db.query(func.count(Report.id))
-        .filter(
-            or_(
-                Report.target_type == "provider",
-                Report.report_type == "provider",
-            ),
-            Report.target_id == provider_id,
-        )
-        .scalar()
-        or 0
-    )
 
-    accepted_ratio = (accepted / total_bookings) if total_bookings else 0.5
-    cancel_ratio = (cancelled / total_bookings) if total_bookings else 0.0
-    reports_penalty = min(reports_count / 5.0, 1.0)
+def _compute_trust_score(db: Session, provider_id: int) -> Optional[schemas.TrustScoreOut]:
+    """One provider's live score (see app.core.trust), ``None`` if there is no such provider."""
+    scored = trust.scores(provider_id)
+    row = db.execute(select(scored)).first()
+    return _trust_out(row) if row else None
 
-    trust_score = (
-        0.4 * accepted_ratio
-        + 0.3 * rating_norm
-        + 0.15 * (1 - cancel_ratio)
-        + 0.15 * (1 - reports_penalty)
-    )
-    trust_score = min(max(trust_score, 0.0), 1.0)
 
-    return schemas.TrustScoreOut(
-        provider_id=provider_id,
-        trust_score=round(trust_score, 4),
-        accepted_ratio=round(accepted_ratio, 4),
-        cancel_ratio=round(cancel_ratio, 4),
-        rating_norm=round(rating_norm, 4),
-        reports_penalty=round(reports_penalty, 4),
-        total_bookings=int(total_bookings),
-        reports_count=int(reports_count),
+@router.get("/providers/trust", response_model=schemas.TrustLeaderboardResponse)
+@statement_budget(settings.STATEMENT_TIMEOUT_REPORTING_MS)
+def trust_leaderboard(
+    sort: TrustSort = "trust_score",
+    order: Literal["asc", "desc"] = "desc",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    is_verified: Optional[bool] = None,
+    is_suspended: Optional[bool] = None,
+    min_bookings: int = Query(0, ge=0),
+    snapshot: bool = False,
+    db: Session = Depends(get_read_db),
+    admin: Principal = Depends(get_current_admin),
+):
+    """
+    Providers ranked by trust score (or another component) in one query.
+    ``snapshot=true`` reads the last scheduled refresh instead of scoring live;
+    ``computed_at`` is its time, null for live scores.
+    """
+    rows, total, computed_at = trust.leaderboard(
+        db,
+        sort=sort,
+        descending=order == "desc",
+        page=page,
+        page_size=page_size,
+        is_verified=is_verified,
+        is_suspended=is_suspended,
+        min_bookings=min_bookings,
+        snapshot=snapshot,
     )
+    return {
+        "items": [_trust_out(row) for row in rows],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "computed_at": computed_at,
+    }
 
 
 @router.put("/providers/{provider_id}/verify")
 def verify_provider(
     provider_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """Verify a provider"""
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
@@ -218,8 +247,8 @@ def verify_provider(
         raise HTTPException(status_code=404, detail="Provider not found")
     
     provider.is_verified = True
+    record_audit(db, admin.id, "provider_verified", "provider", provider_id, {})
     db.commit()
-    _audit(db, admin.id, "provider_verified", "provider", provider_id, {})
     return {"message": "Provider verified", "provider_id": provider_id}
 
 
@@ -228,7 +257,7 @@ def reject_provider(
     provider_id: int,
     reason: Optional[str] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """Reject provider verification"""
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
@@ -238,9 +267,11 @@ def reject_provider(
     # Optionally deactivate provider's user account
     if provider.user:
         provider.user.is_active = False
+        revoke_tokens(db, provider.user_id)
     provider.is_verified = False
+    record_audit(db, admin.id, "provider_rejected", "provider", provider_id, {"reason": reason})
     db.commit()
-    _audit(db, admin.id, "provider_rejected", "provider", provider_id, {"reason": reason})
+    principals.invalidate(provider.user_id)
     return {"message": "Provider rejected", "provider_id": provider_id}
 
 
@@ -249,15 +280,16 @@ def suspend_provider(
     provider_id: int,
     reason: Optional[str] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
     provider.is_suspended = True
     db.query(Service).filter(Service.provider_id == provider.id).update({"approved": False})
+    record_audit(db, admin.id, "provider_suspended", "provider", provider_id, {"reason": reason})
     db.commit()
-    _audit(db, admin.id, "provider_suspended", "provider", provider_id, {"reason": reason})
+    principals.invalidate(provider.user_id)
     logger.info("Provider %s suspended by admin %s", provider_id, admin.id)
     return {"message": "Provider suspended", "provider_id": provider_id}
 
@@ -266,14 +298,15 @@ def suspend_provider(
 def unsuspend_provider(
     provider_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
     provider.is_suspended = False
+    record_audit(db, admin.id, "provider_unsuspended", "provider", provider_id, {})
     db.commit()
-    _audit(db, admin.id, "provider_unsuspended", "provider", provider_id, {})
+    principals.invalidate(provider.user_id)
     return {"message": "Provider unsuspended", "provider_id": provider_id}
 
 
@@ -281,47 +314,63 @@ def unsuspend_provider(
 def provider_trust_score(
     provider_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
-    provider = db.query(Provider).filter(Provider.id == provider_id).first()
-    if not provider:
+    score = _compute_trust_score(db, provider_id)
+    if not score:
         raise HTTPException(status_code=404, detail="Provider not found")
-    return _compute_trust_score(db, provider_id)
+    return score
 
 
 # ========== SERVICE MODERATION ==========
 
-@router.get("/services/flagged", response_model=List[schemas.ServiceOut])
-def get_flagged_services(
-    db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
-):
-    """Get all flagged services"""
-    services = db.query(Service).filter(Service.flagged == True).all()
-    return services
+def _service_filters(
+    flagged: Optional[bool] = None, approved: Optional[bool] = None, category: Optional[str] = None
+) -> list:
+    filters = []
+    if flagged is not None:
+        filters.append(Service.flagged == flagged)
+    if approved is not None:
+        filters.append(Service.approved == approved)
+    if category:
+        filters.append(Service.category == category)
+    return filters
 
 
-@router.get("/services", response_model=List[schemas.ServiceOut])
-def list_services_admin(
+@router.get("/services/flagged", response_model=List[schemas.ServiceOut])
+def get_flagged_services(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
-    return db.query(Service).all()
+    """Flagged services, newest first; follow ``X-Next-Cursor``"""
+    query = db.query(Service).filter(*_service_filters(flagged=True))
+    return finish_id_page(paginate_by_id(query, Service.id, cursor, limit).all(), limit, response)
 
 
 @router.get("/services", response_model=List[schemas.ServiceOut])
 def list_services_admin(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    flagged: Optional[bool] = None,
+    approved: Optional[bool] = None,
+    category: Optional[str] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
-    return db.query(Service).all()
+    """Services, newest first; follow ``X-Next-Cursor``"""
+    query = db.query(Service).filter(*_service_filters(flagged, approved, category))
+    return finish_id_page(paginate_by_id(query, Service.id, cursor, limit).all(), limit, response)
 
 
 @router.put("/services/{service_id}/approve")
 def approve_service(
     service_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """Approve a flagged service"""
     service = db.query(Service).filter(Service.id == service_id).first()
@@ -331,8 +380,8 @@ def approve_service(
     service.flagged = False
     service.approved = True
     service.flag_reason = None
+    record_audit(db, admin.id, "service_approved", "service", service_id, {})
     db.commit()
-    _audit(db, admin.id, "service_approved", "service", service_id, {})
     logger.info("Service %s approved by admin %s", service_id, admin.id)
     return {"message": "Service approved", "service_id": service_id}
 
@@ -342,7 +391,7 @@ def reject_service(
     service_id: int,
     reason: Optional[str] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """Reject a flagged service"""
     service = db.query(Service).filter(Service.id == service_id).first()
@@ -353,32 +402,48 @@ def reject_service(
     service.approved = False
     if reason:
         service.flag_reason = reason
+    record_audit(db, admin.id, "service_rejected", "service", service_id, {"reason": reason})
     db.commit()
-    _audit(db, admin.id, "service_rejected", "service", service_id, {"reason": reason})
     logger.info("Service %s rejected by admin %s", service_id, admin.id)
     return {"message": "Service rejected", "service_id": service_id}
 
 
 # ========== REPORTS MODERATION ==========
 
+def _report_filters(status: Optional[str] = None, report_type: Optional[str] = None) -> list:
+    filters = []
+    if status:
+        filters.append(Report.status == status)
+    if report_type:
+        filters.append(Report.report_type == report_type)
+    return filters
+
+
 @router.get("/reports", response_model=List[schemas.ReportOut])
 def list_reports(
-    status_filter: Optional[str] = None,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    report_type: Optional[str] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
-    query = db.query(Report)
-    if status_filter:
-        query = query.filter(Report.status == status_filter)
-    return query.order_by(Report.created_at.desc()).all()
+    """Reports, newest first; follow ``X-Next-Cursor``"""
+    query = db.query(Report).filter(*_report_filters(status_filter, report_type))
+    return finish_id_page(paginate_by_id(query, Report.id, cursor, limit).all(), limit, response)
 
 
 @router.get("/reports/all", response_model=List[schemas.ReportOut])
 def list_reports_admin_all(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
-    return db.query(Report).order_by(Report.created_at.desc()).all()
+    query = db.query(Report)
+    return finish_id_page(paginate_by_id(query, Report.id, cursor, limit).all(), limit, response)
 
 
 @router.put("/reports/{report_id}/resolve", response_model=schemas.ReportOut)
@@ -386,7 +451,7 @@ def resolve_report(
     report_id: int,
     payload: schemas.ReportResolution,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     report = db.query(Report).filter(Report.id == report_id).first()
     if not report:
@@ -395,9 +460,7 @@ def resolve_report(
     if payload.admin_notes is not None:
         report.admin_notes = payload.admin_notes
     report.resolved_at = datetime.utcnow()
-    db.commit()
-    db.refresh(report)
-    _audit(
+    record_audit(
         db,
         admin.id,
         "report_resolved",
@@ -405,6 +468,8 @@ def resolve_report(
         report_id,
         {"status": payload.status},
     )
+    db.commit()
+    db.refresh(report)
     logger.info("Report %s resolved by admin %s", report_id, admin.id)
     return report
 
@@ -412,37 +477,42 @@ def resolve_report(
 # ========== ANALYTICS ==========
 
 @router.get("/analytics", response_model=schemas.AdminAnalytics)
+@statement_budget(settings.STATEMENT_TIMEOUT_REPORTING_MS)
 def get_analytics(
-    db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_read_db),
+    admin: Principal = Depends(get_current_admin),
 ):
-    """Get admin analytics dashboard data"""
-    # Total counts
-    total_users = db.query(func.count(User.id)).scalar()
-    total_providers = db.query(func.count(Provider.id)).scalar()
-    total_services = db.query(func.count(Service.id)).scalar()
-    total_bookings = db.query(func.count(Booking.id)).scalar()
-    
-    # Revenue (sum of completed/accepted bookings with price)
-    revenue = db.query(func.coalesce(func.sum(Booking.price), 0)).filter(
-        Booking.status == "accepted"
-    ).scalar() or 0
-    
+    """
+    Admin analytics dashboard data. Totals and the chart come from the
+    ``daily_metrics`` rollup (a few shard rows per day, see app.core.rollups); only the
+    24h active-user count reads bookings, through the created_at index.
+    """
+    totals = db.query(
+        func.coalesce(func.sum(DailyMetric.users), 0),
+        func.coalesce(func.sum(DailyMetric.providers), 0),
+        func.coalesce(func.sum(DailyMetric.services), 0),
+        func.coalesce(func.sum(DailyMetric.bookings), 0),
+        func.coalesce(func.sum(DailyMetric.revenue), 0),
+    ).one()
+    total_users, total_providers, total_services, total_bookings, revenue = totals
+
     # Active users (last 24 hours)
     last_24h = datetime.utcnow() - timedelta(hours=24)
     active_users = db.query(func.count(func.distinct(Booking.user_id))).filter(
         Booking.created_at >= last_24h
     ).scalar()
-    
+
     # Bookings chart data (last 30 days)
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    bookings_by_day = db.query(
-        func.date(Booking.created_at).label('date'),
-        func.count(Booking.id).label('count')
-    ).filter(
-        Booking.created_at >= thirty_days_ago
-    ).group_by(func.date(Booking.created_at)).all()
-    
+    bookings_by_day = (
+        db.query(DailyMetric.day.label("date"), func.sum(DailyMetric.bookings).label("count"))
+        .filter(DailyMetric.day >= thirty_days_ago.date())
+        .group_by(DailyMetric.day)
+        .having(func.sum(DailyMetric.bookings) != 0)
+        .order_by(DailyMetric.day)
+        .all()
+    )
+
     bookings_chart = [
         {
             "date": str(day.date),
@@ -452,10 +522,10 @@ def get_analytics(
     ]
     
     return {
-        "total_users": total_users,
-        "total_providers": total_providers,
-        "total_services": total_services,
-        "total_bookings": total_bookings,
+        "total_users": int(total_users),
+        "total_providers": int(total_providers),
+        "total_services": int(total_services),
+        "total_bookings": int(total_bookings),
         "revenue": float(revenue),
         "active_users_24h": active_users,
         "bookings_chart": bookings_chart
@@ -464,31 +534,11 @@ def get_analytics(
 
 # ========== REPORTS MANAGEMENT ==========
 
-@router.get("/reports", response_model=List[schemas.ReportOut])
-def list_reports(
-    status: Optional[str] = None,
-    report_type: Optional[str] = None,
-    db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
-):
-    """List all reports"""
-    query = db.query(Report)
-    
-    if status:
-        query = query.filter(Report.status == status)
-    
-    if report_type:
-        query = query.filter(Report.report_type == report_type)
-    
-    reports = query.order_by(Report.created_at.desc()).all()
-    return reports
-
-
 @router.get("/reports/{report_id}", response_model=schemas.ReportOut)
 def get_report(
     report_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
     """Get report by ID"""
     report = db.query(Report).filter(Report.id == report_id).first()
@@ -497,22 +547,139 @@ def get_report(
     return report
 
 
-@router.put("/reports/{report_id}/resolve")
-def resolve_report(
-    report_id: int,
-    resolution: schemas.ReportResolution,
+# ========== PAYOUT RUNS ==========
+
+@router.post("/payout-runs", response_model=schemas.PayoutRunOut, status_code=201)
+@statement_budget(settings.STATEMENT_TIMEOUT_REPORTING_MS)
+def create_payout_run(
+    payload: schemas.PayoutRunCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: Principal = Depends(get_current_admin),
 ):
-    """Resolve a report"""
-    report = db.query(Report).filter(Report.id == report_id).first()
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    report.status = resolution.status
-    report.admin_notes = resolution.admin_notes
-    report.resolved_at = datetime.utcnow()
-    
+    """Pay out the window's accepted/completed bookings that no earlier run claimed"""
+    if payload.period_end <= payload.period_start:
+        raise HTTPException(status_code=400, detail="period_end must be after period_start")
+    run = payouts.create_run(db, payload.period_start, payload.period_end, created_by=admin.id)
+    record_audit(
+        db,
+        admin.id,
+        "payout_run_created",
+        "payout_run",
+        run.id,
+        {"providers": run.provider_count, "bookings": run.booking_count, "amount": str(run.total_amount)},
+    )
     db.commit()
-    return {"message": "Report resolved", "report_id": report_id}
+    db.refresh(run)
+    logger.info(
+        "Payout run %s by admin %s: %s providers, %s bookings, %s skipped",
+        run.id,
+        admin.id,
+        run.provider_count,
+        run.booking_count,
+        run.skipped_providers,
+    )
+    return run
+
+
+@router.get("/payout-runs", response_model=List[schemas.PayoutRunOut])
+def list_payout_runs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    admin: Principal = Depends(get_current_admin),
+):
+    """Most recent payout runs first"""
+    return db.query(PayoutRun).order_by(PayoutRun.id.desc()).limit(limit).all()
+
 
+@router.get("/payout-runs/{run_id}/export")
+def export_payout_run(
+    run_id: int,
+    format: ExportFormat = "csv",
+    db: Session = Depends(get_read_db),
+    admin: Principal = Depends(get_current_admin),
+):
+    """Stream the run's payout file, one line per provider"""
+    if db.get(PayoutRun, run_id) is None:
+        raise HTTPException(status_code=404, detail="Payout run not found")
+    return _export_response(payouts.export_lines(db, run_id, format), f"payout-run-{run_id}", format)
+
+
+# ========== EXPORTS ==========
+# Whole tables, streamed from a server-side cursor (see app.core.exports).
+
+
+def _export_response(chunks, name: str, fmt: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=exports.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@router.get("/exports/providers")
+@statement_budget(settings.STATEMENT_TIMEOUT_REPORTING_MS)
+def export_providers(
+    format: ExportFormat = "csv",
+    is_verified: Optional[bool] = None,
+    is_suspended: Optional[bool] = None,
+    db: Session = Depends(get_read_db),
+    admin: Principal = Depends(get_current_admin),
+):
+    stmt = (
+        select(
+            Provider.id,
+            Provider.user_id,
+            Provider.business_name,
+            Provider.rating,
+            Provider.is_verified.label("is_verified"),
+            Provider.is_active,
+            Provider.is_suspended,
+            Provider.created_at,
+        )
+        .where(*_provider_filters(is_verified, is_suspended))
+        .order_by(Provider.id)
+    )
+    return _export_response(exports.stream_rows(db, stmt, format), "providers", format)
+
+
+@router.get("/exports/services")
+@statement_budget(settings.STATEMENT_TIMEOUT_REPORTING_MS)
+def export_services(
+    format: ExportFormat = "csv",
+    flagged: Optional[bool] = None,
+    approved: Optional[bool] = None,
+    category: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    admin: Principal = Depends(get_current_admin),
+):
+    stmt = (
+        select(
+            Service.id,
+            Service.provider_id,
+            Service.title,
+            Service.category,
+            Service.price,
+            Service.duration_minutes,
+            *api_utils.service_coordinates(),
+            Service.flagged,
+            Service.flag_reason,
+            Service.approved,
+            Service.created_at,
+        )
+        .where(*_service_filters(flagged, approved, category))
+        .order_by(Service.id)
+    )
+    return _export_response(exports.stream_rows(db, stmt, format), "services", format)
+
+
+@router.get("/exports/reports")
+@statement_budget(settings.STATEMENT_TIMEOUT_REPORTING_MS)
+def export_reports(
+    format: ExportFormat = "csv",
+    status_filter: Optional[str] = Query(None, alias="status"),
+    report_type: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    admin: Principal = Depends(get_current_admin),
+):
+    stmt = select(*Report.__table__.c).where(*_report_filters(status_filter, report_type)).order_by(Report.id)
+    return _export_response(exports.stream_rows(db, stmt, format), "reports", format)
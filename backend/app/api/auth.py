@@ -1,27 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app import schemas, crud
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user_record
 from app.models import User
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt
 
+from app.core import security
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 router = APIRouter()
 
 def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
+    return security.verify_password(plain, hashed)[0]
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return security.hash_password(password)
 
+
+def _issue_token(user: User) -> dict:
+    # Include role in JWT token
+    to_encode = {
+        "sub": str(user.id),
+        "role": user.role,
+        "email": user.email,
+        # lets get_current_user authorize without a database read
+        "epoch": user.token_epoch or 0,
+        "pid": user.provider.id if user.provider else None,
+    }
+    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
+    return {"access_token": encoded_jwt, "token_type": "bearer"}
+
+
+def _store_rehash(db: Session, user: User, new_hash: str) -> None:
+    user.hashed_password = new_hash
+    db.commit()
+
+
+# register/login are async so hashing can await the process pool
+# (app.core.security); database calls still run in the threadpool.
 @router.post("/register", response_model=schemas.UserOut)
-def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
-    print("DB USER SEEN BY SESSION:", db.bind.url.username)
-    existing = crud.get_user_by_email(db, user_in.email)
+async def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(crud.get_user_by_email, db, user_in.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -30,31 +53,31 @@ def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
     if role not in ["customer", "provider"]:
         raise HTTPException(status_code=400, detail="Invalid role. Must be 'customer' or 'provider'")
     
-    hashed = get_password_hash(user_in.password)
-    user = crud.create_user(db, email=user_in.email, hashed_password=hashed, name=user_in.name, role=role)
+    hashed = await security.hasher.hash(user_in.password)
+    user = await run_in_threadpool(
+        crud.create_user, db, email=user_in.email, hashed_password=hashed, name=user_in.name, role=role
+    )
     return user
 
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: schemas.UserCreate, db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, form_data.email)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: schemas.UserCreate, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(crud.get_user_by_email, db, form_data.email)
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    
-    # Include role in JWT token
-    to_encode = {
-        "sub": str(user.id),
-        "role": user.role,
-        "email": user.email
-    }
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
-    return {"access_token": encoded_jwt, "token_type": "bearer"}
+    valid, new_hash = await security.hasher.verify(form_data.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is inactive")
+    if new_hash:
+        # stored hash used an older cost setting
+        await run_in_threadpool(_store_rehash, db, user, new_hash)
+    return await run_in_threadpool(_issue_token, user)
 
 
 @router.get("/me", response_model=schemas.UserOut)
 def get_current_user_info(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
 ):
     """Get current logged-in user information"""
     return current_user
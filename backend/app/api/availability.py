@@ -0,0 +1,188 @@
+"""
+Provider availability.
+
+A booking occupies ``[scheduled_at, ends_at)``. Active (pending/accepted)
+bookings of one provider may not overlap: the ``ex_bookings_provider_overlap``
+exclusion constraint enforces it and its GiST index answers the range
+queries below in O(log n) per provider. Working hours are optional; a
+provider without any rows is bookable at any time, and slot listings offer
+the whole day.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import Boolean, DateTime, Integer, Time, and_, column, exists, func, or_, select, values
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api.deps import get_read_db
+from app.core.config import settings
+from app.models import Booking, Provider, ProviderWorkingHours
+
+router = APIRouter()
+
+ACTIVE_STATUSES = ("pending", "accepted")
+
+
+def booking_range():
+    return func.tsrange(Booking.scheduled_at, Booking.ends_at)
+
+
+def overlapping_bookings(provider_id, start: datetime, end: datetime):
+    """Criteria for active bookings of ``provider_id`` overlapping ``[start, end)``.
+
+    ``provider_id`` may be a value or a correlated column.
+    """
+    return and_(
+        Booking.provider_id == provider_id,
+        Booking.status.in_(ACTIVE_STATUSES),
+        Booking.ends_at.isnot(None),
+        booking_range().op("&&")(func.tsrange(start, end)),
+    )
+
+
+def within_working_hours(provider_id, start: datetime, end: datetime):
+    """Criteria: the provider has no working hours configured, or one of them covers ``[start, end)``."""
+    configured = exists().where(ProviderWorkingHours.provider_id == provider_id)
+    last = end - timedelta(microseconds=1)
+    if last.date() != start.date():
+        return ~configured
+    covering = exists().where(
+        ProviderWorkingHours.provider_id == provider_id,
+        ProviderWorkingHours.weekday == start.weekday(),
+        ProviderWorkingHours.start_time <= start.time(),
+        ProviderWorkingHours.end_time >= last.time(),
+    )
+    return or_(~configured, covering)
+
+
+def has_conflict(db: Session, provider_id: int, start: datetime, end: datetime) -> bool:
+    return db.query(exists().where(overlapping_bookings(provider_id, start, end))).scalar()
+
+
+def is_within_working_hours(db: Session, provider_id: int, start: datetime, end: datetime) -> bool:
+    return db.query(within_working_hours(provider_id, start, end)).scalar()
+
+
+def conflicting_ranges(
+    db: Session, provider_id: int, ranges: List[Tuple[datetime, datetime]]
+) -> List[int]:
+    """
+    Indexes of ``ranges`` that overlap an active booking or fall outside the
+    provider's working hours, checked in one query against a ``VALUES`` list.
+    """
+    if not ranges:
+        return []
+    rows = []
+    for idx, (start, end) in enumerate(ranges):
+        last = end - timedelta(microseconds=1)
+        rows.append((idx, start, end, start.weekday(), start.time(), last.time(), last.date() == start.date()))
+    wanted = values(
+        column("idx", Integer),
+        column("starts_at", DateTime),
+        column("ends_at", DateTime),
+        column("weekday", Integer),
+        column("start_time", Time),
+        column("last_time", Time),
+        column("same_day", Boolean),
+        name="wanted",
+    ).data(rows)
+
+    busy = exists().where(
+        Booking.provider_id == provider_id,
+        Booking.status.in_(ACTIVE_STATUSES),
+        Booking.ends_at.isnot(None),
+        booking_range().op("&&")(func.tsrange(wanted.c.starts_at, wanted.c.ends_at)),
+    )
+    configured = exists().where(ProviderWorkingHours.provider_id == provider_id)
+    covering = exists().where(
+        ProviderWorkingHours.provider_id == provider_id,
+        ProviderWorkingHours.weekday == wanted.c.weekday,
+        ProviderWorkingHours.start_time <= wanted.c.start_time,
+        ProviderWorkingHours.end_time >= wanted.c.last_time,
+    )
+    outside = and_(configured, or_(~wanted.c.same_day, ~covering))
+    stmt = select(wanted.c.idx).where(or_(busy, outside)).order_by(wanted.c.idx)
+    return list(db.scalars(stmt))
+
+
+def free_slots(
+    db: Session,
+    provider_id: int,
+    day: date,
+    duration: timedelta,
+    step: timedelta,
+) -> List[schemas.AvailabilitySlot]:
+    hours = (
+        db.query(ProviderWorkingHours.start_time, ProviderWorkingHours.end_time)
+        .filter(
+            ProviderWorkingHours.provider_id == provider_id,
+            ProviderWorkingHours.weekday == day.weekday(),
+        )
+        .order_by(ProviderWorkingHours.start_time)
+        .all()
+    )
+    day_start = datetime.combine(day, time(0))
+    day_end = day_start + timedelta(days=1)
+    windows = [(datetime.combine(day, open_at), datetime.combine(day, close_at)) for open_at, close_at in hours]
+    if not windows and not db.query(
+        exists().where(ProviderWorkingHours.provider_id == provider_id)
+    ).scalar():
+        # same rule as within_working_hours: no working hours, no restriction
+        windows = [(day_start, day_end)]
+    if not windows:
+        return []
+
+    busy = (
+        db.query(Booking.scheduled_at, Booking.ends_at)
+        .filter(overlapping_bookings(provider_id, day_start, day_end))
+        .order_by(Booking.scheduled_at)
+        .all()
+    )
+
+    slots = []
+    for window_start, window_end in windows:
+        cursor = window_start
+        i = 0
+        while cursor + duration <= window_end:
+            slot_end = cursor + duration
+            # skip bookings that end before this slot; busy is sorted by start
+            while i < len(busy) and busy[i].ends_at <= cursor:
+                i += 1
+            clash = next(
+                (b for b in busy[i:] if b.scheduled_at < slot_end and b.ends_at > cursor),
+                None,
+            )
+            if clash is None:
+                slots.append(schemas.AvailabilitySlot(start=cursor, end=slot_end))
+                cursor += step
+            else:
+                # jump to the first step boundary after the clashing booking
+                behind = clash.ends_at - window_start
+                cursor = window_start + -(-behind // step) * step
+    return slots
+
+
+@router.get("/providers/{provider_id}/slots", response_model=schemas.ProviderSlotsOut)
+def provider_slots(
+    provider_id: int,
+    day: date = Query(..., alias="date", description="Day to list, YYYY-MM-DD"),
+    duration_minutes: Optional[int] = Query(None, gt=0, le=24 * 60),
+    step_minutes: int = Query(30, gt=0, le=24 * 60),
+    db: Session = Depends(get_read_db),
+):
+    """Free start times for a provider on one day, given working hours and active bookings."""
+    if not db.query(exists().where(Provider.id == provider_id)).scalar():
+        raise HTTPException(status_code=404, detail="Provider not found")
+    duration = duration_minutes or settings.DEFAULT_BOOKING_MINUTES
+    slots = free_slots(
+        db,
+        provider_id,
+        day,
+        timedelta(minutes=duration),
+        timedelta(minutes=step_minutes),
+    )
+    return schemas.ProviderSlotsOut(
+        provider_id=provider_id, date=day, duration_minutes=duration, slots=slots
+    )
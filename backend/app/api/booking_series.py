@@ -0,0 +1,121 @@
+"""
+Recurring booking series.
+
+A series is expanded into concrete bookings when it is created. All
+occurrences are checked against the provider's schedule with one range query
+(``availability.conflicting_ranges``) and written with one multi-row
+``INSERT ... RETURNING``; the audit rows go out in one batch and the booking
+events in one ``pg_notify`` at commit. A series is all or nothing: if any
+occurrence conflicts, nothing is booked. Callers commit.
+"""
+import calendar
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api import availability, utils as api_utils
+from app.core import rollups
+from app.core.audit import record_audit_batch
+from app.core.config import settings
+from app.core.events import stage_booking_event
+from app.models import Booking, BookingSeries, Service as ServiceModel
+
+
+class SeriesConflict(Exception):
+    def __init__(self, starts: List[datetime]):
+        super().__init__(starts)
+        self.starts = starts
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    # the 31st becomes the last day of shorter months
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def expand(starts_at: datetime, frequency: str, interval: int, occurrences: int) -> List[datetime]:
+    """Start times of every occurrence, first one included."""
+    if frequency == "monthly":
+        return [_add_months(starts_at, i * interval) for i in range(occurrences)]
+    step = timedelta(days=interval if frequency == "daily" else 7 * interval)
+    return [starts_at + i * step for i in range(occurrences)]
+
+
+def create_series(
+    db: Session,
+    user_id: int,
+    svc: ServiceModel,
+    provider_id: int,
+    payload: schemas.BookingSeriesCreate,
+) -> Tuple[BookingSeries, List[schemas.BookingOut]]:
+    duration = timedelta(minutes=svc.duration_minutes or settings.DEFAULT_BOOKING_MINUTES)
+    starts = expand(payload.starts_at, payload.frequency, payload.interval, payload.occurrences)
+    ranges = [(start, start + duration) for start in starts]
+
+    clashes = availability.conflicting_ranges(db, provider_id, ranges)
+    if clashes:
+        raise SeriesConflict([starts[i] for i in clashes])
+
+    series = BookingSeries(
+        user_id=user_id,
+        provider_id=provider_id,
+        service_id=svc.id,
+        frequency=payload.frequency,
+        interval=payload.interval,
+        occurrences=payload.occurrences,
+        starts_at=payload.starts_at,
+        notes=payload.notes,
+    )
+    db.add(series)
+    db.flush()
+
+    created = db.execute(
+        insert(Booking).returning(
+            Booking.id,
+            Booking.status,
+            Booking.user_id,
+            Booking.provider_id,
+            Booking.service_id,
+            Booking.scheduled_at,
+        ),
+        [
+            {
+                "service_id": svc.id,
+                "provider_id": provider_id,
+                "user_id": user_id,
+                "scheduled_at": start,
+                "ends_at": end,
+                "notes": payload.notes,
+                "status": "pending",
+                "price": svc.price,
+                "series_id": series.id,
+            }
+            for start, end in ranges
+        ],
+    ).all()
+
+    for row in created:
+        stage_booking_event(db, "booking_created", row)
+    rollups.record(db, bookings=len(created))
+    record_audit_batch(
+        db,
+        [
+            {
+                "actor_id": user_id,
+                "action": "booking_created",
+                "target_type": "booking",
+                "target_id": row.id,
+                "metadata": {"service_id": svc.id, "provider_id": provider_id, "series_id": series.id},
+            }
+            for row in created
+        ],
+    )
+    bookings = api_utils.bookings_to_schemas(
+        db, db.query(Booking).filter(Booking.series_id == series.id).order_by(Booking.scheduled_at)
+    )
+    return series, bookings
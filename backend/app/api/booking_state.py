@@ -0,0 +1,177 @@
+"""
+Booking state machine.
+
+Every transition is one conditional statement::
+
+    WITH locked AS (
+        SELECT id, status AS previous_status FROM bookings
+        WHERE id = :id AND provider_id = :p AND status IN (:allowed)
+        FOR UPDATE
+    ), transitioned AS (
+        UPDATE bookings SET status = :new FROM locked WHERE bookings.id = locked.id
+        RETURNING bookings.*, locked.previous_status
+    )
+    SELECT transitioned.*, services.*, lon, lat FROM transitioned LEFT JOIN services ...
+
+so the state check, the write and the response hydration take a single round
+trip, and of two concurrent transitions on the same booking only one can
+match the ``status IN (...)`` guard. The audit event, the booking event and
+the revenue and earnings rollups (which need the status the booking left, hence
+``locked``) are staged in the same transaction (see app.core.audit,
+app.core.events, app.core.rollups); callers commit.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, String, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, aliased
+
+from app import schemas
+from app.api import utils as api_utils
+from app.core import rollups
+from app.core.audit import record_audit, record_audit_batch
+from app.core.events import stage_booking_event
+from app.models import Booking, Service as ServiceModel
+
+# target status -> statuses it may be reached from
+TRANSITIONS = {
+    "accepted": {"pending"},
+    "rejected": {"pending"},
+    "completed": {"accepted"},
+    "cancelled": {"pending", "accepted"},
+}
+
+# provider-facing action names -> target status
+PROVIDER_ACTIONS = {
+    "accept": "accepted",
+    "reject": "rejected",
+    "complete": "completed",
+}
+
+
+def transition(
+    db: Session,
+    booking_id: int,
+    new_status: str,
+    actor_id: int,
+    provider_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    from_statuses: Optional[Iterable[str]] = None,
+    action: str = "booking_status_updated",
+) -> Optional[schemas.BookingOut]:
+    """
+    Move a booking to ``new_status`` if it is owned by ``provider_id`` /
+    ``user_id`` (when given) and currently in one of ``from_statuses``
+    (default: ``TRANSITIONS[new_status]``); a booking already in
+    ``new_status`` never matches. Returns ``None`` when nothing matched;
+    callers look the booking up only on that path to explain why.
+    """
+    allowed = set(from_statuses if from_statuses is not None else TRANSITIONS[new_status]) - {new_status}
+    conditions = [Booking.id == booking_id, Booking.status.in_(allowed)]
+    if provider_id is not None:
+        conditions.append(Booking.provider_id == provider_id)
+    if user_id is not None:
+        conditions.append(Booking.user_id == user_id)
+
+    locked = (
+        select(Booking.id, Booking.status.label("previous_status"))
+        .where(*conditions)
+        .with_for_update()
+        .cte("locked")
+    )
+    transitioned = (
+        update(Booking)
+        .where(Booking.id == locked.c.id)
+        .values(status=new_status)
+        .returning(*Booking.__table__.c, locked.c.previous_status)
+        .cte("transitioned")
+    )
+    booking = aliased(Booking, transitioned)
+    stmt = (
+        select(booking, ServiceModel, *api_utils.service_coordinates(), transitioned.c.previous_status)
+        .outerjoin(ServiceModel, ServiceModel.id == booking.service_id)
+        .execution_options(populate_existing=True)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return None
+    moved, previous_status = rows[0][0], rows[0][-1]
+    rollups.booking_status_changed(db, previous_status, new_status, moved)
+
+    record_audit(
+        db,
+        actor_id=actor_id,
+        action=action,
+        target_type="booking",
+        target_id=booking_id,
+        metadata={"status": new_status},
+    )
+    result = api_utils.booking_rows_to_schemas([row[:4] for row in rows])[0]
+    stage_booking_event(db, f"booking_{new_status}", result)
+    return result
+
+
+def transition_many(
+    db: Session,
+    provider_id: int,
+    actor_id: int,
+    items: List[Tuple[int, str]],
+) -> Dict[int, str]:
+    """
+    Apply many ``(booking_id, new_status)`` transitions for one provider with a
+    single ``UPDATE ... FROM (VALUES ...)``. Returns ``{booking_id: new_status}``
+    for the bookings that moved; the rest did not match their guard. Booking
+    ids must be unique.
+    """
+    if not items:
+        return {}
+    requested = values(
+        column("id", Integer),
+        column("new_status", String),
+        column("allowed", ARRAY(String)),
+        name="requested",
+    ).data([(booking_id, new, sorted(TRANSITIONS[new])) for booking_id, new in items])
+    locked = (
+        select(Booking.id, Booking.status.label("previous_status"), requested.c.new_status)
+        .where(
+            Booking.id == requested.c.id,
+            Booking.provider_id == provider_id,
+            Booking.status == func.any(requested.c.allowed),
+        )
+        .with_for_update(of=Booking)
+        .cte("locked")
+    )
+    stmt = (
+        update(Booking)
+        .where(Booking.id == locked.c.id)
+        .values(status=locked.c.new_status)
+        .returning(
+            Booking.id,
+            Booking.status,
+            Booking.user_id,
+            Booking.provider_id,
+            Booking.service_id,
+            Booking.scheduled_at,
+            Booking.price,
+            locked.c.previous_status,
+        )
+    )
+    moved = {}
+    for row in db.execute(stmt):
+        moved[row.id] = row.status
+        stage_booking_event(db, f"booking_{row.status}", row)
+        rollups.booking_status_changed(db, row.previous_status, row.status, row)
+    record_audit_batch(
+        db,
+        [
+            {
+                "actor_id": actor_id,
+                "action": "booking_status_updated",
+                "target_type": "booking",
+                "target_id": booking_id,
+                "metadata": {"status": new_status},
+            }
+            for booking_id, new_status in moved.items()
+        ],
+    )
+    return moved
@@ -1,54 +1,55 @@
-from typing import List
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import jwt
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.api import utils as api_utils
-from app.api.deps import get_current_user, get_db
+from app.api import availability, booking_series, booking_state, utils as api_utils
+from app.api.deps import get_current_user, get_db, principal_from_token
+from app.api.idempotency import Idempotency, idempotency
+from app.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    filter_bookings,
+    finish_page,
+    keyset_paginate,
+)
+from app.core import rollups
+from app.core.audit import record_audit
+from app.core.config import settings
+from app.core.events import bus as booking_event_bus, stage_booking_event
+from app.core.revocation import revocations
+from app.db.session import SessionLocal
 from app.models import Booking, Service as ServiceModel
 from sqlalchemy import func
 
 router = APIRouter()
 
 
-def _booking_to_schema(db: Session, booking: Booking) -> schemas.BookingOut:
-    service = (
-        db.query(ServiceModel).filter(ServiceModel.id == booking.service_id).first()
-    )
-    return schemas.BookingOut(
-        id=booking.id,
-        service_id=booking.service_id,
-        user_id=booking.user_id,
-        provider_id=booking.provider_id,
-        scheduled_at=booking.scheduled_at,
-        notes=booking.notes,
-        status=booking.status,
-        created_at=booking.created_at.isoformat() if booking.created_at else None,
-        service=api_utils.service_to_schema(db, service) if service else None,
-    )
-
-
-@router.post("/", response_model=schemas.BookingOut, status_code=status.HTTP_201_CREATED)
-def create_booking(
-    payload: schemas.BookingCreate,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    svc = db.query(ServiceModel).filter(ServiceModel.id == payload.service_id).first()
+def _bookable_service(db: Session, current_user, service_id: int, requested_provider_id: Optional[int]):
+    """Look up the service being booked and the provider who will serve it."""
+    svc = db.query(ServiceModel).filter(ServiceModel.id == service_id).first()
     if not svc:
         raise HTTPException(status_code=404, detail="Service not found")
 
     # Users cannot book their own service
-    if current_user.provider and current_user.provider.id == svc.provider_id:
+    if current_user.provider_id == svc.provider_id:
         raise HTTPException(
             status_code=400, detail="Providers cannot book their own services"
         )
 
-    provider_id = payload.provider_id or svc.provider_id
+    provider_id = requested_provider_id or svc.provider_id
 
     # Prevent booking your own service (self-matching protection)
-    if current_user.provider and current_user.provider.id == provider_id:
+    if current_user.provider_id == provider_id:
         raise HTTPException(
             status_code=400, detail="Providers cannot book their own services"
         )
@@ -59,20 +60,52 @@ def create_booking(
             status_code=400,
             detail="Selected provider does not own the requested service",
         )
+    return svc, provider_id
+
+
+@router.post("/", response_model=schemas.BookingOut, status_code=status.HTTP_201_CREATED)
+def create_booking(
+    payload: schemas.BookingCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    idem: Idempotency = Depends(idempotency),
+):
+    if idem.replay:
+        return idem.replay
+
+    svc, provider_id = _bookable_service(db, current_user, payload.service_id, payload.provider_id)
+
+    starts_at = payload.scheduled_at
+    ends_at = starts_at + timedelta(
+        minutes=svc.duration_minutes or settings.DEFAULT_BOOKING_MINUTES
+    )
+    if not availability.is_within_working_hours(db, provider_id, starts_at, ends_at):
+        raise HTTPException(status_code=409, detail="Outside the provider's working hours")
+    if availability.has_conflict(db, provider_id, starts_at, ends_at):
+        raise HTTPException(
+            status_code=409, detail="Provider is not available at the requested time"
+        )
 
     booking = Booking(
         service_id=svc.id,
         provider_id=provider_id,
         user_id=current_user.id,
-        scheduled_at=payload.scheduled_at,
+        scheduled_at=starts_at,
+        ends_at=ends_at,
         notes=payload.notes,
         status="pending",
         price=svc.price,  # Store price at time of booking
     )
     db.add(booking)
-    db.commit()
-    db.refresh(booking)
-    _audit(
+    try:
+        db.flush()
+    except IntegrityError:
+        # lost a race for the same slot (ex_bookings_provider_overlap)
+        db.rollback()
+        raise HTTPException(
+            status_code=409, detail="Provider is not available at the requested time"
+        )
+    record_audit(
         db,
         actor_id=current_user.id,
         action="booking_created",
@@ -80,44 +113,129 @@ def create_booking(
         target_id=booking.id,
         metadata={"service_id": svc.id, "provider_id": provider_id},
     )
-    return _booking_to_schema(db, booking)
+    stage_booking_event(db, "booking_created", booking)
+    rollups.record(db, bookings=1)
+    result = api_utils.booking_to_schema(db, booking)
+    idem.save(db, status.HTTP_201_CREATED, result)
+    db.commit()
+    return result
+
+
+@router.post("/series", response_model=schemas.BookingSeriesOut, status_code=status.HTTP_201_CREATED)
+def create_booking_series(
+    payload: schemas.BookingSeriesCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    idem: Idempotency = Depends(idempotency),
+):
+    """Book every occurrence of a recurrence rule, or none if any of them conflicts."""
+    if idem.replay:
+        return idem.replay
+
+    svc, provider_id = _bookable_service(db, current_user, payload.service_id, payload.provider_id)
+    try:
+        series, bookings = booking_series.create_series(db, current_user.id, svc, provider_id, payload)
+    except booking_series.SeriesConflict as exc:
+        raise HTTPException(
+            status_code=409,
+            detail="Provider is not available for: "
+            + ", ".join(start.isoformat() for start in exc.starts),
+        )
+    except IntegrityError:
+        # a concurrent booking took one of the slots (ex_bookings_provider_overlap)
+        db.rollback()
+        raise HTTPException(
+            status_code=409, detail="Provider is not available at the requested time"
+        )
+
+    result = schemas.BookingSeriesOut(
+        id=series.id,
+        service_id=series.service_id,
+        provider_id=series.provider_id,
+        frequency=series.frequency,
+        interval=series.interval,
+        occurrences=series.occurrences,
+        starts_at=series.starts_at,
+        bookings=bookings,
+    )
+    idem.save(db, status.HTTP_201_CREATED, result)
+    db.commit()
+    return result
 
 
 @router.get("/", response_model=List[schemas.BookingOut])
 def list_user_bookings(
-    db: Session = Depends(get_db), current_user=Depends(get_current_user)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
 ):
-    bookings = (
-        db.query(Booking)
-        .filter(Booking.user_id == current_user.id)
-        .order_by(Booking.created_at.desc())
-        .all()
+    """Newest bookings first; follow ``X-Next-Cursor`` for older pages."""
+    query = filter_bookings(
+        db.query(Booking).filter(Booking.user_id == current_user.id),
+        status_filter,
+        start_date,
+        end_date,
     )
-    return [_booking_to_schema(db, b) for b in bookings]
+    query = keyset_paginate(query, Booking.created_at, cursor, descending=True)
+    items = api_utils.bookings_to_schemas(db, query, limit=limit + 1)
+    return finish_page(items, "created_at", limit, response)
 
 
 @router.get("/user", response_model=List[schemas.BookingOut])
 def list_user_bookings_alias(
-    db: Session = Depends(get_db), current_user=Depends(get_current_user)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
 ):
     """Explicit user bookings endpoint"""
-    return list_user_bookings(db=db, current_user=current_user)
+    return list_user_bookings(
+        response=response,
+        cursor=cursor,
+        limit=limit,
+        status_filter=status_filter,
+        start_date=start_date,
+        end_date=end_date,
+        db=db,
+        current_user=current_user,
+    )
 
 
 @router.get("/provider/", response_model=List[schemas.BookingOut])
 def list_provider_bookings(
-    db: Session = Depends(get_db), current_user=Depends(get_current_user)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
 ):
-    if not current_user.provider:
+    """
+    Upcoming bookings (``start_date`` defaults to now; pass an earlier one for
+    history), soonest first; follow ``X-Next-Cursor`` for later pages.
+    """
+    if current_user.provider_id is None:
         raise HTTPException(status_code=403, detail="Provider profile required")
-    bookings = (
-        db.query(Booking)
-        .filter(Booking.provider_id == current_user.provider.id)
-        .order_by(Booking.scheduled_at.asc())
-        .all()
+    query = filter_bookings(
+        db.query(Booking).filter(Booking.provider_id == current_user.provider_id),
+        status_filter,
+        start_date or datetime.utcnow(),
+        end_date,
     )
-    # enrich with service data already via _booking_to_schema
-    return [_booking_to_schema(db, b) for b in bookings]
+    query = keyset_paginate(query, Booking.scheduled_at, cursor)
+    items = api_utils.bookings_to_schemas(db, query, limit=limit + 1)
+    return finish_page(items, "scheduled_at", limit, response)
 
 
 @router.put("/{booking_id}/status", response_model=schemas.BookingOut)
@@ -127,32 +245,30 @@ def update_booking_status(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    if payload.status not in {"pending", "accepted", "rejected"}:
+    # State rules: only pending bookings can be accepted/rejected via this endpoint;
+    # "pending" itself would be a no-op transition (audited and published for nothing).
+    if payload.status not in {"accepted", "rejected"}:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    if not current_user.provider or booking.provider_id != current_user.provider.id:
-        raise HTTPException(status_code=403, detail="Only provider can update status")
-
-    # State rules: only pending bookings can be accepted/rejected via this endpoint.
-    if booking.status != "pending":
+    result = None
+    if current_user.provider_id is not None:
+        result = booking_state.transition(
+            db,
+            booking_id,
+            payload.status,
+            actor_id=current_user.id,
+            provider_id=current_user.provider_id,
+            from_statuses={"pending"},
+        )
+    if result is None:
+        booking = db.query(Booking).filter(Booking.id == booking_id).first()
+        if not booking:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        if booking.provider_id != current_user.provider_id:
+            raise HTTPException(status_code=403, detail="Only provider can update status")
         raise HTTPException(status_code=400, detail="Only pending bookings can be updated")
-
-    booking.status = payload.status
-    db.add(booking)
     db.commit()
-    db.refresh(booking)
-    _audit(
-        db,
-        actor_id=current_user.id,
-        action="booking_status_updated",
-        target_type="booking",
-        target_id=booking.id,
-        metadata={"status": booking.status},
-    )
-    return _booking_to_schema(db, booking)
+    return result
 
 
 @router.put("/{booking_id}/cancel", response_model=schemas.BookingOut)
@@ -160,44 +276,158 @@ def cancel_booking(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
+    idem: Idempotency = Depends(idempotency),
 ):
-    booking = (
-        db.query(Booking)
-        .filter(Booking.id == booking_id, Booking.user_id == current_user.id)
-        .first()
-    )
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
+    if idem.replay:
+        return idem.replay
 
-    if booking.status not in {"pending", "accepted"}:
-        raise HTTPException(
-            status_code=400, detail="Only pending or accepted bookings can be cancelled"
-        )
-
-    booking.status = "cancelled"
-    db.commit()
-    db.refresh(booking)
-    _audit(
+    result = booking_state.transition(
         db,
+        booking_id,
+        "cancelled",
         actor_id=current_user.id,
+        user_id=current_user.id,
         action="booking_cancelled",
-        target_type="booking",
-        target_id=booking.id,
-        metadata={"status": booking.status},
     )
-    return _booking_to_schema(db, booking)
+    if result is None:
+        booking = (
+            db.query(Booking)
+            .filter(Booking.id == booking_id, Booking.user_id == current_user.id)
+            .first()
+        )
+        if not booking:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        raise HTTPException(
+            status_code=400, detail="Only pending or accepted bookings can be cancelled"
+        )
+    idem.save(db, status.HTTP_200_OK, result)
+    db.commit()
+    return result
 
 
-def _audit(db: Session, actor_id: int, action: str, target_type: str, target_id: int, metadata: dict = None):
-    from app.models import AuditLog  # local import to avoid circular
-    log = AuditLog(
-        actor_id=actor_id,
-        action=action,
-        target_type=target_type,
-        target_id=target_id,
-        meta=str(metadata or {}),
-    )
-    db.add(log)
-    db.commit()
+optional_bearer = HTTPBearer(auto_error=False)
+
+# stream tickets carry this audience, so they are refused as bearer tokens
+STREAM_AUDIENCE = "booking-events"
+
+
+def _bearer_identity(token: str):
+    db = SessionLocal()
+    try:
+        principal = principal_from_token(token, db)
+    finally:
+        db.close()
+    # any later revocation raises the minimum epoch past this one
+    return principal.id, principal.provider_id, revocations.min_epoch(principal.id)
+
+
+def _ticket_identity(ticket: str):
+    try:
+        payload = jwt.decode(ticket, settings.SECRET_KEY, algorithms=["HS256"], audience=STREAM_AUDIENCE)
+        user_id, epoch = int(payload["sub"]), int(payload["epoch"])
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+    if revocations.is_revoked(user_id, epoch):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    provider_id = payload.get("pid")
+    return user_id, int(provider_id) if provider_id is not None else None, epoch
+
+
+def _sse(evt: dict) -> str:
+    return f"id: {evt['id']}\nevent: {evt['type']}\ndata: {json.dumps(evt)}\n\n"
 
 
+def _closing(event_type: str, reason: str) -> str:
+    return f"event: {event_type}\ndata: {json.dumps({'reason': reason})}\n\n"
+
+
+async def _event_stream(request: Request, accepts, last_event_id: Optional[int], user_id: int, epoch: int):
+    sub = booking_event_bus.subscribe(accepts)
+    try:
+        replayed = set()
+        if last_event_id is not None:
+            backlog = booking_event_bus.since(last_event_id, accepts)
+            if backlog is None:
+                # history no longer reaches back: client should refetch its lists
+                yield "event: reset\ndata: {}\n\n"
+            else:
+                for evt in backlog:
+                    replayed.add(evt["id"])
+                    yield _sse(evt)
+        while True:
+            if revocations.is_revoked(user_id, epoch):
+                yield _closing("revoked", "Token has been revoked")
+                break
+            if sub.overflowed:
+                # events were dropped; reconnecting with Last-Event-ID replays them
+                yield _closing("overflow", "Too many undelivered events; reconnect to resume")
+                break
+            if await request.is_disconnected():
+                break
+            try:
+                evt = await asyncio.wait_for(
+                    sub.queue.get(), timeout=settings.BOOKING_EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if evt["id"] not in replayed:
+                yield _sse(evt)
+    finally:
+        booking_event_bus.unsubscribe(sub)
+
+
+@router.post("/events/ticket", response_model=schemas.StreamTicketOut)
+def booking_events_ticket(current_user=Depends(get_current_user)):
+    """
+    Short-lived ticket for ``GET /bookings/events?ticket=...``: EventSource
+    can't send an Authorization header, and a bearer token in the query string
+    would end up in access logs. Fetch a new one before each (re)connect.
+    """
+    expires_in = settings.BOOKING_EVENTS_TICKET_SECONDS
+    claims = {
+        "sub": str(current_user.id),
+        "pid": current_user.provider_id,
+        "epoch": revocations.min_epoch(current_user.id),
+        "aud": STREAM_AUDIENCE,
+        "exp": datetime.utcnow() + timedelta(seconds=expires_in),
+    }
+    return {"ticket": jwt.encode(claims, settings.SECRET_KEY, algorithm="HS256"), "expires_in": expires_in}
+
+
+@router.get("/events")
+async def booking_events(
+    request: Request,
+    ticket: Optional[str] = Query(None, description="Stream ticket from POST /bookings/events/ticket"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+):
+    """
+    Server-sent events for bookings the caller made or (as a provider) received:
+    booking_created / _accepted / _rejected / _cancelled / _completed.
+    Reconnect with ``Last-Event-ID`` to resume; a ``reset`` event means the
+    gap could not be replayed and lists should be refetched. The stream ends
+    with ``overflow`` when the client falls too far behind (reconnect to
+    resume) and with ``revoked`` once the caller's tokens are revoked.
+    """
+    if credentials:
+        user_id, provider_id, epoch = await run_in_threadpool(_bearer_identity, credentials.credentials)
+    elif ticket:
+        user_id, provider_id, epoch = _ticket_identity(ticket)
+    else:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    def accepts(evt: dict) -> bool:
+        return evt["user_id"] == user_id or (
+            provider_id is not None and evt["provider_id"] == provider_id
+        )
+
+    try:
+        resume_from = int(last_event_id) if last_event_id else None
+    except ValueError:
+        resume_from = None
+    return StreamingResponse(
+        _event_stream(request, accepts, resume_from, user_id, epoch),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,156 @@
+"""
+Provider calendar: the booking window, incremental sync and the iCal feed.
+
+Every read is one statement, bookings joined to the customer's name and the
+service title, ranged on ``ix_bookings_provider_scheduled_at`` (windows) or
+``ix_bookings_provider_updated_at`` (sync).
+
+Sync tokens encode the ``(updated_at, id)`` of the last change returned.
+``updated_at`` is the writing transaction's start time, so a write can commit
+after a later-started one was already synced; a final-page token therefore
+reaches back ``CALENDAR_SYNC_OVERLAP_SECONDS``, and clients apply events as
+upserts by id. Bookings are never deleted through the API: cancellations and
+rejections arrive as status changes.
+
+The iCal feed is fetched by calendar apps that store (and log) its URL, so it
+is not authenticated with an access token. Each provider gets a random feed
+key instead: it only reads that provider's feed, never expires, and rotating
+or revoking it replaces ``providers.calendar_feed_hash``. Only the key's
+sha256 is stored.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+
+from app import schemas
+from app.api.pagination import decode_cursor, encode_cursor
+from app.core.config import settings
+from app.models import Booking, Service as ServiceModel, User
+
+# booking status -> iCalendar VEVENT STATUS
+ICAL_STATUS = {
+    "pending": "TENTATIVE",
+    "accepted": "CONFIRMED",
+    "completed": "CONFIRMED",
+    "rejected": "CANCELLED",
+    "cancelled": "CANCELLED",
+}
+
+
+def new_feed_key() -> Tuple[str, str]:
+    """A fresh feed key and the hash to store for it."""
+    key = secrets.token_urlsafe(32)
+    return key, feed_key_hash(key)
+
+
+def feed_key_hash(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def calendar_query(db: Session, provider_id: int) -> Query:
+    return (
+        db.query(
+            Booking.id,
+            Booking.scheduled_at,
+            Booking.ends_at,
+            Booking.status,
+            Booking.notes,
+            Booking.updated_at,
+            User.name.label("user_name"),
+            ServiceModel.title.label("service_title"),
+        )
+        .outerjoin(User, User.id == Booking.user_id)
+        .outerjoin(ServiceModel, ServiceModel.id == Booking.service_id)
+        .filter(Booking.provider_id == provider_id)
+    )
+
+
+def to_event(row) -> schemas.ProviderCalendarEvent:
+    return schemas.ProviderCalendarEvent(
+        id=row.id,
+        service_title=row.service_title or "Unknown Service",
+        when_at=row.scheduled_at.isoformat(),
+        ends_at=row.ends_at.isoformat() if row.ends_at else None,
+        status=row.status,
+        user_name=row.user_name,
+        notes=row.notes,
+    )
+
+
+def changes_since(
+    db: Session, provider_id: int, token: Optional[str], limit: int
+) -> Tuple[List[schemas.ProviderCalendarEvent], str, bool]:
+    """Bookings changed after ``token`` (all of them without one), oldest change first."""
+    query = calendar_query(db, provider_id)
+    key = tuple_(Booking.updated_at, Booking.id)
+    if token:
+        query = query.filter(key > tuple_(*decode_cursor(token)))
+    rows = query.order_by(Booking.updated_at, Booking.id).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        next_token = encode_cursor(rows[-1].updated_at, rows[-1].id)
+    elif rows:
+        overlap = timedelta(seconds=settings.CALENDAR_SYNC_OVERLAP_SECONDS)
+        next_token = encode_cursor(rows[-1].updated_at - overlap, 0)
+    else:
+        next_token = token or encode_cursor(datetime.min, 0)
+    return [to_event(row) for row in rows], next_token, has_more
+
+
+def _ical_text(value: str) -> str:
+    value = value.replace("\r\n", "\n").replace("\r", "\n")
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ical_time(value: datetime) -> str:
+    # scheduled times are stored as naive UTC
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _fold(line: str) -> str:
+    """Fold content lines at 75 octets (RFC 5545 3.1)."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts, start, width = [], 0, 75
+    while start < len(encoded):
+        end = min(start + width, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1  # don't split a UTF-8 sequence
+        parts.append(encoded[start:end].decode())
+        start, width = end, 74  # continuation lines start with a space
+    return "\r\n ".join(parts)
+
+
+def render_ical(rows: Iterable, calendar_name: str) -> str:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//HelpX//Provider Calendar//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ical_text(calendar_name)}",
+    ]
+    for row in rows:
+        ends_at = row.ends_at or row.scheduled_at + timedelta(minutes=settings.DEFAULT_BOOKING_MINUTES)
+        description = f"Customer: {row.user_name or 'unknown'}"
+        if row.notes:
+            description += f"\n{row.notes}"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:booking-{row.id}@helpx",
+            f"DTSTAMP:{_ical_time(row.updated_at)}",
+            f"DTSTART:{_ical_time(row.scheduled_at)}",
+            f"DTEND:{_ical_time(ends_at)}",
+            f"SUMMARY:{_ical_text(row.service_title or 'Booking')}",
+            f"DESCRIPTION:{_ical_text(description)}",
+            f"STATUS:{ICAL_STATUS.get(row.status, 'TENTATIVE')}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
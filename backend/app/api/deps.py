@@ -1,58 +1,119 @@
-from typing import Generator
+from typing import Generator, Optional
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.principals import Principal, get_principal
+from app.core.revocation import revocations
+from app.db.replicas import USER_KEY, router as replica_router
 from app.db.session import SessionLocal
+from app.db.timeouts import budget_for, set_deadline
 from app.models import User
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-def get_db() -> Generator[Session, None, None]:
+def get_db(request: Request) -> Generator[Session, None, None]:
     db = SessionLocal()
+    set_deadline(db, budget_for(request.scope.get("route")))
     try:
         yield db
     finally:
         db.close()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    token = credentials.credentials
+def _token_subject(token: str) -> Optional[int]:
+    try:
+        return int(jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"]).get("sub"))
+    except Exception:
+        return None
+
 
+def get_read_db(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> Generator[Session, None, None]:
+    """
+    Session for read-only handlers: a replica when configured, unless the
+    caller wrote recently (see app.db.replicas). Never write through it.
+    """
+    user_id = _token_subject(credentials.credentials) if credentials else None
+    db = SessionLocal(bind=replica_router.engine_for(user_id))
+    set_deadline(db, budget_for(request.scope.get("route")))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def principal_from_token(token: str, db: Session) -> Principal:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         user_id = int(payload.get("sub"))
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    if payload.get("epoch") is not None:
+        if revocations.is_revoked(user_id, int(payload["epoch"])):
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+        # authorized from the claims alone: deactivation, role changes and a
+        # new provider profile all revoke the tokens issued before them
+        pid = payload.get("pid")
+        return Principal(
+            id=user_id,
+            role=payload.get("role"),
+            is_active=True,
+            provider_id=int(pid) if pid is not None else None,
+        )
 
-    if not user:
+    # tokens issued before revocation epochs use the cached snapshot
+    principal = get_principal(db, user_id)
+
+    if not principal:
         raise HTTPException(status_code=401, detail="User not found")
 
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(status_code=403, detail="User account is inactive")
 
+    return principal
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """Cached snapshot of the caller; see app.core.principals."""
+    principal = principal_from_token(credentials.credentials, db)
+    # lets app.db.replicas pin this user to the primary after a write
+    db.info[USER_KEY] = principal.id
+    return principal
+
+
+def get_current_user_record(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> User:
+    """The caller's ``User`` row, for handlers that need more than the principal."""
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
     return user
 
 
 def get_current_admin(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
 
 def get_current_provider(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if current_user.role not in ["provider", "admin"]:
         raise HTTPException(status_code=403, detail="Provider access required")
     return current_user
@@ -0,0 +1,162 @@
+"""
+``Idempotency-Key`` support for booking writes.
+
+The key is claimed with ``INSERT ... ON CONFLICT`` inside the request's own
+transaction and the response is stored before the business commit, so the
+claim, the write and the stored response commit together. A concurrent
+duplicate blocks on the primary key until the first request commits and then
+replays its response; if the first request fails, its claim rolls back and
+the retry proceeds normally. Expired keys are reclaimed on conflict and swept
+periodically: at most once per ``IDEMPOTENCY_SWEEP_INTERVAL_SECONDS`` a request
+schedules a background sweep on its own session, deleting in batches of
+``IDEMPOTENCY_SWEEP_BATCH_SIZE`` so neither the request's transaction nor its
+latency is involved (``scripts/rollups.py sweep-idempotency-keys`` runs the
+same sweep by hand).
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import BackgroundTasks, Depends, Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.core.config import settings
+from app.core.principals import Principal
+from app.db.session import SessionLocal
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+_last_sweep = 0.0
+
+
+class Idempotency:
+    """Per-request handle returned by the ``idempotency`` dependency."""
+
+    def __init__(self, user_id: int, key: Optional[str], replay: Optional[JSONResponse] = None):
+        self.user_id = user_id
+        self.key = key
+        self.replay = replay
+
+    def save(self, db: Session, status_code: int, body: Any) -> None:
+        """Attach the response to the claimed key; committed with the caller's transaction."""
+        if not self.key:
+            return
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == self.user_id, IdempotencyKey.key == self.key
+        ).update(
+            {"status_code": status_code, "response": json.dumps(jsonable_encoder(body))},
+            synchronize_session=False,
+        )
+
+
+async def request_fingerprint(request: Request) -> str:
+    body = await request.body()
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def sweep_expired(batch_size: Optional[int] = None) -> int:
+    """Delete expired keys on a separate session, one short transaction per batch."""
+    batch_size = batch_size or settings.IDEMPOTENCY_SWEEP_BATCH_SIZE
+    expired = (
+        select(IdempotencyKey.user_id, IdempotencyKey.key)
+        .where(IdempotencyKey.expires_at < datetime.utcnow())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = delete(IdempotencyKey).where(tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(expired))
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            deleted = db.execute(stmt).rowcount
+            db.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+    finally:
+        db.close()
+
+
+def _sweep() -> None:
+    try:
+        deleted = sweep_expired()
+        if deleted:
+            logger.info("Swept %s expired idempotency keys", deleted)
+    except Exception as exc:
+        logger.warning("Idempotency key sweep failed: %s", exc)
+
+
+def _maybe_sweep(background_tasks: BackgroundTasks) -> None:
+    global _last_sweep
+    now = time.monotonic()
+    if now - _last_sweep < settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS:
+        return
+    _last_sweep = now
+    background_tasks.add_task(_sweep)
+
+
+def idempotency(
+    background_tasks: BackgroundTasks,
+    key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    fingerprint: str = Depends(request_fingerprint),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> Idempotency:
+    if not key:
+        return Idempotency(current_user.id, None)
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+    _maybe_sweep(background_tasks)
+
+    now = datetime.utcnow()
+    stmt = pg_insert(IdempotencyKey).values(
+        user_id=current_user.id,
+        key=key,
+        fingerprint=fingerprint,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+        set_={
+            "fingerprint": stmt.excluded.fingerprint,
+            "expires_at": stmt.excluded.expires_at,
+            "status_code": None,
+            "response": None,
+        },
+        where=IdempotencyKey.expires_at < now,
+    ).returning(IdempotencyKey.key)
+    if db.execute(stmt).first():
+        return Idempotency(current_user.id, key)
+
+    stored = (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.user_id == current_user.id, IdempotencyKey.key == key)
+        .first()
+    )
+    if stored.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=422, detail="Idempotency-Key was already used for a different request"
+        )
+    if stored.response is None:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+    replay = JSONResponse(
+        status_code=stored.status_code,
+        content=json.loads(stored.response),
+        headers={"Idempotent-Replayed": "true"},
+    )
+    return Idempotency(current_user.id, key, replay)
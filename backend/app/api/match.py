@@ -2,17 +2,21 @@ import logging
 import math
 import time
 from collections import defaultdict
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, text
+from sqlalchemy import text
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.api.deps import get_current_user, get_db
+from app.api import match_queries
+from app.api.deps import get_current_user, get_read_db
 from app.core.config import settings
-from app.models import Booking, Provider, Report, Service, User
+from app.core.principals import Principal
+from app.db.timeouts import statement_budget
+from app.models import Service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -21,7 +25,6 @@ logger = logging.getLogger(__name__)
 DEFAULT_RADIUS_KM = 10.0
 DEFAULT_TOP_N = 5
 MAX_ALLOWED_BOOKINGS = 20  # used to normalise workload_penalty
-ACTIVE_BOOKING_STATUSES = {"pending", "accepted"}
 SUPPORTED_ALGORITHMS = {"hybrid", "baseline", "trust_hybrid"}
 DOMINATION_CAP = 50  # soft cap for frequency penalty
 
@@ -56,6 +59,7 @@ def _validate_location(lat: Optional[float], lon: Optional[float]) -> None:
     response_model=schemas.ProviderMatchResponse,
     summary="Rank providers near a job location",
 )
+@statement_budget(settings.STATEMENT_TIMEOUT_SEARCH_MS)
 def match_providers(
     service_id: int = Query(..., gt=0),
     user_lat: float = Query(..., description="Latitude of the job/request"),
@@ -64,8 +68,10 @@ def match_providers(
     top_n: int = Query(DEFAULT_TOP_N, gt=0, le=50, description="Number of results to return"),
     algorithm: str = Query("trust_hybrid", description="Algorithm to use: trust_hybrid|hybrid|baseline"),
     debug: bool = Query(False, description="Return timing/plan metadata"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    available_at: Optional[datetime] = Query(None, description="Only providers free at this time"),
+    duration_minutes: Optional[int] = Query(None, gt=0, le=24 * 60),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Hybrid distance-based matching with multi-constraint filtering.
@@ -78,61 +84,36 @@ def match_providers(
         raise HTTPException(status_code=400, detail="Unsupported algorithm")
 
     # Get the seed service to infer category and avoid invalid requests
-    service = db.query(Service).filter(Service.id == service_id).first()
+    service = db.get(Service, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
 
-    user_point = func.ST_SetSRID(func.ST_MakePoint(user_lon, user_lat), 4326)
-    radius_m = radius_km * 1000
-
-    # Workload per provider (active bookings only, future-facing)
-    workload_subq = (
-        db.query(
-            Booking.provider_id.label("provider_id"),
-            func.count(Booking.id).label("active_bookings"),
-        )
-        .filter(
-            Booking.status.in_(ACTIVE_BOOKING_STATUSES),
-            Booking.scheduled_at >= func.now(),
-        )
-        .group_by(Booking.provider_id)
-        .subquery()
-    )
-
-    base_query = (
-        db.query(
-            Service.id.label("service_id"),
-            Service.provider_id.label("provider_id"),
-            func.ST_Distance(Service.location, user_point).label("distance_m"),
-            Provider.rating.label("rating"),
-            func.coalesce(workload_subq.c.active_bookings, 0).label("active_bookings"),
-        )
-        .join(Provider, Provider.id == Service.provider_id)
-        .outerjoin(workload_subq, workload_subq.c.provider_id == Provider.id)
-        .filter(
-            Service.category == service.category,
-            Service.location.isnot(None),
-            Service.approved == True,  # noqa: E712
-            Provider.is_active == True,  # noqa: E712
-            Provider.is_verified == True,  # noqa: E712
-            Provider.is_suspended == False,  # noqa: E712
-            func.ST_DWithin(Service.location, user_point, radius_m),
+    # candidates with workload (active, future-facing bookings); statements are
+    # pre-built in match_queries, only the parameters change per request
+    statement = match_queries.CANDIDATES
+    params = {
+        "category": service.category,
+        "user_lon": user_lon,
+        "user_lat": user_lat,
+        "radius_m": radius_km * 1000,
+        "exclude_provider_id": current_user.provider_id,
+    }
+    if available_at is not None:
+        ends_at = available_at + timedelta(
+            minutes=duration_minutes or service.duration_minutes or settings.DEFAULT_BOOKING_MINUTES
         )
-    )
-
-    # Prevent providers from matching their own services (self-booking)
-    if current_user.provider:
-        base_query = base_query.filter(Provider.id != current_user.provider.id)
+        statement = match_queries.CANDIDATES_AVAILABLE
+        params.update(match_queries.availability_params(available_at, ends_at))
 
     start = time.perf_counter()
-    rows = base_query.all()
+    rows = db.execute(statement, params).all()
     elapsed_ms = (time.perf_counter() - start) * 1000
     candidate_count = len(rows)
 
     explain_plan = None
     if debug:
         try:
-            compiled = base_query.statement.compile(
+            compiled = statement.params(**params).compile(
                 dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
             )
             explain_sql = text(f"EXPLAIN ANALYZE {compiled}")
@@ -157,6 +138,7 @@ def match_providers(
 
     # Determine max distance for normalisation (avoid divide-by-zero)
     max_distance = max(float(r.distance_m or 0) for r in rows) or 1.0
+    trust = match_queries.trust_inputs(db, (r.provider_id for r in rows))
     matches: List[schemas.ProviderMatchResult] = []
     debug_components: List[dict] = []
 
@@ -167,7 +149,7 @@ def match_providers(
         inverse_rating = 1 - max(0.0, min(rating / 5.0, 1.0))
         active_bookings = int(row.active_bookings or 0)
         workload_penalty = min(active_bookings / MAX_ALLOWED_BOOKINGS, 1.0)
-        trust_score = _compute_trust_score(db, row.provider_id)
+        trust_score = trust.get(row.provider_id, match_queries.TrustInputs()).score
         trust_component = 1 - trust_score
         availability_penalty = 0.0  # all candidates are active/verified/suspended-checked
         total_freq = sum(stats["provider_freq"].get(row.provider_id, 0) for stats in MATCH_STATS.values())
@@ -304,53 +286,6 @@ def _std(sum_val: float, sum_sq: float, count: int) -> float:
     return math.sqrt(variance) if variance > 0 else 0.0
 
 
-def _compute_trust_score(db: Session, provider_id: int) -> float:
-    total_bookings = (
-        db.query(func.count(Booking.id))
-        .filter(Booking.provider_id == provider_id)
-        .scalar()
-        or 0
-    )
-    accepted = (
-        db.query(func.count(Booking.id))
-        .filter(Booking.provider_id == provider_id, Booking.status == "accepted")
-        .scalar()
-        or 0
-    )
-    cancelled = (
-        db.query(func.count(Booking.id))
-        .filter(Booking.provider_id == provider_id, Booking.status == "cancelled")
-        .scalar()
-        or 0
-    )
-    provider = db.query(Provider).filter(Provider.id == provider_id).first()
-    rating = float(provider.rating or 0) if provider else 0
-    rating_norm = min(max(rating / 5.0, 0.0), 1.0)
-
-    reports_count = (
-        db.query(func.count(Report.id))
-        .filter(
-            Report.target_id == provider_id,
-            func.coalesce(Report.target_type, Report.report_type) == "provider",
-        )
-        .scalar()
-        or 0
-    )
-
-    accepted_ratio = (accepted / total_bookings) if total_bookings else 0.5
-    cancel_ratio = (cancelled / total_bookings) if total_bookings else 0.0
-    reports_penalty = min(reports_count / 5.0, 1.0)
-
-    trust_score = (
-        0.4 * accepted_ratio
-        + 0.3 * rating_norm
-        + 0.15 * (1 - cancel_ratio)
-        + 0.15 * (1 - reports_penalty)
-    )
-    trust_score = min(max(trust_score, 0.0), 1.0)
-    return trust_score or 0.5
-
-
 def _summarize_stats() -> dict:
     summary = {}
     for algo, stats in MATCH_STATS.items():
@@ -0,0 +1,186 @@
+"""
+Pre-built statements for matching and trust scoring.
+
+The statements are constructed once at import with ``bindparam`` placeholders.
+SQLAlchemy memoizes the cache key of a statement object, so executing one of
+these skips both rebuilding the ORM query and regenerating its cache key; the
+compiled form comes straight from the engine's compiled cache. The SQL text
+never varies (provider ids travel as one array parameter, not an expanding
+``IN`` list), so drivers that prepare repeated statements server-side, like
+psycopg 3, can reuse the plan. psycopg2 has no server-side prepare.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    Integer,
+    Time,
+    and_,
+    any_,
+    bindparam,
+    exists,
+    func,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.api import availability
+from app.core import trust
+from app.models import Booking, Provider, ProviderWorkingHours, Report, Service
+from app.models.booking import EARNING_STATUSES
+
+ACTIVE_BOOKING_STATUSES = ("pending", "accepted")
+
+
+def _candidates(with_availability: bool):
+    user_point = func.ST_SetSRID(
+        func.ST_MakePoint(bindparam("user_lon", type_=Float), bindparam("user_lat", type_=Float)), 4326
+    )
+    workload = (
+        select(Booking.provider_id, func.count(Booking.id).label("active_bookings"))
+        .where(Booking.status.in_(ACTIVE_BOOKING_STATUSES), Booking.scheduled_at >= func.now())
+        .group_by(Booking.provider_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Service.id.label("service_id"),
+            Service.provider_id.label("provider_id"),
+            func.ST_Distance(Service.location, user_point).label("distance_m"),
+            Provider.rating.label("rating"),
+            func.coalesce(workload.c.active_bookings, 0).label("active_bookings"),
+        )
+        .join(Provider, Provider.id == Service.provider_id)
+        .outerjoin(workload, workload.c.provider_id == Provider.id)
+        .where(
+            Service.category == bindparam("category"),
+            Service.location.isnot(None),
+            Service.approved == True,  # noqa: E712
+            Provider.is_active == True,  # noqa: E712
+            Provider.is_verified == True,  # noqa: E712
+            Provider.is_suspended == False,  # noqa: E712
+            func.ST_DWithin(Service.location, user_point, bindparam("radius_m", type_=Float)),
+            # providers never match their own services; NULL for customers
+            Provider.id.is_distinct_from(bindparam("exclude_provider_id", type_=Integer)),
+        )
+    )
+    if not with_availability:
+        return stmt
+
+    starts_at = bindparam("starts_at", type_=DateTime)
+    ends_at = bindparam("ends_at", type_=DateTime)
+    # availability.within_working_hours with the day/time split passed in as
+    # parameters (see availability_params) so the statement stays fixed
+    configured = exists().where(ProviderWorkingHours.provider_id == Provider.id)
+    covering = exists().where(
+        ProviderWorkingHours.provider_id == Provider.id,
+        ProviderWorkingHours.weekday == bindparam("weekday", type_=Integer),
+        ProviderWorkingHours.start_time <= bindparam("start_time", type_=Time),
+        ProviderWorkingHours.end_time >= bindparam("last_time", type_=Time),
+    )
+    return stmt.where(
+        ~exists().where(availability.overlapping_bookings(Provider.id, starts_at, ends_at)),
+        or_(~configured, and_(bindparam("same_day", type_=Boolean), covering)),
+    )
+
+
+CANDIDATES = _candidates(with_availability=False)
+CANDIDATES_AVAILABLE = _candidates(with_availability=True)
+
+
+def availability_params(start: datetime, end: datetime) -> dict:
+    last = end - timedelta(microseconds=1)
+    return {
+        "starts_at": start,
+        "ends_at": end,
+        "weekday": start.weekday(),
+        "start_time": start.time(),
+        "last_time": last.time(),
+        "same_day": last.date() == start.date(),
+    }
+
+
+def _trust_inputs():
+    ids = bindparam("provider_ids", type_=ARRAY(Integer))
+    bookings = (
+        select(
+            Booking.provider_id,
+            func.count(Booking.id).label("total"),
+            func.count(Booking.id).filter(Booking.status.in_(EARNING_STATUSES)).label("accepted"),
+            func.count(Booking.id).filter(Booking.status == "cancelled").label("cancelled"),
+        )
+        .where(Booking.provider_id == any_(ids))
+        .group_by(Booking.provider_id)
+        .subquery()
+    )
+    reports = (
+        select(Report.target_id.label("provider_id"), func.count(Report.id).label("reports"))
+        .where(
+            Report.target_id == any_(ids),
+            trust.against_provider(),
+        )
+        .group_by(Report.target_id)
+        .subquery()
+    )
+    return (
+        select(
+            Provider.id.label("provider_id"),
+            Provider.rating,
+            func.coalesce(bookings.c.total, 0).label("total"),
+            func.coalesce(bookings.c.accepted, 0).label("accepted"),
+            func.coalesce(bookings.c.cancelled, 0).label("cancelled"),
+            func.coalesce(reports.c.reports, 0).label("reports"),
+        )
+        .outerjoin(bookings, bookings.c.provider_id == Provider.id)
+        .outerjoin(reports, reports.c.provider_id == Provider.id)
+        .where(Provider.id == any_(ids))
+    )
+
+
+TRUST_INPUTS = _trust_inputs()
+
+
+@dataclass(frozen=True)
+class TrustInputs:
+    total: int = 0
+    accepted: int = 0
+    cancelled: int = 0
+    rating: float = 0.0
+    reports: int = 0
+
+    @property
+    def score(self) -> float:
+        accepted_ratio = (self.accepted / self.total) if self.total else 0.5
+        cancel_ratio = (self.cancelled / self.total) if self.total else 0.0
+        rating_norm = min(max(self.rating / 5.0, 0.0), 1.0)
+        reports_penalty = min(self.reports / 5.0, 1.0)
+        score = (
+            0.4 * accepted_ratio
+            + 0.3 * rating_norm
+            + 0.15 * (1 - cancel_ratio)
+            + 0.15 * (1 - reports_penalty)
+        )
+        return min(max(score, 0.0), 1.0) or 0.5
+
+
+def trust_inputs(db: Session, provider_ids: Iterable[int]) -> Dict[int, TrustInputs]:
+    """Trust score inputs for every provider in one query; unknown ids score as empty."""
+    ids = sorted(set(provider_ids))
+    if not ids:
+        return {}
+    return {
+        row.provider_id: TrustInputs(
+            total=int(row.total),
+            accepted=int(row.accepted),
+            cancelled=int(row.cancelled),
+            rating=float(row.rating or 0),
+            reports=int(row.reports),
+        )
+        for row in db.execute(TRUST_INPUTS, {"provider_ids": ids})
+    }
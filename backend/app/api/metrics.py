@@ -0,0 +1,54 @@
+"""
+Operational metrics for this worker process. They expose pool and replica
+topology and per-route SQL fingerprints, so every endpoint here requires an
+admin token.
+"""
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_admin
+from app.core.security import hasher as password_hasher
+from app.db.replicas import router as replica_router
+from app.db.query_stats import stats as query_stats
+from app.db.session import engine
+from app.db.timeouts import stats as timeout_stats
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/metrics/password-hashing")
+def password_hashing_metrics():
+    """
+    Password hashing pool: queue depth (pending/peak), throughput and time
+    spent per hash including queueing. In-memory, per process.
+    """
+    return password_hasher.stats()
+
+
+@router.get("/metrics/db-pool")
+def db_pool_metrics():
+    """
+    Connection pool of this worker: size, connections in use / idle /
+    overflow, checkout wait times and pool timeouts since start.
+    """
+    return engine.pool.telemetry()
+
+
+@router.get("/metrics/db-replicas")
+def db_replica_metrics():
+    """Pool telemetry per read replica, with the selection strategy."""
+    return {"strategy": replica_router.strategy, "replicas": replica_router.telemetry()}
+
+
+@router.get("/metrics/statement-timeouts")
+def statement_timeout_metrics():
+    """Statements cancelled by per-route budgets (returned as 503), per route."""
+    return timeout_stats.snapshot()
+
+
+@router.get("/metrics/queries")
+def query_metrics():
+    """
+    Per-route histograms of statements per request and database time per
+    request (ms), with the number of requests over QUERY_BUDGET_PER_REQUEST.
+    """
+    return query_stats.snapshot()
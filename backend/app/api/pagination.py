@@ -0,0 +1,98 @@
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.models import Booking
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: datetime, row_id: int) -> str:
+    raw = f"{key.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        key, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(key), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def filter_bookings(
+    query: Query,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Query:
+    """Status (comma separated) and scheduled_at window filters shared by booking lists."""
+    if status:
+        query = query.filter(Booking.status.in_([s.strip() for s in status.split(",")]))
+    if start_date:
+        query = query.filter(Booking.scheduled_at >= start_date)
+    if end_date:
+        query = query.filter(Booking.scheduled_at <= end_date)
+    return query
+
+
+def keyset_paginate(
+    query: Query,
+    column,
+    cursor: Optional[str],
+    descending: bool = False,
+) -> Query:
+    """
+    Seek pagination on ``(column, Booking.id)``. Callers fetch ``limit + 1`` rows
+    so ``finish_page`` can tell whether another page exists.
+    """
+    key = tuple_(column, Booking.id)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        query = query.filter(key < after if descending else key > after)
+    if descending:
+        query = query.order_by(column.desc(), Booking.id.desc())
+    else:
+        query = query.order_by(column.asc(), Booking.id.asc())
+    return query
+
+
+def finish_page(items: List[Any], key_attr: str, limit: int, response: Response) -> List[Any]:
+    """Trim the look-ahead row and expose the next cursor via ``X-Next-Cursor``."""
+    if len(items) <= limit:
+        return items
+    items = items[:limit]
+    last = items[-1]
+    key = getattr(last, key_attr)
+    if isinstance(key, str):
+        key = datetime.fromisoformat(key)
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key, last.id)
+    return items
+
+
+def paginate_by_id(query: Query, id_column, cursor: Optional[str], limit: int) -> Query:
+    """
+    Newest first by primary key, for lists without a natural time key. Fetches
+    ``limit + 1`` rows; finish with ``finish_id_page``.
+    """
+    if cursor:
+        try:
+            after = int(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(id_column < after)
+    return query.order_by(id_column.desc()).limit(limit + 1)
+
+
+def finish_id_page(items: List[Any], limit: int, response: Response) -> List[Any]:
+    if len(items) <= limit:
+        return items
+    items = items[:limit]
+    response.headers[NEXT_CURSOR_HEADER] = base64.urlsafe_b64encode(str(items[-1].id).encode()).decode()
+    return items
@@ -1,15 +1,27 @@
 import logging
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, extract, text
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import insert, text
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.api import utils as api_utils
-from app.api.deps import get_db, get_current_provider
-from app.models import User, Provider, Booking, ProviderPayoutSettings, Service
+from app.api import booking_state, calendar, utils as api_utils
+from app.api.deps import get_db, get_current_provider, get_read_db
+from app.core import rollups
+from app.core.audit import record_audit
+from app.core.principals import Principal
+from app.api.idempotency import Idempotency, idempotency
+from app.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    filter_bookings,
+    finish_page,
+    keyset_paginate,
+)
+from app.models import Booking, Provider, ProviderEarning, ProviderPayoutSettings, ProviderWorkingHours, Service
+from app.core.config import settings
 from app.crud import create_service
 
 logger = logging.getLogger(__name__)
@@ -18,12 +30,11 @@ router = APIRouter()
 earnings_router = APIRouter()
 
 
-def get_provider_from_user(user: User, db: Session) -> Provider:
-    """Get provider record from user"""
-    provider = db.query(Provider).filter(Provider.user_id == user.id).first()
-    if not provider:
+def get_provider_id(user: Principal) -> int:
+    """Get the provider profile id of the authenticated user"""
+    if user.provider_id is None:
         raise HTTPException(status_code=404, detail="Provider profile not found")
-    return provider
+    return user.provider_id
 
 
 # ========== PROVIDER SERVICE CRUD ==========
@@ -32,10 +43,10 @@ def get_provider_from_user(user: User, db: Session) -> Provider:
 def create_provider_service(
     svc: schemas.ServiceCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
 ):
-    provider = get_provider_from_user(current_user, db)
-    db_svc = create_service(db, provider_id=provider.id, svc=svc)
+    provider_id = get_provider_id(current_user)
+    db_svc = create_service(db, provider_id=provider_id, svc=svc)
     # Best-effort location update if lat/lon provided and not handled in crud
     if svc.lat is not None and svc.lon is not None:
         try:
@@ -48,17 +59,17 @@ def create_provider_service(
             db.commit()
         except Exception as exc:  # pragma: no cover - optional enhancement
             logger.warning("Failed to set location for service %s: %s", db_svc.id, exc)
-    logger.info("Service created by provider %s -> service %s", provider.id, db_svc.id)
+    logger.info("Service created by provider %s -> service %s", provider_id, db_svc.id)
     return api_utils.service_to_schema(db, db_svc)
 
 
 @router.get("/provider/services", response_model=List[schemas.ServiceOut])
 def list_provider_services(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_provider)
+    db: Session = Depends(get_db), current_user: Principal = Depends(get_current_provider)
 ):
-    provider = get_provider_from_user(current_user, db)
+    provider_id = get_provider_id(current_user)
     services = (
-        db.query(Service).filter(Service.provider_id == provider.id).order_by(Service.created_at.desc()).all()
+        db.query(Service).filter(Service.provider_id == provider_id).order_by(Service.created_at.desc()).all()
     )
     return [api_utils.service_to_schema(db, svc) for svc in services]
 
@@ -68,12 +79,12 @@ def update_provider_service(
     service_id: int,
     svc: schemas.ServiceCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
 ):
-    provider = get_provider_from_user(current_user, db)
+    provider_id = get_provider_id(current_user)
     db_svc = (
         db.query(Service)
-        .filter(Service.id == service_id, Service.provider_id == provider.id)
+        .filter(Service.id == service_id, Service.provider_id == provider_id)
         .first()
     )
     if not db_svc:
@@ -85,6 +96,8 @@ def update_provider_service(
     db_svc.description = svc.description
     db_svc.category = svc.category
     db_svc.price = svc.price
+    if svc.duration_minutes:
+        db_svc.duration_minutes = svc.duration_minutes
     db.add(db_svc)
     db.commit()
 
@@ -107,12 +120,12 @@ def update_provider_service(
 def delete_provider_service(
     service_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
 ):
-    provider = get_provider_from_user(current_user, db)
+    provider_id = get_provider_id(current_user)
     db_svc = (
         db.query(Service)
-        .filter(Service.id == service_id, Service.provider_id == provider.id)
+        .filter(Service.id == service_id, Service.provider_id == provider_id)
         .first()
     )
     if not db_svc:
@@ -120,6 +133,7 @@ def delete_provider_service(
     if db_svc.approved:
         raise HTTPException(status_code=403, detail="Approved services cannot be deleted")
     db.delete(db_svc)
+    rollups.record(db, services=-1)
     db.commit()
     return
 
@@ -129,17 +143,26 @@ def delete_provider_service(
 
 @router.get("/provider/bookings", response_model=List[schemas.BookingOut])
 def list_provider_bookings(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
 ):
-    provider = get_provider_from_user(current_user, db)
-    bookings = (
-        db.query(Booking)
-        .filter(Booking.provider_id == provider.id)
-        .order_by(Booking.created_at.desc())
-        .all()
+    """Latest scheduled first; follow ``X-Next-Cursor`` for earlier pages."""
+    provider_id = get_provider_id(current_user)
+    query = filter_bookings(
+        db.query(Booking).filter(Booking.provider_id == provider_id),
+        status_filter,
+        start_date,
+        end_date,
     )
-    return [api_utils.booking_to_schema(db, b) for b in bookings]
+    query = keyset_paginate(query, Booking.scheduled_at, cursor, descending=True)
+    items = api_utils.bookings_to_schemas(db, query, limit=limit + 1)
+    return finish_page(items, "scheduled_at", limit, response)
 
 
 def _get_provider_booking_or_404(db: Session, provider_id: int, booking_id: int) -> Booking:
@@ -167,48 +190,123 @@ def _enforce_accepted(booking: Booking):
 def accept_booking(
     booking_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
+    idem: Idempotency = Depends(idempotency),
 ):
-    provider = get_provider_from_user(current_user, db)
-    booking = _get_provider_booking_or_404(db, provider.id, booking_id)
-    _enforce_pending(booking)
-    booking.status = "accepted"
+    if idem.replay:
+        return idem.replay
+    provider_id = get_provider_id(current_user)
+    result = booking_state.transition(
+        db, booking_id, "accepted", actor_id=current_user.id, provider_id=provider_id
+    )
+    if result is None:
+        _enforce_pending(_get_provider_booking_or_404(db, provider_id, booking_id))
+        raise HTTPException(status_code=409, detail="Booking changed concurrently")
+    idem.save(db, status.HTTP_200_OK, result)
     db.commit()
-    db.refresh(booking)
-    logger.info("Booking %s accepted by provider %s", booking.id, provider.id)
-    return api_utils.booking_to_schema(db, booking)
+    logger.info("Booking %s accepted by provider %s", booking_id, provider_id)
+    return result
 
 
 @router.put("/provider/bookings/{booking_id}/reject", response_model=schemas.BookingOut)
 def reject_booking(
     booking_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
+    idem: Idempotency = Depends(idempotency),
 ):
-    provider = get_provider_from_user(current_user, db)
-    booking = _get_provider_booking_or_404(db, provider.id, booking_id)
-    _enforce_pending(booking)
-    booking.status = "rejected"
+    if idem.replay:
+        return idem.replay
+    provider_id = get_provider_id(current_user)
+    result = booking_state.transition(
+        db, booking_id, "rejected", actor_id=current_user.id, provider_id=provider_id
+    )
+    if result is None:
+        _enforce_pending(_get_provider_booking_or_404(db, provider_id, booking_id))
+        raise HTTPException(status_code=409, detail="Booking changed concurrently")
+    idem.save(db, status.HTTP_200_OK, result)
     db.commit()
-    db.refresh(booking)
-    logger.info("Booking %s rejected by provider %s", booking.id, provider.id)
-    return api_utils.booking_to_schema(db, booking)
+    logger.info("Booking %s rejected by provider %s", booking_id, provider_id)
+    return result
 
 
 @router.put("/provider/bookings/{booking_id}/complete", response_model=schemas.BookingOut)
 def complete_booking(
     booking_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
+    idem: Idempotency = Depends(idempotency),
 ):
-    provider = get_provider_from_user(current_user, db)
-    booking = _get_provider_booking_or_404(db, provider.id, booking_id)
-    _enforce_accepted(booking)
-    booking.status = "completed"
+    if idem.replay:
+        return idem.replay
+    provider_id = get_provider_id(current_user)
+    result = booking_state.transition(
+        db, booking_id, "completed", actor_id=current_user.id, provider_id=provider_id
+    )
+    if result is None:
+        _enforce_accepted(_get_provider_booking_or_404(db, provider_id, booking_id))
+        raise HTTPException(status_code=409, detail="Booking changed concurrently")
+    idem.save(db, status.HTTP_200_OK, result)
     db.commit()
-    db.refresh(booking)
-    logger.info("Booking %s completed by provider %s", booking.id, provider.id)
-    return api_utils.booking_to_schema(db, booking)
+    logger.info("Booking %s completed by provider %s", booking_id, provider_id)
+    return result
+
+
+@router.post("/bookings/bulk-transition", response_model=schemas.BulkTransitionResponse)
+def bulk_transition_bookings(
+    payload: schemas.BulkTransitionRequest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_provider),
+):
+    """Accept/reject/complete many bookings with one set-based update."""
+    provider_id = get_provider_id(current_user)
+
+    seen = set()
+    for item in payload.items:
+        if item.action not in booking_state.PROVIDER_ACTIONS:
+            raise HTTPException(status_code=400, detail=f"Invalid action: {item.action}")
+        if item.booking_id in seen:
+            raise HTTPException(status_code=400, detail=f"Duplicate booking_id: {item.booking_id}")
+        seen.add(item.booking_id)
+
+    moved = booking_state.transition_many(
+        db,
+        provider_id,
+        current_user.id,
+        [(item.booking_id, booking_state.PROVIDER_ACTIONS[item.action]) for item in payload.items],
+    )
+    failed_ids = [item.booking_id for item in payload.items if item.booking_id not in moved]
+    current = {}
+    if failed_ids:
+        current = dict(
+            db.query(Booking.id, Booking.status)
+            .filter(Booking.id.in_(failed_ids), Booking.provider_id == provider_id)
+            .all()
+        )
+    db.commit()
+
+    results = []
+    for item in payload.items:
+        if item.booking_id in moved:
+            results.append(schemas.BulkTransitionResult(
+                booking_id=item.booking_id, action=item.action, ok=True, status=moved[item.booking_id]
+            ))
+        elif item.booking_id in current:
+            results.append(schemas.BulkTransitionResult(
+                booking_id=item.booking_id,
+                action=item.action,
+                ok=False,
+                status=current[item.booking_id],
+                detail="conflict",
+            ))
+        else:
+            results.append(schemas.BulkTransitionResult(
+                booking_id=item.booking_id, action=item.action, ok=False, detail="not_found"
+            ))
+    logger.info("Bulk transition by provider %s: %s/%s applied", provider_id, len(moved), len(results))
+    return schemas.BulkTransitionResponse(
+        items=results, succeeded=len(moved), failed=len(results) - len(moved)
+    )
 
 
 # ========== EARNINGS ==========
@@ -216,145 +314,147 @@ def complete_booking(
 @router.get("/earnings/monthly", response_model=List[schemas.ProviderEarningsOut])
 def get_monthly_earnings(
     months: int = 6,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_provider),
 ):
-    """Get monthly earnings for the provider"""
-    provider = get_provider_from_user(current_user, db)
-    
-    # Get earnings grouped by month
-    earnings = db.query(
-        extract('year', Booking.created_at).label('year'),
-        extract('month', Booking.created_at).label('month'),
-        func.coalesce(func.sum(Booking.price), 0).label('total_earnings'),
-        func.count(Booking.id).label('booking_count')
-    ).filter(
-        Booking.provider_id == provider.id,
-        Booking.status == "accepted"
-    ).group_by(
-        extract('year', Booking.created_at),
-        extract('month', Booking.created_at)
-    ).order_by(
-        extract('year', Booking.created_at).desc(),
-        extract('month', Booking.created_at).desc()
-    ).limit(months).all()
-    
-    result = []
-    for e in earnings:
-        month_str = f"{int(e.year)}-{int(e.month):02d}"
-        result.append({
-            "month": month_str,
-            "total_earnings": float(e.total_earnings or 0),
-            "booking_count": e.booking_count
-        })
-    
-    return result
+    """Get monthly earnings for the provider, most recent month first"""
+    provider_id = get_provider_id(current_user)
+
+    earnings = (
+        db.query(ProviderEarning)
+        .filter(ProviderEarning.provider_id == provider_id, ProviderEarning.booking_count > 0)
+        .order_by(ProviderEarning.month.desc())
+        .limit(months)
+        .all()
+    )
+    return [
+        {
+            "month": e.month.strftime("%Y-%m"),
+            "total_earnings": float(e.amount),
+            "booking_count": e.booking_count,
+        }
+        for e in earnings
+    ]
 
 
 @earnings_router.get("/providers/earnings")
+@router.get("/earnings")
 def get_earnings_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_provider),
 ):
-    """Earnings summary for provider - accepted bookings only."""
-    provider = get_provider_from_user(current_user, db)
-
-    base_q = db.query(Booking).filter(
-        Booking.provider_id == provider.id, Booking.status == "accepted"
-    )
-
-    total_earnings = base_q.with_entities(func.coalesce(func.sum(Booking.price), 0)).scalar() or 0
-    total_bookings = base_q.with_entities(func.count(Booking.id)).scalar() or 0
-
-    monthly_rows = (
-        base_q.with_entities(
-            func.to_char(Booking.scheduled_at, "YYYY-MM").label("month"),
-            func.coalesce(func.sum(Booking.price), 0).label("amount"),
-        )
-        .group_by("month")
-        .order_by("month")
+    """Earnings summary for provider - accepted and completed bookings, oldest month first."""
+    rows = (
+        db.query(ProviderEarning)
+        .filter(ProviderEarning.provider_id == get_provider_id(current_user), ProviderEarning.booking_count > 0)
+        .order_by(ProviderEarning.month)
         .all()
     )
-
-    monthly = [{"month": row.month, "amount": float(row.amount)} for row in monthly_rows]
-
     return {
-        "total_earnings": float(total_earnings),
-        "total_bookings": int(total_bookings),
-        "monthly": monthly,
+        "total_earnings": sum(float(row.amount) for row in rows),
+        "booking_count": sum(row.booking_count for row in rows),
+        "monthly": [{"month": row.month.strftime("%Y-%m"), "amount": float(row.amount)} for row in rows],
     }
 
 
-@router.get("/earnings")
-def get_earnings_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+# ========== CALENDAR ==========
+
+@router.get("/calendar", response_model=List[schemas.ProviderCalendarEvent])
+def get_calendar(
+    response: Response,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_provider),
 ):
-    """Earnings summary for provider - accepted bookings only."""
-    provider = get_provider_from_user(current_user, db)
+    """Provider's upcoming bookings (``start_date`` defaults to now), soonest first; follow ``X-Next-Cursor``."""
+    provider_id = get_provider_id(current_user)
 
-    base_q = db.query(Booking).filter(
-        Booking.provider_id == provider.id, Booking.status == "accepted"
+    query = filter_bookings(
+        calendar.calendar_query(db, provider_id), status_filter, start_date or datetime.utcnow(), end_date
     )
+    rows = keyset_paginate(query, Booking.scheduled_at, cursor).limit(limit + 1).all()
+    return finish_page([calendar.to_event(row) for row in rows], "when_at", limit, response)
 
-    total_earnings = base_q.with_entities(func.coalesce(func.sum(Booking.price), 0)).scalar() or 0
-    booking_count = base_q.with_entities(func.count(Booking.id)).scalar() or 0
 
-    monthly_rows = (
-        base_q.with_entities(
-            func.to_char(Booking.scheduled_at, "YYYY-MM").label("month"),
-            func.coalesce(func.sum(Booking.price), 0).label("amount"),
-        )
-        .group_by("month")
-        .order_by("month")
-        .all()
+@router.get("/calendar/sync", response_model=schemas.ProviderCalendarSync)
+def sync_calendar(
+    token: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_provider),
+):
+    """
+    Bookings created or changed since ``token``; omit it for a full sync.
+    Keep calling with the returned ``sync_token`` while ``has_more``, then
+    store it for the next sync. Events may repeat across syncs: upsert by id.
+    """
+    events, sync_token, has_more = calendar.changes_since(db, get_provider_id(current_user), token, limit)
+    return {"events": events, "sync_token": sync_token, "has_more": has_more}
+
+
+@router.post("/calendar/feed", response_model=schemas.CalendarFeedOut, status_code=201)
+def rotate_calendar_feed(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_provider),
+):
+    """Issue a new iCal feed URL; the previous one stops working. The key is only shown here."""
+    provider_id = get_provider_id(current_user)
+    key, key_hash = calendar.new_feed_key()
+    db.query(Provider).filter(Provider.id == provider_id).update(
+        {Provider.calendar_feed_hash: key_hash}, synchronize_session=False
     )
+    record_audit(db, current_user.id, "calendar_feed_rotated", "provider", provider_id, {})
+    db.commit()
+    return {"url": str(request.url_for("get_calendar_feed").include_query_params(key=key)), "key": key}
 
-    monthly = [{"month": row.month, "amount": float(row.amount)} for row in monthly_rows]
-
-    return {
-        "total_earnings": float(total_earnings),
-        "booking_count": int(booking_count),
-        "monthly": monthly,
-    }
 
+@router.delete("/calendar/feed", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_calendar_feed(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_provider),
+):
+    """Turn the iCal feed off until a new URL is issued."""
+    provider_id = get_provider_id(current_user)
+    db.query(Provider).filter(Provider.id == provider_id).update(
+        {Provider.calendar_feed_hash: None}, synchronize_session=False
+    )
+    record_audit(db, current_user.id, "calendar_feed_revoked", "provider", provider_id, {})
+    db.commit()
+    return
 
-# ========== CALENDAR ==========
 
-@router.get("/calendar", response_model=List[schemas.ProviderCalendarEvent])
-def get_calendar(
-    start_date: str = None,
-    end_date: str = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+@router.get("/calendar.ics")
+def get_calendar_feed(
+    key: str = Query(..., description="Feed key from POST /provider/calendar/feed"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
 ):
-    """Get provider's booking calendar"""
-    provider = get_provider_from_user(current_user, db)
-    
-    query = db.query(Booking).filter(Booking.provider_id == provider.id)
-    
-    if start_date:
-        query = query.filter(Booking.scheduled_at >= start_date)
-    if end_date:
-        query = query.filter(Booking.scheduled_at <= end_date)
-    
-    bookings = query.order_by(Booking.scheduled_at.asc()).all()
-    
-    result = []
-    for booking in bookings:
-        user_name = booking.user.name if booking.user else None
-        service_title = booking.service.title if booking.service else "Unknown Service"
-        
-        result.append({
-            "id": booking.id,
-            "service_title": service_title,
-            "when_at": booking.scheduled_at.isoformat() if booking.scheduled_at else None,
-            "status": booking.status,
-            "user_name": user_name,
-            "notes": booking.notes
-        })
-    
-    return result
+    """iCalendar feed of the provider's bookings (default window: CALENDAR_FEED_PAST/FUTURE_DAYS around today)."""
+    provider_id = (
+        db.query(Provider.id).filter(Provider.calendar_feed_hash == calendar.feed_key_hash(key)).scalar()
+    )
+    if provider_id is None:
+        raise HTTPException(status_code=404, detail="Calendar feed not found")
+
+    now = datetime.utcnow()
+    start_date = start_date or now - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS)
+    end_date = end_date or now + timedelta(days=settings.CALENDAR_FEED_FUTURE_DAYS)
+    rows = (
+        filter_bookings(calendar.calendar_query(db, provider_id), None, start_date, end_date)
+        .order_by(Booking.scheduled_at, Booking.id)
+        .all()
+    )
+    return Response(
+        content=calendar.render_ical(rows, "HelpX bookings"),
+        media_type="text/calendar; charset=utf-8",
+        headers={"Content-Disposition": 'inline; filename="helpx-bookings.ics"'},
+    )
 
 
 # ========== PAYOUT SETTINGS ==========
@@ -362,18 +462,18 @@ def get_calendar(
 @router.get("/payout", response_model=schemas.PayoutSettingsOut)
 def get_payout_settings(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
 ):
     """Get provider payout settings"""
-    provider = get_provider_from_user(current_user, db)
+    provider_id = get_provider_id(current_user)
     
     settings = db.query(ProviderPayoutSettings).filter(
-        ProviderPayoutSettings.provider_id == provider.id
+        ProviderPayoutSettings.provider_id == provider_id
     ).first()
     
     if not settings:
         # Create default empty settings
-        settings = ProviderPayoutSettings(provider_id=provider.id)
+        settings = ProviderPayoutSettings(provider_id=provider_id)
         db.add(settings)
         db.commit()
         db.refresh(settings)
@@ -385,17 +485,17 @@ def get_payout_settings(
 def update_payout_settings(
     payout_data: schemas.PayoutSettingsCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_provider),
+    current_user: Principal = Depends(get_current_provider),
 ):
     """Update provider payout settings"""
-    provider = get_provider_from_user(current_user, db)
+    provider_id = get_provider_id(current_user)
     
     settings = db.query(ProviderPayoutSettings).filter(
-        ProviderPayoutSettings.provider_id == provider.id
+        ProviderPayoutSettings.provider_id == provider_id
     ).first()
     
     if not settings:
-        settings = ProviderPayoutSettings(provider_id=provider.id)
+        settings = ProviderPayoutSettings(provider_id=provider_id)
         db.add(settings)
     
     if payout_data.upi_id is not None:
@@ -411,3 +511,53 @@ def update_payout_settings(
     
     return settings
 
+
+
+# ========== WORKING HOURS ==========
+
+@router.get("/working-hours", response_model=List[schemas.WorkingHoursOut])
+def get_working_hours(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_provider),
+):
+    """List the provider's weekly working hours (empty = bookable at any time)"""
+    provider_id = get_provider_id(current_user)
+    return (
+        db.query(ProviderWorkingHours)
+        .filter(ProviderWorkingHours.provider_id == provider_id)
+        .order_by(ProviderWorkingHours.weekday, ProviderWorkingHours.start_time)
+        .all()
+    )
+
+
+@router.put("/working-hours", response_model=List[schemas.WorkingHoursOut])
+def replace_working_hours(
+    hours: List[schemas.WorkingHoursIn],
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_provider),
+):
+    """Replace the provider's weekly working hours"""
+    provider_id = get_provider_id(current_user)
+    db.query(ProviderWorkingHours).filter(
+        ProviderWorkingHours.provider_id == provider_id
+    ).delete(synchronize_session=False)
+    rows = []
+    if hours:
+        # one multi-row INSERT; the response comes from its RETURNING, not a reload per row
+        rows = db.execute(
+            insert(ProviderWorkingHours)
+            .values(
+                [
+                    {
+                        "provider_id": provider_id,
+                        "weekday": h.weekday,
+                        "start_time": h.start_time,
+                        "end_time": h.end_time,
+                    }
+                    for h in hours
+                ]
+            )
+            .returning(*ProviderWorkingHours.__table__.c)
+        ).all()
+    db.commit()
+    return sorted(rows, key=lambda r: (r.weekday, r.start_time))
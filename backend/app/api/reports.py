@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 
 from app import schemas
 from app.api.deps import get_current_user, get_db
-from app.models import Report, User
+from app.core.principals import Principal
+from app.models import Report
 
 router = APIRouter()
 
@@ -12,7 +13,7 @@ router = APIRouter()
 def create_report(
     payload: schemas.ReportCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if payload.report_type not in {"service", "user", "provider", "booking"}:
         raise HTTPException(status_code=400, detail="Invalid report_type")
@@ -6,8 +6,12 @@ from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.api import utils as api_utils
-from app.api.deps import get_current_user, get_db
-from app.models import Provider, Service as ServiceModel
+from app.api.deps import get_current_user, get_db, get_read_db
+from app.core import principals, rollups
+from app.core.config import settings
+from app.core.revocation import revoke_tokens
+from app.db.timeouts import statement_budget
+from app.models import Provider, Service as ServiceModel, User
 
 router = APIRouter()
 
@@ -19,21 +23,28 @@ def create_service(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    prov = current_user.provider
-    if not prov:
+    provider_id = current_user.provider_id
+    if provider_id is None:
+        user = db.query(User).filter(User.id == current_user.id).first()
         prov = Provider(
-            user_id=current_user.id,
-            business_name=current_user.name or current_user.email,
+            user_id=user.id,
+            business_name=user.name or user.email,
         )
         db.add(prov)
+        rollups.record(db, providers=1)
+        # tokens carry the provider id; ones issued without it must not outlive this
+        revoke_tokens(db, user.id)
         db.commit()
         db.refresh(prov)
-    db_svc = crud.create_service(db, provider_id=prov.id, svc=svc)
+        provider_id = prov.id
+        principals.invalidate(user.id)
+    db_svc = crud.create_service(db, provider_id=provider_id, svc=svc)
     return api_utils.service_to_schema(db, db_svc)
 
 
 # LIST (public)
 @router.get("/", response_model=schemas.ServiceListResponse)
+@statement_budget(settings.STATEMENT_TIMEOUT_SEARCH_MS)
 def list_services(
     q: Optional[str] = None,
     category: Optional[str] = None,
@@ -44,7 +55,7 @@ def list_services(
     radius_km: float = 10.0,
     page: int = 1,
     page_size: int = 10,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     page = max(page, 1)
     page_size = max(1, min(page_size, 50))
@@ -99,15 +110,14 @@ def list_services(
 def provider_services(
     db: Session = Depends(get_db), current_user=Depends(get_current_user)
 ):
-    prov = current_user.provider
-    if not prov:
+    if current_user.provider_id is None:
         return []
-    q = db.query(ServiceModel).filter(ServiceModel.provider_id == prov.id)
+    q = db.query(ServiceModel).filter(ServiceModel.provider_id == current_user.provider_id)
     return [api_utils.service_to_schema(db, svc) for svc in q.all()]
 
 
 @router.get("/{service_id}/", response_model=schemas.ServiceOut)
-def get_service(service_id: int, db: Session = Depends(get_db)):
+def get_service(service_id: int, db: Session = Depends(get_read_db)):
     svc = db.query(ServiceModel).filter(ServiceModel.id == service_id, ServiceModel.approved == True).first()  # noqa: E712
     if not svc:
         raise HTTPException(status_code=404, detail="Service not found")
@@ -122,12 +132,11 @@ def update_service(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    prov = current_user.provider
-    if not prov:
+    if current_user.provider_id is None:
         raise HTTPException(status_code=403, detail="User is not a provider")
     s = (
         db.query(ServiceModel)
-        .filter(ServiceModel.id == service_id, ServiceModel.provider_id == prov.id)
+        .filter(ServiceModel.id == service_id, ServiceModel.provider_id == current_user.provider_id)
         .first()
     )
     if not s:
@@ -137,6 +146,8 @@ def update_service(
     s.description = svc.description
     s.category = svc.category
     s.price = svc.price
+    if svc.duration_minutes:
+        s.duration_minutes = svc.duration_minutes
 
     db.add(s)
     db.commit()
@@ -164,16 +175,16 @@ def delete_service(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    prov = current_user.provider
-    if not prov:
+    if current_user.provider_id is None:
         raise HTTPException(status_code=403, detail="User is not a provider")
     s = (
         db.query(ServiceModel)
-        .filter(ServiceModel.id == service_id, ServiceModel.provider_id == prov.id)
+        .filter(ServiceModel.id == service_id, ServiceModel.provider_id == current_user.provider_id)
         .first()
     )
     if not s:
         raise HTTPException(status_code=404, detail="Service not found")
     db.delete(s)
+    rollups.record(db, services=-1)
     db.commit()
     return
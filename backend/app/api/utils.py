@@ -1,8 +1,30 @@
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Query, Session
 
 from app import schemas
-from app.models import Service as ServiceModel
+from app.models import Booking, Service as ServiceModel
+
+
+def _service_out(
+    service: ServiceModel, lat: Optional[float], lon: Optional[float]
+) -> schemas.ServiceOut:
+    return schemas.ServiceOut(
+        id=service.id,
+        provider_id=service.provider_id,
+        title=service.title,
+        description=service.description,
+        category=service.category,
+        price=float(service.price) if service.price is not None else None,
+        lat=float(lat) if lat is not None else None,
+        lon=float(lon) if lon is not None else None,
+        flagged=getattr(service, 'flagged', False),
+        flag_reason=getattr(service, 'flag_reason', None),
+        approved=getattr(service, 'approved', True),
+        duration_minutes=getattr(service, 'duration_minutes', None),
+        created_at=service.created_at.isoformat() if service.created_at else None,
+    )
 
 
 def service_to_schema(db: Session, service: ServiceModel) -> schemas.ServiceOut:
@@ -16,24 +38,62 @@ def service_to_schema(db: Session, service: ServiceModel) -> schemas.ServiceOut:
             {"id": service.id},
         ).first()
         if row:
-            lon_val = float(row[0]) if row[0] is not None else None
-            lat_val = float(row[1]) if row[1] is not None else None
+            lon_val, lat_val = row[0], row[1]
     except Exception:
         lat_val = lon_val = None
 
-    return schemas.ServiceOut(
-        id=service.id,
-        provider_id=service.provider_id,
-        title=service.title,
-        description=service.description,
-        category=service.category,
-        price=float(service.price) if service.price is not None else None,
-        lat=lat_val,
-        lon=lon_val,
-        flagged=getattr(service, 'flagged', False),
-        flag_reason=getattr(service, 'flag_reason', None),
-        approved=getattr(service, 'approved', True),
-        created_at=service.created_at.isoformat() if service.created_at else None,
+    return _service_out(service, lat_val, lon_val)
+
+
+def _booking_out(
+    booking: Booking, service: Optional[schemas.ServiceOut]
+) -> schemas.BookingOut:
+    return schemas.BookingOut(
+        id=booking.id,
+        service_id=booking.service_id,
+        user_id=booking.user_id,
+        provider_id=booking.provider_id,
+        scheduled_at=booking.scheduled_at,
+        ends_at=booking.ends_at,
+        notes=booking.notes,
+        status=booking.status,
+        series_id=booking.series_id,
+        created_at=booking.created_at.isoformat() if booking.created_at else None,
+        service=service,
+    )
+
+
+def service_coordinates():
+    """``(lon, lat)`` column expressions for selecting next to a ``Service`` entity."""
+    geom = func.geometry(ServiceModel.location)
+    return func.ST_X(geom).label("lon"), func.ST_Y(geom).label("lat")
+
+
+def booking_rows_to_schemas(rows) -> List[schemas.BookingOut]:
+    """Build schemas from ``(Booking, Service, lon, lat)`` rows."""
+    return [
+        _booking_out(booking, _service_out(service, lat, lon) if service else None)
+        for booking, service, lon, lat in rows
+    ]
+
+
+def bookings_to_schemas(
+    db: Session, query: Query, limit: Optional[int] = None
+) -> List[schemas.BookingOut]:
+    """
+    Hydrate every booking matched by ``query`` (a ``db.query(Booking)`` with
+    filters/ordering applied) in a single round trip: bookings are joined to
+    their service and the service coordinates are projected in the same SELECT.
+    """
+    query = (
+        query.outerjoin(ServiceModel, ServiceModel.id == Booking.service_id)
+        .add_entity(ServiceModel)
+        .add_columns(*service_coordinates())
     )
+    if limit is not None:
+        query = query.limit(limit)
+    return booking_rows_to_schemas(query.all())
 
 
+def booking_to_schema(db: Session, booking: Booking) -> schemas.BookingOut:
+    return bookings_to_schemas(db, db.query(Booking).filter(Booking.id == booking.id))[0]
@@ -0,0 +1,189 @@
+"""
+Transactional audit outbox.
+
+Handlers call ``record_audit`` before their business ``commit()``; the event is
+inserted into ``audit_outbox`` in the same transaction, so it is committed (or
+rolled back) atomically with the change it describes and costs no extra
+round trip or fsync. A background thread relays committed outbox rows into
+``audit_logs`` with one ``DELETE ... RETURNING`` / ``INSERT ... SELECT`` per
+batch. Rows left behind by a crashed process are relayed on the next start.
+"""
+import logging
+import threading
+from typing import Iterable, Optional
+
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import AuditOutbox
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "audit_pending"
+
+_RELAY_SQL = text(
+    """
+    WITH batch AS (
+        DELETE FROM audit_outbox
+        WHERE id IN (
+            SELECT id FROM audit_outbox ORDER BY id LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING actor_id, action, target_type, target_id, metadata, created_at
+    )
+    INSERT INTO audit_logs (actor_id, action, target_type, target_id, metadata, created_at)
+    SELECT actor_id, action, target_type, target_id, metadata, created_at FROM batch
+    """
+)
+
+
+def record_audit(
+    db: Session,
+    actor_id: Optional[int],
+    action: str,
+    target_type: str,
+    target_id: Optional[int],
+    metadata: dict = None,
+) -> None:
+    """Stage an audit event in the caller's transaction (does not commit)."""
+    db.add(
+        AuditOutbox(
+            actor_id=actor_id,
+            action=action,
+            target_type=target_type,
+            target_id=target_id,
+            meta=str(metadata or {}),
+        )
+    )
+    db.info[_PENDING_KEY] = db.info.get(_PENDING_KEY, 0) + 1
+
+
+def record_audit_batch(db: Session, events: Iterable[dict]) -> None:
+    """
+    Stage many audit events with one multi-row insert. Each event takes the
+    keyword arguments of ``record_audit``.
+    """
+    rows = [
+        {
+            "actor_id": e.get("actor_id"),
+            "action": e["action"],
+            "target_type": e["target_type"],
+            "target_id": e.get("target_id"),
+            "meta": str(e.get("metadata") or {}),
+        }
+        for e in events
+    ]
+    if not rows:
+        return
+    db.execute(insert(AuditOutbox), rows)
+    db.info[_PENDING_KEY] = db.info.get(_PENDING_KEY, 0) + len(rows)
+
+
+class AuditWriter:
+    """
+    Batches outbox rows into ``audit_logs``.
+
+    ``backlog`` is a bounded, in-process estimate of committed-but-unrelayed
+    events. The thread flushes every ``flush_interval`` seconds or as soon as a
+    full batch is waiting. Once the backlog reaches ``max_backlog`` the
+    committing request relays a batch itself (backpressure) instead of letting
+    the outbox grow without bound.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_backlog: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self.backlog = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        self._wakeup.set()  # relay anything left over from a previous process
+
+    def stop(self) -> None:
+        """Stop the thread and relay everything still in the outbox."""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def notify(self, count: int) -> None:
+        if not self.running:
+            return  # rows stay in the outbox until a writer starts
+        with self._lock:
+            self.backlog += count
+            backlog = self.backlog
+        if backlog >= self.max_backlog:
+            try:
+                self.relay_batch()
+            except Exception as exc:
+                logger.warning("Audit outbox relay failed: %s", exc)
+        elif backlog >= self.batch_size:
+            self._wakeup.set()
+
+    def relay_batch(self) -> int:
+        db = SessionLocal()
+        try:
+            moved = db.execute(_RELAY_SQL, {"batch_size": self.batch_size}).rowcount or 0
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        with self._lock:
+            self.backlog = max(self.backlog - moved, 0)
+        return moved
+
+    def flush(self) -> int:
+        total = 0
+        while True:
+            moved = self.relay_batch()
+            total += moved
+            if moved < self.batch_size:
+                return total
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as exc:
+                logger.warning("Audit outbox relay failed: %s", exc)
+
+
+writer = AuditWriter(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_backlog=settings.AUDIT_MAX_BACKLOG,
+)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, 0)
+    if pending:
+        writer.notify(pending)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
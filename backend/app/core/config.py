@@ -11,6 +11,92 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24))
     SUPER_ADMIN_EMAIL: str = os.getenv("SUPER_ADMIN_EMAIL", "admin@helpx.com")
 
+    # Connection pool (per worker process). DB_POOL_PRE_PING: always | idle | never;
+    # "idle" only pings connections unused for DB_POOL_PRE_PING_IDLE_SECONDS.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 10))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+    DB_POOL_PRE_PING: str = os.getenv("DB_POOL_PRE_PING", "idle")
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = float(os.getenv("DB_POOL_PRE_PING_IDLE_SECONDS", 30))
+
+    # Schema handling at startup: check (compare the Alembic revision, default;
+    # startup fails if it is not at head or can't be read) | migrate (run
+    # `alembic upgrade head`) | create_all (legacy, no migrations)
+    SCHEMA_STARTUP_MODE: str = os.getenv("SCHEMA_STARTUP_MODE", "check")
+
+    # Statement budgets in ms, applied as SET LOCAL statement_timeout per request
+    # (0 disables). SEARCH covers public search/matching, REPORTING the aggregates.
+    STATEMENT_TIMEOUT_MS: int = int(os.getenv("STATEMENT_TIMEOUT_MS", 5000))
+    STATEMENT_TIMEOUT_SEARCH_MS: int = int(os.getenv("STATEMENT_TIMEOUT_SEARCH_MS", 2000))
+    STATEMENT_TIMEOUT_REPORTING_MS: int = int(os.getenv("STATEMENT_TIMEOUT_REPORTING_MS", 10000))
+    STATEMENT_TIMEOUT_RETRY_AFTER_SECONDS: int = int(os.getenv("STATEMENT_TIMEOUT_RETRY_AFTER_SECONDS", 2))
+
+    # Per-request query accounting: warn above QUERY_BUDGET_PER_REQUEST statements
+    # or QUERY_REPEAT_WARN runs of one statement; debug headers on responses.
+    QUERY_BUDGET_PER_REQUEST: int = int(os.getenv("QUERY_BUDGET_PER_REQUEST", 25))
+    QUERY_REPEAT_WARN: int = int(os.getenv("QUERY_REPEAT_WARN", 10))
+    QUERY_STATS_HEADERS: bool = os.getenv("QUERY_STATS_HEADERS", "false").lower() in ("1", "true", "yes")
+
+    # Read replicas (comma-separated URLs; empty = primary only).
+    # DB_REPLICA_STRATEGY: round_robin | least_connections
+    DATABASE_REPLICA_URLS: list = [
+        url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    DB_REPLICA_STRATEGY: str = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+    DB_REPLICA_STICKY_SECONDS: float = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+
+    # Matching weights (trust_hybrid)
+    MATCH_WEIGHT_DISTANCE: float = float(os.getenv("MATCH_WEIGHT_DISTANCE", 0.5))
+    MATCH_WEIGHT_TRUST: float = float(os.getenv("MATCH_WEIGHT_TRUST", 0.25))
+    MATCH_WEIGHT_WORKLOAD: float = float(os.getenv("MATCH_WEIGHT_WORKLOAD", 0.15))
+    MATCH_WEIGHT_AVAILABILITY: float = float(os.getenv("MATCH_WEIGHT_AVAILABILITY", 0.1))
+
+    # Availability
+    DEFAULT_BOOKING_MINUTES: int = int(os.getenv("DEFAULT_BOOKING_MINUTES", 60))
+
+    # Provider calendar: iCal feed window around today, and how far sync tokens
+    # reach back so writes that commit after a later change was synced are not missed
+    CALENDAR_FEED_PAST_DAYS: int = int(os.getenv("CALENDAR_FEED_PAST_DAYS", 30))
+    CALENDAR_FEED_FUTURE_DAYS: int = int(os.getenv("CALENDAR_FEED_FUTURE_DAYS", 180))
+    CALENDAR_SYNC_OVERLAP_SECONDS: int = int(os.getenv("CALENDAR_SYNC_OVERLAP_SECONDS", 60))
+
+    # Rows per day in the daily_metrics rollup; concurrent writers spread over
+    # them instead of queueing on one row lock
+    DAILY_METRICS_SHARDS: int = int(os.getenv("DAILY_METRICS_SHARDS", 16))
+
+    # Trust leaderboard snapshot refresh period (0 disables the in-process refresher)
+    TRUST_SNAPSHOT_REFRESH_SECONDS: float = float(os.getenv("TRUST_SNAPSHOT_REFRESH_SECONDS", 0))
+
+    # Audit outbox writer
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", 1.0))
+    AUDIT_MAX_BACKLOG: int = int(os.getenv("AUDIT_MAX_BACKLOG", 10000))
+
+    # Idempotency-Key replay window
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 60 * 60))
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL_SECONDS", 300))
+    IDEMPOTENCY_SWEEP_BATCH_SIZE: int = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH_SIZE", 1000))
+
+    # Booking event stream
+    BOOKING_EVENTS_CHANNEL: str = os.getenv("BOOKING_EVENTS_CHANNEL", "booking_events")
+    BOOKING_EVENTS_HISTORY: int = int(os.getenv("BOOKING_EVENTS_HISTORY", 5000))
+    BOOKING_EVENTS_QUEUE_SIZE: int = int(os.getenv("BOOKING_EVENTS_QUEUE_SIZE", 256))
+    BOOKING_EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("BOOKING_EVENTS_HEARTBEAT_SECONDS", 15))
+    BOOKING_EVENTS_TICKET_SECONDS: int = int(os.getenv("BOOKING_EVENTS_TICKET_SECONDS", 60))
+
+    # Password hashing (pbkdf2_sha256 cost, worker processes, queued requests before 503)
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", 29000))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+    # Token revocation broadcast between worker processes
+    TOKEN_REVOCATION_CHANNEL: str = os.getenv("TOKEN_REVOCATION_CHANNEL", "token_revocations")
+
+    # Authenticated principal snapshots (0 disables caching)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 30))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+
 
 settings = Settings()
 
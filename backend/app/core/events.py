@@ -0,0 +1,158 @@
+"""
+Booking event fanout.
+
+Commit points stage events with ``stage_booking_event``; in ``before_commit``
+the session draws their ids from the ``booking_event_ids`` sequence and sends
+them with ``pg_notify``. Postgres only delivers notifications for committed
+transactions, in commit order, to every listener. Ids are drawn before the
+commit, though, so two concurrent commits can deliver a higher id first.
+Every process, the committing one included, publishes events from the
+notification listener (app.core.notify), so all of them see the same events in
+the same order. The bus keeps a short history in that order, and resuming
+replays whatever arrived after the client's last event id, whatever its value.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.notify import listener
+from app.db.session import SessionLocal
+
+_STAGED_KEY = "booking_events"
+
+
+def stage_booking_event(db: Session, event_type: str, booking) -> None:
+    """Queue an event for ``booking`` (ORM object or BookingOut); id assigned and sent on commit."""
+    scheduled_at = booking.scheduled_at
+    db.info.setdefault(_STAGED_KEY, []).append(
+        {
+            "type": event_type,
+            "booking_id": booking.id,
+            "status": booking.status,
+            "user_id": booking.user_id,
+            "provider_id": booking.provider_id,
+            "service_id": booking.service_id,
+            "scheduled_at": scheduled_at.isoformat() if scheduled_at else None,
+        }
+    )
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, accepts: Callable[[dict], bool], size: int):
+        self.loop = loop
+        self.accepts = accepts
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+    def offer(self, evt: dict) -> None:
+        if not self.accepts(evt):
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, evt)
+        except RuntimeError:  # loop already closed; unsubscribed shortly
+            pass
+
+    def _put(self, evt: dict) -> None:
+        try:
+            self.queue.put_nowait(evt)
+        except asyncio.QueueFull:
+            # slow consumer: end its stream, it resumes from history on reconnect
+            self.overflowed = True
+
+
+class BookingEventBus:
+    def __init__(self, history: int, queue_size: int):
+        self.queue_size = queue_size
+        # in arrival order, which is commit order (not necessarily id order)
+        self._history: Deque[dict] = deque(maxlen=history)
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._connected = False
+
+    @property
+    def connected(self) -> bool:
+        """Whether the listener has connected (nothing can be resumed before that)."""
+        with self._lock:
+            return self._connected
+
+    def resync(self) -> None:
+        """
+        The listener (re)connected: events committed while it was away are
+        missing, so nothing before this point can be resumed from.
+        """
+        with self._lock:
+            self._history.clear()
+            self._connected = True
+
+    def publish(self, evt: dict) -> None:
+        with self._lock:
+            self._history.append(evt)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.offer(evt)
+
+    def subscribe(self, accepts: Callable[[dict], bool]) -> Subscriber:
+        sub = Subscriber(asyncio.get_running_loop(), accepts, self.queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def recent(self, accepts: Callable[[dict], bool]) -> List[dict]:
+        """Buffered events in commit order."""
+        with self._lock:
+            history = list(self._history)
+        return [e for e in history if accepts(e)]
+
+    def since(self, last_id: int, accepts: Callable[[dict], bool]) -> Optional[List[dict]]:
+        """
+        Buffered events that arrived after event ``last_id``, or ``None`` if it
+        is no longer in the history (some may have been missed).
+        """
+        with self._lock:
+            history = list(self._history)
+        for position in range(len(history) - 1, -1, -1):
+            if history[position]["id"] == last_id:
+                return [e for e in history[position + 1:] if accepts(e)]
+        return None
+
+
+bus = BookingEventBus(
+    history=settings.BOOKING_EVENTS_HISTORY,
+    queue_size=settings.BOOKING_EVENTS_QUEUE_SIZE,
+)
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _notify_staged(session: Session) -> None:
+    staged = session.info.pop(_STAGED_KEY, None)
+    if not staged:
+        return
+    payloads = [json.dumps(evt) for evt in staged]
+    session.execute(
+        text(
+            "SELECT pg_notify(:channel, CAST(CAST(payload AS jsonb) "
+            "|| jsonb_build_object('id', nextval('booking_event_ids')) AS text)) "
+            "FROM unnest(CAST(:payloads AS text[])) AS payload"
+        ),
+        {"channel": settings.BOOKING_EVENTS_CHANNEL, "payloads": payloads},
+    )
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_staged(session: Session) -> None:
+    session.info.pop(_STAGED_KEY, None)
+
+
+def listen() -> None:
+    """Feed ``bus`` from the notification listener; call before ``listener.start()``."""
+    listener.subscribe(settings.BOOKING_EVENTS_CHANNEL, bus.publish, on_connect=bus.resync, include_own=True)
@@ -0,0 +1,99 @@
+"""
+Cross-process notifications over Postgres ``LISTEN/NOTIFY``.
+
+One background thread holds a dedicated connection and listens on every
+subscribed channel. Payloads are JSON objects; each carries the ``origin``
+process id so a process can skip its own notifications when it has already
+applied them locally after commit (``include_own`` channels get them all).
+``on_connect`` hooks run after every (re)connect, once ``LISTEN`` is active,
+so subscribers can resync state that may have changed while no connection
+was listening.
+"""
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Set
+
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+PROCESS_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class NotifyListener:
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[dict], None]] = {}
+        self._include_own: Set[str] = set()
+        self._on_connect: List[Callable[[], None]] = []
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(
+        self,
+        channel: str,
+        handler: Callable[[dict], None],
+        on_connect: Optional[Callable[[], None]] = None,
+        include_own: bool = False,
+    ) -> None:
+        """
+        Register before ``start()``; ``handler`` gets payloads from other
+        processes, and from this one too with ``include_own``.
+        """
+        self._handlers[channel] = handler
+        if include_own:
+            self._include_own.add(channel)
+        if on_connect is not None and on_connect not in self._on_connect:
+            self._on_connect.append(on_connect)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="pg-notify", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+            except Exception as exc:
+                logger.warning("Notification listener failed, retrying: %s", exc)
+                self._stopping.wait(5)
+
+    def _listen(self) -> None:
+        raw = engine.raw_connection()
+        raw.detach()  # long-lived LISTEN connection stays out of the pool
+        conn = raw.driver_connection
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                for channel in self._handlers:
+                    cur.execute(f'LISTEN "{channel}"')
+            for hook in self._on_connect:
+                hook()
+            while not self._stopping.is_set():
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    note = conn.notifies.pop(0)
+                    handler = self._handlers.get(note.channel)
+                    evt = json.loads(note.payload)
+                    own = evt.pop("origin", None) == PROCESS_ID
+                    if handler is not None and (not own or note.channel in self._include_own):
+                        handler(evt)
+        finally:
+            raw.close()
+
+
+listener = NotifyListener()
@@ -0,0 +1,124 @@
+"""
+Payout runs.
+
+``create_run`` pays out the accepted and completed bookings scheduled in a
+window that no earlier run has claimed. However many providers there are, it
+is one statement inside the database: an ``UPDATE ... RETURNING`` claims the
+bookings (setting ``payout_run_id``) and feeds a grouped
+``INSERT INTO payout_lines`` joined to ``provider_payout_settings``. Only
+providers with a payout destination (a UPI id, or a bank account and IFSC)
+are claimed; the others are counted as skipped and picked up by a later run
+once they add one. Since claimed bookings are excluded, rerunning a window
+only adds bookings accepted since and never pays a booking twice. Concurrent
+runs serialize on the booking row locks.
+
+``export_lines`` streams a run's lines as CSV or NDJSON through
+``app.core.exports``, so memory stays flat however many providers the run
+holds.
+"""
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import and_, case, exists, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core import exports
+from app.models import Booking, PayoutLine, PayoutRun, Provider, ProviderPayoutSettings
+from app.models.booking import EARNING_STATUSES
+
+_has_upi = func.coalesce(ProviderPayoutSettings.upi_id, "") != ""
+_has_destination = or_(
+    _has_upi,
+    and_(
+        func.coalesce(ProviderPayoutSettings.bank_acc_no, "") != "",
+        func.coalesce(ProviderPayoutSettings.bank_ifsc, "") != "",
+    ),
+)
+
+
+def _unpaid(period_start: datetime, period_end: datetime) -> list:
+    return [
+        Booking.payout_run_id.is_(None),
+        Booking.status.in_(EARNING_STATUSES),
+        Booking.scheduled_at >= period_start,
+        Booking.scheduled_at < period_end,
+    ]
+
+
+def create_run(
+    db: Session, period_start: datetime, period_end: datetime, created_by: Optional[int] = None
+) -> PayoutRun:
+    """Claim the window's unpaid bookings into a new run and record its lines; the caller commits."""
+    run = PayoutRun(period_start=period_start, period_end=period_end, created_by=created_by)
+    db.add(run)
+    db.flush()
+
+    payable = exists().where(ProviderPayoutSettings.provider_id == Booking.provider_id, _has_destination)
+    claimed = (
+        update(Booking)
+        .where(*_unpaid(period_start, period_end), payable)
+        # keep updated_at: being paid out is not a calendar change (see app.api.calendar)
+        .values(payout_run_id=run.id, updated_at=Booking.updated_at)
+        .returning(Booking.provider_id, Booking.price)
+        .cte("claimed")
+    )
+    lines = (
+        select(
+            literal(run.id),
+            claimed.c.provider_id,
+            func.sum(func.coalesce(claimed.c.price, 0)),
+            func.count(),
+            case((_has_upi, "upi"), else_="bank"),
+            case((_has_upi, ProviderPayoutSettings.upi_id), else_=ProviderPayoutSettings.bank_acc_no),
+            case((_has_upi, None), else_=ProviderPayoutSettings.bank_ifsc),
+        )
+        .join(ProviderPayoutSettings, ProviderPayoutSettings.provider_id == claimed.c.provider_id)
+        .group_by(
+            claimed.c.provider_id,
+            ProviderPayoutSettings.upi_id,
+            ProviderPayoutSettings.bank_acc_no,
+            ProviderPayoutSettings.bank_ifsc,
+        )
+    )
+    db.execute(
+        insert(PayoutLine)
+        .from_select(
+            ["run_id", "provider_id", "amount", "booking_count", "method", "destination", "bank_ifsc"], lines
+        )
+        .add_cte(claimed)
+    )
+
+    totals = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(PayoutLine.booking_count), 0),
+            func.coalesce(func.sum(PayoutLine.amount), 0),
+        ).where(PayoutLine.run_id == run.id)
+    ).one()
+    run.provider_count, run.booking_count, run.total_amount = totals
+    run.skipped_providers = db.execute(
+        select(func.count(func.distinct(Booking.provider_id))).where(
+            *_unpaid(period_start, period_end),
+            ~exists().where(ProviderPayoutSettings.provider_id == Booking.provider_id, _has_destination),
+        )
+    ).scalar()
+    return run
+
+
+def export_lines(db: Session, run_id: int, fmt: str = "csv") -> Iterator[str]:
+    """Yield the run's payout file, one line per provider (see app.core.exports)."""
+    stmt = (
+        select(
+            PayoutLine.provider_id,
+            Provider.business_name,
+            PayoutLine.method,
+            PayoutLine.destination,
+            PayoutLine.bank_ifsc,
+            PayoutLine.amount,
+            PayoutLine.booking_count,
+        )
+        .join(Provider, Provider.id == PayoutLine.provider_id)
+        .where(PayoutLine.run_id == run_id)
+        .order_by(PayoutLine.provider_id)
+    )
+    return exports.stream_rows(db, stmt, fmt)
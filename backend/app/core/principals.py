@@ -0,0 +1,104 @@
+"""
+Authenticated principal cache.
+
+``get_current_user`` resolves a JWT to a ``Principal``: an immutable snapshot
+of the fields authorization needs (id, role, is_active, provider_id). Snapshots
+are cached per process for ``PRINCIPAL_CACHE_TTL_SECONDS``, so most
+authenticated requests need no database read for auth. Code that changes any
+of these fields calls ``invalidate`` after committing; the TTL bounds how long
+other worker processes can keep serving the old snapshot.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Provider, User
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: str
+    is_active: bool
+    provider_id: Optional[int]
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, principal: Principal) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int]) -> None:
+        if user_id is None:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+)
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """Read a principal with one query (user joined to its provider profile)."""
+    row = (
+        db.query(User.id, User.role, User.is_active, Provider.id.label("provider_id"))
+        .outerjoin(Provider, Provider.user_id == User.id)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return Principal(
+        id=row.id,
+        role=row.role,
+        is_active=bool(row.is_active),
+        provider_id=row.provider_id,
+    )
+
+
+def get_principal(db: Session, user_id: int) -> Optional[Principal]:
+    principal = cache.get(user_id)
+    if principal is None:
+        principal = load_principal(db, user_id)
+        if principal is not None:
+            cache.put(principal)
+    return principal
+
+
+def invalidate(user_id: Optional[int]) -> None:
+    cache.invalidate(user_id)
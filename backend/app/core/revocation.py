@@ -0,0 +1,98 @@
+"""
+Token revocation epochs.
+
+Access tokens carry the user's ``token_epoch`` from the moment they were
+issued. Revoking a user's tokens bumps the column; every process keeps an
+in-memory map of ``user_id -> minimum valid epoch`` so tokens can be checked
+without a database read. The map is loaded whenever the notification listener
+(re)connects and kept fresh with ``NOTIFY``: ``revoke_tokens`` stages the bump,
+sends it before commit and applies it locally after commit, like booking
+events.
+"""
+import json
+import logging
+import threading
+from typing import Dict
+
+from sqlalchemy import event, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.notify import PROCESS_ID, listener
+from app.db.session import SessionLocal
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+_STAGED_KEY = "token_revocations"
+
+
+class RevocationMap:
+    def __init__(self):
+        self._min_epoch: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def min_epoch(self, user_id: int) -> int:
+        return self._min_epoch.get(user_id, 0)
+
+    def is_revoked(self, user_id: int, epoch: int) -> bool:
+        return epoch < self.min_epoch(user_id)
+
+    def apply(self, evt: dict) -> None:
+        user_id, epoch = int(evt["user_id"]), int(evt["epoch"])
+        with self._lock:
+            if epoch > self._min_epoch.get(user_id, 0):
+                self._min_epoch[user_id] = epoch
+
+    def load(self) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.query(User.id, User.token_epoch).filter(User.token_epoch > 0).all()
+        finally:
+            db.close()
+        with self._lock:
+            for user_id, epoch in rows:
+                if epoch > self._min_epoch.get(user_id, 0):
+                    self._min_epoch[user_id] = epoch
+        logger.info("Loaded token revocation epochs for %s users", len(rows))
+
+
+revocations = RevocationMap()
+
+
+def revoke_tokens(db: Session, user_id: int) -> None:
+    """Invalidate every token issued to ``user_id`` so far, when the caller commits."""
+    epoch = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_epoch=User.token_epoch + 1)
+        .returning(User.token_epoch)
+    ).scalar()
+    if epoch is not None:
+        db.info.setdefault(_STAGED_KEY, []).append({"user_id": user_id, "epoch": epoch})
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _notify_staged(session: Session) -> None:
+    staged = session.info.get(_STAGED_KEY)
+    if not staged:
+        return
+    payloads = [json.dumps({**evt, "origin": PROCESS_ID}) for evt in staged]
+    session.execute(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+        {"channel": settings.TOKEN_REVOCATION_CHANNEL, "payloads": payloads},
+    )
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_staged(session: Session) -> None:
+    for evt in session.info.pop(_STAGED_KEY, []):
+        revocations.apply(evt)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_staged(session: Session) -> None:
+    session.info.pop(_STAGED_KEY, None)
+
+
+listener.subscribe(settings.TOKEN_REVOCATION_CHANNEL, revocations.apply, on_connect=revocations.load)
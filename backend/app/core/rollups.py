@@ -0,0 +1,216 @@
+"""
+Rollup tables: daily metrics for the admin dashboard and the monthly
+earnings ledger behind the provider earnings pages.
+
+Write paths stage deltas with ``record`` (and ``booking_status_changed`` for
+revenue and earnings) in their own transaction; ``before_commit`` folds them
+into ``daily_metrics`` and ``provider_earnings`` with one
+``INSERT ... ON CONFLICT DO UPDATE`` each, so a rollup commits or rolls back
+with the change it counts. Readers then fetch a few rows per day, or one per
+provider and month, instead of aggregating the base tables. Daily rows are
+keyed by the UTC date of the change and a shard picked at random per commit
+(``DAILY_METRICS_SHARDS``), so concurrent writers don't all wait on one row
+lock held until commit; readers sum the shards. Earnings are keyed by the
+month the booking is scheduled in.
+
+Writes that bypass the API (seed scripts, manual SQL) are not counted;
+``backfill`` and ``backfill_earnings`` rebuild the tables from the base tables
+and ``reconcile_earnings`` reports (or repairs) ledger rows that drifted.
+Transition dates are not stored, so a backfill puts revenue on the booking's
+creation day.
+"""
+import random
+from datetime import date, datetime
+from typing import List
+
+from sqlalchemy import delete, event, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import DailyMetric, ProviderEarning
+from app.models.booking import EARNING_STATUSES
+
+_STAGED_KEY = "rollup_deltas"
+_EARNINGS_KEY = "earnings_deltas"
+FIELDS = ("users", "providers", "services", "bookings", "revenue")
+_EARNING_STATUSES_SQL = ", ".join(f"'{status}'" for status in EARNING_STATUSES)
+
+BACKFILL_SQL = text(
+    f"""
+    INSERT INTO daily_metrics (day, users, providers, services, bookings, revenue)
+    SELECT day, sum(users), sum(providers), sum(services), sum(bookings), sum(revenue)
+    FROM (
+        SELECT coalesce(created_at, now())::date AS day,
+               1 AS users, 0 AS providers, 0 AS services, 0 AS bookings, 0 AS revenue
+        FROM app_users
+        UNION ALL
+        SELECT coalesce(created_at, now())::date, 0, 1, 0, 0, 0 FROM providers
+        UNION ALL
+        SELECT coalesce(created_at, now())::date, 0, 0, 1, 0, 0 FROM services
+        UNION ALL
+        SELECT coalesce(created_at, now())::date, 0, 0, 0, 1,
+               CASE WHEN status IN ({_EARNING_STATUSES_SQL}) THEN coalesce(price, 0) ELSE 0 END
+        FROM bookings
+    ) changes
+    GROUP BY day
+    """
+)
+
+# what provider_earnings should hold, straight from bookings
+EXPECTED_EARNINGS = f"""
+    SELECT provider_id, date_trunc('month', scheduled_at)::date AS month,
+           sum(coalesce(price, 0)) AS amount, count(*) AS booking_count
+    FROM bookings
+    WHERE status IN ({_EARNING_STATUSES_SQL})
+    GROUP BY 1, 2
+"""
+
+EARNINGS_BACKFILL_SQL = text(
+    f"INSERT INTO provider_earnings (provider_id, month, amount, booking_count) {EXPECTED_EARNINGS}"
+)
+
+EARNINGS_DRIFT_SQL = text(
+    f"""
+    WITH expected AS ({EXPECTED_EARNINGS})
+    SELECT coalesce(e.provider_id, l.provider_id) AS provider_id,
+           coalesce(e.month, l.month) AS month,
+           coalesce(l.amount, 0) AS ledger_amount,
+           coalesce(l.booking_count, 0) AS ledger_count,
+           coalesce(e.amount, 0) AS amount,
+           coalesce(e.booking_count, 0) AS booking_count
+    FROM expected e
+    FULL OUTER JOIN provider_earnings l ON l.provider_id = e.provider_id AND l.month = e.month
+    WHERE coalesce(l.amount, 0) <> coalesce(e.amount, 0)
+       OR coalesce(l.booking_count, 0) <> coalesce(e.booking_count, 0)
+    ORDER BY 1, 2
+    """
+)
+
+
+def record(db: Session, **deltas) -> None:
+    """Stage deltas (``users=1``, ``services=-1``, ...) for today's row; written on commit."""
+    day = datetime.utcnow().date()
+    staged = db.info.setdefault(_STAGED_KEY, {}).setdefault(day, dict.fromkeys(FIELDS, 0))
+    for field, delta in deltas.items():
+        staged[field] += delta
+
+
+def booking_status_changed(db: Session, previous: str, new: str, booking) -> None:
+    """
+    Revenue and earnings count bookings in ``EARNING_STATUSES`` (accepted and
+    completed): entering the set adds the booking (its price, provider and
+    scheduled month), leaving it subtracts, and accepted -> completed moves
+    nothing.
+    """
+    sign = (new in EARNING_STATUSES) - (previous in EARNING_STATUSES)
+    if not sign:
+        return
+    price = booking.price or 0
+    if price:
+        record(db, revenue=sign * price)
+    month = date(booking.scheduled_at.year, booking.scheduled_at.month, 1)
+    staged = db.info.setdefault(_EARNINGS_KEY, {}).setdefault((booking.provider_id, month), [0, 0])
+    staged[0] += sign * price
+    staged[1] += sign
+
+
+def _write_daily_metrics(session: Session, staged: dict) -> None:
+    shard = random.randrange(settings.DAILY_METRICS_SHARDS)
+    rows = [{"day": day, "shard": shard, **deltas} for day, deltas in staged.items() if any(deltas.values())]
+    if not rows:
+        return
+    stmt = insert(DailyMetric).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyMetric.day, DailyMetric.shard],
+        set_={field: getattr(DailyMetric, field) + getattr(stmt.excluded, field) for field in FIELDS},
+    )
+    session.execute(stmt)
+
+
+def _write_earnings(session: Session, staged: dict) -> None:
+    # sorted so concurrent bulk transitions lock ledger rows in the same order
+    rows = [
+        {"provider_id": provider_id, "month": month, "amount": amount, "booking_count": count}
+        for (provider_id, month), (amount, count) in sorted(staged.items())
+        if amount or count
+    ]
+    if not rows:
+        return
+    stmt = insert(ProviderEarning).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProviderEarning.provider_id, ProviderEarning.month],
+        set_={
+            "amount": ProviderEarning.amount + stmt.excluded.amount,
+            "booking_count": ProviderEarning.booking_count + stmt.excluded.booking_count,
+        },
+    )
+    session.execute(stmt)
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _write_rollups(session: Session) -> None:
+    staged = session.info.pop(_STAGED_KEY, None)
+    if staged:
+        _write_daily_metrics(session, staged)
+    earnings = session.info.pop(_EARNINGS_KEY, None)
+    if earnings:
+        _write_earnings(session, earnings)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rollups(session: Session) -> None:
+    session.info.pop(_STAGED_KEY, None)
+    session.info.pop(_EARNINGS_KEY, None)
+
+
+def backfill(db: Session) -> int:
+    """
+    Rebuild ``daily_metrics`` from the base tables and commit. The table lock
+    makes concurrent writers wait, so their deltas land on top of the rebuilt
+    rows rather than being counted twice or lost.
+    """
+    db.execute(text("LOCK TABLE daily_metrics IN EXCLUSIVE MODE"))
+    db.execute(text("SET LOCAL TIME ZONE 'UTC'"))
+    db.execute(delete(DailyMetric))
+    db.execute(BACKFILL_SQL)
+    days = db.query(DailyMetric).count()  # shard 0 only, one row per day
+    db.commit()
+    return days
+
+
+def backfill_earnings(db: Session) -> int:
+    """Rebuild ``provider_earnings`` from accepted and completed bookings and commit (locking as in ``backfill``)."""
+    db.execute(text("LOCK TABLE provider_earnings IN EXCLUSIVE MODE"))
+    db.execute(delete(ProviderEarning))
+    db.execute(EARNINGS_BACKFILL_SQL)
+    rows = db.query(ProviderEarning).count()
+    db.commit()
+    return rows
+
+
+def reconcile_earnings(db: Session, fix: bool = False) -> List:
+    """
+    Ledger rows that disagree with the bookings table, as (provider_id, month,
+    ledger_amount, ledger_count, amount, booking_count). Both sides are read
+    from one snapshot, so in-flight transitions don't show up as drift. With
+    ``fix`` the table is locked first and the rows are rewritten and committed.
+    """
+    if fix:
+        db.execute(text("LOCK TABLE provider_earnings IN EXCLUSIVE MODE"))
+    drift = db.execute(EARNINGS_DRIFT_SQL).all()
+    if fix and drift:
+        rows = [
+            {"provider_id": row.provider_id, "month": row.month, "amount": row.amount, "booking_count": row.booking_count}
+            for row in drift
+        ]
+        stmt = insert(ProviderEarning).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProviderEarning.provider_id, ProviderEarning.month],
+            set_={"amount": stmt.excluded.amount, "booking_count": stmt.excluded.booking_count},
+        )
+        db.execute(stmt)
+    if fix:
+        db.commit()
+    return drift
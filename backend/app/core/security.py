@@ -0,0 +1,136 @@
+"""
+Password hashing.
+
+pbkdf2 is CPU-bound and holds the GIL, so async handlers hand it to a small
+``ProcessPoolExecutor`` (``PasswordHasher``) instead of a threadpool worker
+that would stall every other request in the process. ``PASSWORD_HASH_ROUNDS``
+sets the cost; hashes made with any other cost verify as usual and are
+replaced on the next successful login. The pool is created on first use and
+``PASSWORD_HASH_WORKERS=0`` hashes in the caller's threadpool instead.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4)
+def _context(rounds: int) -> CryptContext:
+    # min == max == default: any other cost "needs update" and is rehashed
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds,
+    )
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    return _context(rounds or settings.PASSWORD_HASH_ROUNDS).hash(password)
+
+
+def verify_password(
+    password: str, hashed: str, rounds: Optional[int] = None
+) -> Tuple[bool, Optional[str]]:
+    """``(valid, new_hash)``; ``new_hash`` is set when the stored cost is out of date."""
+    return _context(rounds or settings.PASSWORD_HASH_ROUNDS).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """Runs hashing in worker processes and keeps queue-depth metrics."""
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking would copy DB connections and background threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent logins, retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        started = time.perf_counter()
+        try:
+            pool = self._executor()
+            if pool is None:
+                return await run_in_threadpool(fn, *args)
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.wait_ms_total += elapsed_ms
+                self.wait_ms_max = max(self.wait_ms_max, elapsed_ms)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_password, password, hashed, self.rounds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": (self.wait_ms_total / self.completed) if self.completed else 0.0,
+                "max_ms": self.wait_ms_max,
+            }
+
+
+hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.PASSWORD_HASH_ROUNDS,
+)
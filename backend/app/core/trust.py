@@ -0,0 +1,232 @@
+"""
+Provider trust scores in SQL.
+
+``scores`` is one aggregate statement over providers: booking counts per
+status (covered by ``ix_bookings_provider_status``) and provider report
+counts, joined to ``providers`` and turned into the ``TrustScoreOut``
+components, so ranking, filtering and paging all happen in the database. The
+weights are those of the per-provider admin score; match scoring
+(``app.api.match_queries.TrustInputs``) differs only in scoring an all-zero
+provider as 0.5.
+
+Ranking the whole fleet live aggregates every booking. ``provider_trust_scores``
+holds a snapshot instead: ``refresh_snapshot`` rebuilds it in one transaction
+(readers keep the previous snapshot until it commits), from
+``scripts/rollups.py refresh-trust-snapshot`` or from
+``TrustSnapshotRefresher`` every ``TRUST_SNAPSHOT_REFRESH_SECONDS``; an
+advisory lock keeps concurrent workers from rebuilding it at the same time.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Float, case, cast, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import Booking, Provider, ProviderTrustScore, Report
+from app.models.booking import EARNING_STATUSES
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = (
+    "trust_score",
+    "accepted_ratio",
+    "cancel_ratio",
+    "rating_norm",
+    "reports_penalty",
+    "total_bookings",
+    "reports_count",
+)
+_REFRESH_LOCK_ID = 0x7472757374  # "trust"
+
+
+def _clamp(value, low=0.0, high=1.0):
+    return func.least(func.greatest(value, low), high)
+
+
+def against_provider():
+    """
+    Reports that count against a provider: ``target_type`` says what was
+    reported, the legacy ``report_type`` only when it is unset. Shared with
+    match scoring so both count the same reports.
+    """
+    return func.coalesce(Report.target_type, Report.report_type) == "provider"
+
+
+def scores(provider_id: Optional[int] = None):
+    """Trust components per provider (one provider when ``provider_id`` is given), as a subquery."""
+    bookings = select(
+        Booking.provider_id,
+        func.count(Booking.id).label("total"),
+        # completed jobs count as accepted: finishing one must not lower the score
+        func.count(Booking.id).filter(Booking.status.in_(EARNING_STATUSES)).label("accepted"),
+        func.count(Booking.id).filter(Booking.status == "cancelled").label("cancelled"),
+    ).group_by(Booking.provider_id)
+    reports = select(
+        Report.target_id.label("provider_id"), func.count(Report.id).label("reports")
+    ).where(against_provider()).group_by(Report.target_id)
+    providers = select(
+        Provider.id, Provider.rating, Provider.is_verified.label("is_verified"), Provider.is_suspended
+    )
+    if provider_id is not None:
+        bookings = bookings.where(Booking.provider_id == provider_id)
+        reports = reports.where(Report.target_id == provider_id)
+        providers = providers.where(Provider.id == provider_id)
+    bookings, reports, providers = bookings.subquery(), reports.subquery(), providers.subquery()
+
+    total = func.coalesce(bookings.c.total, 0)
+    divisor = cast(total, Float)
+    reports_count = func.coalesce(reports.c.reports, 0)
+    accepted_ratio = case((total > 0, cast(bookings.c.accepted, Float) / divisor), else_=0.5)
+    cancel_ratio = case((total > 0, cast(bookings.c.cancelled, Float) / divisor), else_=0.0)
+    rating_norm = _clamp(func.coalesce(providers.c.rating, 0) / 5.0)
+    reports_penalty = func.least(cast(reports_count, Float) / 5.0, 1.0)
+    trust_score = _clamp(
+        0.4 * accepted_ratio + 0.3 * rating_norm + 0.15 * (1 - cancel_ratio) + 0.15 * (1 - reports_penalty)
+    )
+    return (
+        select(
+            providers.c.id.label("provider_id"),
+            trust_score.label("trust_score"),
+            accepted_ratio.label("accepted_ratio"),
+            cancel_ratio.label("cancel_ratio"),
+            rating_norm.label("rating_norm"),
+            reports_penalty.label("reports_penalty"),
+            total.label("total_bookings"),
+            reports_count.label("reports_count"),
+            providers.c.is_verified,
+            providers.c.is_suspended,
+        )
+        .outerjoin(bookings, bookings.c.provider_id == providers.c.id)
+        .outerjoin(reports, reports.c.provider_id == providers.c.id)
+        .subquery("scores")
+    )
+
+
+def _snapshot():
+    return (
+        select(
+            ProviderTrustScore.provider_id,
+            *(getattr(ProviderTrustScore, name) for name in COMPONENTS),
+            Provider.is_verified.label("is_verified"),
+            Provider.is_suspended,
+        )
+        .join(Provider, Provider.id == ProviderTrustScore.provider_id)
+        .subquery("scores")
+    )
+
+
+def leaderboard(
+    db: Session,
+    sort: str = "trust_score",
+    descending: bool = True,
+    page: int = 1,
+    page_size: int = 50,
+    is_verified: Optional[bool] = None,
+    is_suspended: Optional[bool] = None,
+    min_bookings: int = 0,
+    snapshot: bool = False,
+) -> Tuple[List, int, Optional[datetime]]:
+    """
+    One page of providers ranked by ``sort`` (ties by provider id) and the
+    total matching the filters, in one statement (a second one counts the
+    matches when the page is past the end). ``snapshot`` reads the last
+    refresh instead (falling back to live scores before the first one);
+    its time is returned, ``None`` for live scores.
+    """
+    computed_at = db.execute(select(func.max(ProviderTrustScore.computed_at))).scalar() if snapshot else None
+    scored = _snapshot() if computed_at else scores()
+
+    filters = []
+    if is_verified is not None:
+        filters.append(scored.c.is_verified == is_verified)
+    if is_suspended is not None:
+        filters.append(scored.c.is_suspended == is_suspended)
+    if min_bookings:
+        filters.append(scored.c.total_bookings >= min_bookings)
+    key = scored.c[sort]
+    stmt = (
+        select(scored.c.provider_id, *(scored.c[name] for name in COMPONENTS), func.count().over().label("total"))
+        .where(*filters)
+        .order_by(key.desc() if descending else key.asc(), scored.c.provider_id)
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+    )
+    rows = db.execute(stmt).all()
+    if rows:
+        total = rows[0].total
+    elif page > 1:
+        total = db.execute(select(func.count()).select_from(scored).where(*filters)).scalar()
+    else:
+        total = 0
+    return rows, total, computed_at
+
+
+def refresh_snapshot(db: Session, wait: bool = False) -> Optional[int]:
+    """
+    Rebuild ``provider_trust_scores`` and commit; returns the row count, or
+    ``None`` when another session holds the refresh (unless ``wait``).
+    """
+    lock = func.pg_advisory_xact_lock if wait else func.pg_try_advisory_xact_lock
+    if db.execute(select(lock(_REFRESH_LOCK_ID))).scalar() is False:
+        db.rollback()
+        return None
+    scored = scores()
+    db.execute(delete(ProviderTrustScore))
+    db.execute(
+        insert(ProviderTrustScore).from_select(
+            ["provider_id", *COMPONENTS, "computed_at"],
+            select(scored.c.provider_id, *(scored.c[name] for name in COMPONENTS), func.now()),
+        )
+    )
+    rows = db.query(ProviderTrustScore).count()
+    db.commit()
+    return rows
+
+
+class TrustSnapshotRefresher:
+    """Refreshes the snapshot on a timer in a daemon thread (disabled when the interval is 0)."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.interval <= 0 or self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="trust-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            db = SessionLocal()
+            try:
+                rows = refresh_snapshot(db)
+                if rows is not None:
+                    logger.info("Trust snapshot refreshed: %s providers", rows)
+            except Exception as exc:
+                db.rollback()
+                logger.warning("Trust snapshot refresh failed: %s", exc)
+            finally:
+                db.close()
+            if self._stopping.wait(self.interval):
+                return
+
+
+refresher = TrustSnapshotRefresher(settings.TRUST_SNAPSHOT_REFRESH_SECONDS)
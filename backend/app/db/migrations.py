@@ -0,0 +1,78 @@
+"""
+Schema revision checks for startup.
+
+The schema is owned by the Alembic migrations in ``backend/alembic``.
+Comparing the database's ``alembic_version`` row with the head revision is a
+single query, unlike ``create_all`` which reflects every table (and imports
+every model) on each boot. Alembic itself is imported lazily so the default
+"check" path only pays for reading the script directory.
+
+``check_schema`` raises ``SchemaOutOfDate`` when the revision is behind (or
+can't be read), and the startup hook lets it fail startup: a worker never
+serves requests against a schema older than its models.
+"""
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "alembic.ini")
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def head_revision() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision() -> Optional[str]:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except ProgrammingError:
+        return None  # never migrated
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is not at the head revision, or its revision could not be read."""
+
+
+def check_schema() -> None:
+    """Raise ``SchemaOutOfDate`` unless the database is at the head revision."""
+    head = head_revision()
+    try:
+        current = current_revision()
+    except Exception as exc:
+        raise SchemaOutOfDate(f"Could not read the database schema revision: {exc}") from exc
+    if current != head:
+        raise SchemaOutOfDate(
+            f"Database schema at revision {current}, expected {head}; run `alembic upgrade head` "
+            "(or start with SCHEMA_STARTUP_MODE=migrate)"
+        )
+    logger.info("Database schema at revision %s", current)
+
+
+def upgrade_head() -> None:
+    from alembic import command
+
+    config = alembic_config()
+    # a plain connection: alembic commits per migration, and migrations that
+    # build indexes concurrently step outside the transaction
+    with engine.connect() as conn:
+        config.attributes["connection"] = conn
+        command.upgrade(config, "head")
+    logger.info("Database schema upgraded to %s", head_revision())
@@ -0,0 +1,115 @@
+"""
+Connection pool with checkout telemetry.
+
+``InstrumentedQueuePool`` is SQLAlchemy's ``QueuePool`` timed around the
+checkout itself, so time spent queueing for a free connection (and checkouts
+that hit ``pool_timeout``) become visible. ``install_idle_pre_ping`` is the
+"idle" pre-ping strategy: a connection is pinged on checkout only if it sat in
+the pool longer than a threshold, instead of paying a round trip on every
+checkout.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    def __init__(self, samples: int = 1000):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self._recent: Deque[float] = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self._recent.append(wait_ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            checkouts = self.checkouts
+            result = {
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+                "wait_ms_avg": (self.wait_ms_total / checkouts) if checkouts else 0.0,
+                "wait_ms_max": self.wait_ms_max,
+            }
+        result["wait_ms_p95_recent"] = recent[int(len(recent) * 0.95)] if recent else 0.0
+        return result
+
+
+class InstrumentedQueuePool(QueuePool):
+    stats: PoolStats
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_wait((time.perf_counter() - started) * 1000)
+        return conn
+
+    def telemetry(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "in_use": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout_seconds": self._timeout,
+            **self.stats.snapshot(),
+        }
+
+
+def install_idle_pre_ping(engine, idle_seconds: float) -> None:
+    """Ping connections on checkout only when idle for more than ``idle_seconds``."""
+
+    @event.listens_for(engine, "checkin")
+    def _stamp(dbapi_connection, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, record, proxy):
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        stats = getattr(engine.pool, "stats", None)
+        if stats is not None:
+            stats.pings += 1
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception:
+            if stats is not None:
+                stats.ping_failures += 1
+            # the pool discards this connection and retries with a fresh one
+            raise exc.DisconnectionError()
@@ -0,0 +1,185 @@
+"""
+Per-request query accounting.
+
+``QueryStatsMiddleware`` opens a ``RequestQueries`` collector for each HTTP
+request; engine-wide ``before/after_cursor_execute`` hooks add every statement
+the request runs (any engine, any session) with its duration and a fingerprint
+(the SQL with literals and bind parameters stripped). At the end of the request
+the totals go into per-route histograms (``stats``), and a warning is logged
+when a route runs more than ``QUERY_BUDGET_PER_REQUEST`` statements or repeats
+one fingerprint ``QUERY_REPEAT_WARN`` times, the usual shape of an N+1.
+With ``QUERY_STATS_HEADERS`` on, responses also carry ``X-DB-Query-Count``,
+``X-DB-Time-Ms`` and ``X-DB-Repeated-Queries``.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+DB_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    normalized = _LITERALS.sub("?", statement)
+    return _SPACES.sub(" ", _LISTS.sub("?", normalized)).strip()
+
+
+class RequestQueries:
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.db_ms += elapsed_ms
+        self.fingerprints[fingerprint(statement)] += 1
+
+    @property
+    def repeated(self) -> int:
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def most_repeated(self) -> Optional[tuple]:
+        common = self.fingerprints.most_common(1)
+        return common[0] if common else None
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    started = conn.info.get("query_started")
+    if queries is None or not started:
+        return
+    queries.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+class _Histogram:
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{b}" for b in self.bounds] + ["inf"]
+        return {"buckets": dict(zip(labels, self.counts)), "sum": round(self.total, 2)}
+
+
+class RouteQueryStats:
+    def __init__(self):
+        self._routes: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, queries: RequestQueries, over_budget: bool) -> None:
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0,
+                    "over_budget": 0,
+                    "queries": _Histogram(QUERY_COUNT_BUCKETS),
+                    "db_ms": _Histogram(DB_MS_BUCKETS),
+                }
+            entry["requests"] += 1
+            entry["over_budget"] += int(over_budget)
+            entry["queries"].observe(queries.count)
+            entry["db_ms"].observe(queries.db_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                route: {
+                    "requests": entry["requests"],
+                    "over_budget": entry["over_budget"],
+                    "queries": entry["queries"].snapshot(),
+                    "db_ms": entry["db_ms"].snapshot(),
+                }
+                for route, entry in self._routes.items()
+            }
+
+
+stats = RouteQueryStats()
+
+
+def _route_label(scope: dict) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return f"{scope.get('method', '')} {path}" if path else "unmatched"
+
+
+def _finish(scope: dict, queries: RequestQueries) -> None:
+    route = _route_label(scope)
+    over_budget = queries.count > settings.QUERY_BUDGET_PER_REQUEST
+    stats.observe(route, queries, over_budget)
+    if over_budget:
+        logger.warning(
+            "%s ran %s queries (budget %s, %.1fms in the database)",
+            route,
+            queries.count,
+            settings.QUERY_BUDGET_PER_REQUEST,
+            queries.db_ms,
+        )
+    top = queries.most_repeated()
+    if top is not None and top[1] >= settings.QUERY_REPEAT_WARN:
+        logger.warning("%s repeated a query %s times (possible N+1): %s", route, top[1], top[0][:200])
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.QUERY_STATS_HEADERS:
+                headers: List = list(message.get("headers", []))
+                headers += [
+                    (b"x-db-query-count", str(queries.count).encode()),
+                    (b"x-db-time-ms", f"{queries.db_ms:.1f}".encode()),
+                    (b"x-db-repeated-queries", str(queries.repeated).encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            _finish(scope, queries)
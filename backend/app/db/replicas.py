@@ -0,0 +1,117 @@
+"""
+Read-replica routing.
+
+``DATABASE_REPLICA_URLS`` lists streaming replicas; read-only handlers take
+their session from ``deps.get_read_db``, which asks ``router.engine_for`` for
+an engine. Replicas are picked round-robin or by fewest checked-out
+connections (``DB_REPLICA_STRATEGY``). Replicas lag the primary, so a user
+who committed a write is pinned to the primary for
+``DB_REPLICA_STICKY_SECONDS`` to read their own writes. The window is
+tracked per process; keep it above the replication lag you expect since
+another worker may serve the follow-up read. With no replicas configured
+everything uses the primary.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, install_idle_pre_ping
+from app.db.session import SessionLocal, engine as primary_engine
+
+logger = logging.getLogger(__name__)
+
+USER_KEY = "user_id"
+_WROTE_KEY = "wrote"
+
+
+def _replica_engine(url: str) -> Engine:
+    replica = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING == "always",
+    )
+    if settings.DB_POOL_PRE_PING == "idle":
+        install_idle_pre_ping(replica, settings.DB_POOL_PRE_PING_IDLE_SECONDS)
+    return replica
+
+
+class ReplicaRouter:
+    def __init__(self, replicas: List[Engine], strategy: str, sticky_seconds: float):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.replicas = replicas
+        self.strategy = strategy
+        self.sticky_seconds = sticky_seconds
+        self._next = itertools.count()
+        self._recent_writers: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark_write(self, user_id: int) -> None:
+        if not self.replicas:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._recent_writers[user_id] = now + self.sticky_seconds
+            if len(self._recent_writers) > 10000:
+                self._recent_writers = {
+                    uid: until for uid, until in self._recent_writers.items() if until > now
+                }
+
+    def _pinned(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        until = self._recent_writers.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def engine_for(self, user_id: Optional[int] = None) -> Engine:
+        if not self.replicas or self._pinned(user_id):
+            return primary_engine
+        if self.strategy == "least_connections":
+            return min(self.replicas, key=lambda e: e.pool.checkedout())
+        return self.replicas[next(self._next) % len(self.replicas)]
+
+    def telemetry(self) -> List[dict]:
+        return [
+            {"url": e.url.render_as_string(hide_password=True), **e.pool.telemetry()}
+            for e in self.replicas
+        ]
+
+
+router = ReplicaRouter(
+    replicas=[_replica_engine(url) for url in settings.DATABASE_REPLICA_URLS],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    sticky_seconds=settings.DB_REPLICA_STICKY_SECONDS,
+)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flag_orm_write(session: Session, flush_context) -> None:
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _flag_statement_write(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _pin_writer(session: Session) -> None:
+    if session.info.pop(_WROTE_KEY, False) and session.info.get(USER_KEY) is not None:
+        router.mark_write(session.info[USER_KEY])
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_write_flag(session: Session) -> None:
+    session.info.pop(_WROTE_KEY, None)
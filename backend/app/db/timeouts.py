@@ -0,0 +1,105 @@
+"""
+Per-route statement timeouts.
+
+A request's sessions carry a deadline: the route's budget (``@statement_budget``
+on the endpoint, else ``STATEMENT_TIMEOUT_MS``) counted from when the session
+was opened. Each transaction the session begins runs
+``SET LOCAL statement_timeout`` with the time left, so pool waits and earlier
+queries in the request eat into the same budget and one slow query class can't
+hold connections while everyone else queues for the pool. Postgres cancels the
+statement when the budget runs out (SQLSTATE 57014); ``app.main`` answers 503
+with ``Retry-After`` and ``stats`` counts cancellations per route.
+
+A successful commit restarts the clock. What follows it is usually a refresh
+of the rows just written, and a 503 there would have the client retry a write
+that already succeeded.
+"""
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+DEADLINE_KEY = "statement_deadline"
+BUDGET_KEY = "statement_budget_ms"
+QUERY_CANCELED = "57014"
+
+
+def statement_budget(ms: int):
+    """Endpoint decorator (below ``@router.get``): statement budget in milliseconds, 0 for none."""
+
+    def decorate(fn):
+        fn.statement_timeout_ms = ms
+        return fn
+
+    return decorate
+
+
+def budget_for(route) -> int:
+    endpoint = getattr(route, "endpoint", None)
+    return getattr(endpoint, "statement_timeout_ms", settings.STATEMENT_TIMEOUT_MS)
+
+
+def route_label(route) -> str:
+    if route is None:
+        return "unknown"
+    return f"{','.join(sorted(route.methods or ()))} {route.path}"
+
+
+def set_deadline(session: Session, budget_ms: int) -> None:
+    if budget_ms > 0:
+        session.info[BUDGET_KEY] = budget_ms
+        session.info[DEADLINE_KEY] = time.monotonic() + budget_ms / 1000
+
+
+def is_query_canceled(exc: DBAPIError) -> bool:
+    return getattr(exc.orig, "pgcode", None) == QUERY_CANCELED
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def _apply_deadline(session: Session, transaction, connection) -> None:
+    deadline = session.info.get(DEADLINE_KEY)
+    if deadline is None:
+        return
+    remaining_ms = max(int((deadline - time.monotonic()) * 1000), 1)
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _restart_deadline(session: Session) -> None:
+    budget_ms = session.info.get(BUDGET_KEY)
+    if budget_ms is not None:
+        set_deadline(session, budget_ms)
+
+
+class TimeoutStats:
+    def __init__(self):
+        self._cancelled: Dict[str, int] = {}
+        self._budgets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route) -> None:
+        label = route_label(route)
+        with self._lock:
+            self._cancelled[label] = self._cancelled.get(label, 0) + 1
+            self._budgets[label] = budget_for(route)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {
+                label: {"budget_ms": self._budgets[label], "cancelled": count}
+                for label, count in self._cancelled.items()
+            }
+        return {
+            "default_budget_ms": settings.STATEMENT_TIMEOUT_MS,
+            "cancelled_total": sum(r["cancelled"] for r in routes.values()),
+            "routes": routes,
+        }
+
+
+stats = TimeoutStats()
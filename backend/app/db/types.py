@@ -0,0 +1,23 @@
+"""
+Column types for PostGIS values.
+
+The API never handles geographies in Python: coordinates are read back with
+``ST_X``/``ST_Y`` (app.api.utils.service_coordinates) and points are written
+with ``ST_MakePoint``, so the models only need a type that renders the DDL.
+geoalchemy2 would import shapely (about 180ms) on every boot and in every
+``alembic`` invocation.
+"""
+from sqlalchemy.types import UserDefinedType
+
+
+class Geography(UserDefinedType):
+    """``geography(<geometry_type>,<srid>)``; values come back as the driver returns them (hex EWKB)."""
+
+    cache_ok = True
+
+    def __init__(self, geometry_type: str = "POINT", srid: int = 4326):
+        self.geometry_type = geometry_type
+        self.srid = srid
+
+    def get_col_spec(self, **kw) -> str:
+        return f"geography({self.geometry_type},{self.srid})"
@@ -2,11 +2,16 @@ import logging
 logging.basicConfig(level=logging.INFO)
 
 from fastapi.security import HTTPBearer
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
 
-from app.api import auth, bookings, services, admin, user, provider, match, reports
+from app.api import auth, availability, bookings, services, admin, user, provider, match, metrics, reports
 from app.api.provider import earnings_router
+from app.core.config import settings
+from app.db import migrations, timeouts
+from app.db.query_stats import QueryStatsMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -20,18 +25,76 @@ app = FastAPI(
 def startup_log() -> None:
     """
     App startup hook.
-    Attempt to ensure tables exist; log failures without crashing so app boots.
+    "check" (the default) refuses to start unless the schema is at the head
+    revision; create_all/migrate log failures without crashing so the app boots.
     """
     logger.info("HelpX API starting up")
+    mode = settings.SCHEMA_STARTUP_MODE
+    if mode not in ("create_all", "migrate"):
+        # raises SchemaOutOfDate, which aborts startup
+        migrations.check_schema()
+    else:
+        try:
+            if mode == "create_all":
+                from app.db.session import engine
+                import app.models  # noqa: F401
+                from app.db.base import Base
+
+                Base.metadata.create_all(bind=engine, checkfirst=True)
+                logger.info("Metadata ensured (tables=%s)", ", ".join(sorted(Base.metadata.tables.keys())))
+            else:
+                migrations.upgrade_head()
+        except Exception as exc:
+            logger.warning("Database not available at startup: %s", exc)
+
+    from app.core import events as booking_events
+    from app.core.audit import writer as audit_writer
+    from app.core.notify import listener as notify_listener
+    from app.core.revocation import revocations
+    from app.core.trust import refresher as trust_refresher
+
     try:
-        from app.db.session import engine
-        import app.models  # noqa: F401
-        from app.db.base import Base
+        revocations.load()
+    except Exception as exc:
+        logger.warning("Could not load token revocations at startup: %s", exc)
+    audit_writer.start()
+    booking_events.listen()
+    notify_listener.start()
+    trust_refresher.start()
+
 
-        Base.metadata.create_all(bind=engine, checkfirst=True)
-        logger.info("Metadata ensured (tables=%s)", ", ".join(sorted(Base.metadata.tables.keys())))
+@app.on_event("shutdown")
+def shutdown_flush() -> None:
+    """Stop background workers; relay pending audit events before the process exits."""
+    from app.core.audit import writer as audit_writer
+    from app.core.notify import listener as notify_listener
+    from app.core.security import hasher as password_hasher
+    from app.core.trust import refresher as trust_refresher
+
+    notify_listener.stop()
+    trust_refresher.stop()
+    password_hasher.shutdown()
+    try:
+        audit_writer.stop()
     except Exception as exc:
-        logger.warning("Database not available at startup: %s", exc)
+        logger.warning("Audit outbox flush on shutdown failed: %s", exc)
+
+
+@app.exception_handler(DBAPIError)
+def statement_timeout_handler(request: Request, exc: DBAPIError):
+    """A statement cancelled by its route's budget is a 503 the client may retry."""
+    if not timeouts.is_query_canceled(exc):
+        raise exc
+    route = request.scope.get("route")
+    timeouts.stats.record(route)
+    logger.warning(
+        "Statement cancelled after %sms budget on %s", timeouts.budget_for(route), timeouts.route_label(route)
+    )
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The request took too long, retry shortly"},
+        headers={"Retry-After": str(settings.STATEMENT_TIMEOUT_RETRY_AFTER_SECONDS)},
+    )
 
 
 # CORS (ok for dev)
@@ -44,7 +107,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-Repeated-Queries"],
 )
+app.add_middleware(QueryStatsMiddleware)
 
 # Routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -56,6 +121,8 @@ app.include_router(provider.router, prefix="/provider", tags=["provider"])
 app.include_router(reports.router, prefix="/reports", tags=["reports"])
 app.include_router(earnings_router, tags=["provider"])
 app.include_router(match.router, tags=["matching"])
+app.include_router(availability.router, tags=["availability"])
+app.include_router(metrics.router, tags=["metrics"])
 
 
 @app.get("/")
@@ -3,10 +3,19 @@ from .user import User
 from .provider import Provider
 from .service import Service
 from .booking import Booking
+from .booking_series import BookingSeries
 from .address import Address
 from .provider_payout_settings import ProviderPayoutSettings
+from .provider_working_hours import ProviderWorkingHours
 from .report import Report
 from .audit_log import AuditLog
+from .audit_outbox import AuditOutbox
+from .idempotency_key import IdempotencyKey
+from .daily_metric import DailyMetric
+from .provider_earning import ProviderEarning
+from .payout_run import PayoutRun
+from .payout_line import PayoutLine
+from .provider_trust_score import ProviderTrustScore
 
 __all__ = [
     "Base",
@@ -14,9 +23,18 @@ __all__ = [
     "Provider",
     "Service",
     "Booking",
+    "BookingSeries",
     "Address",
     "ProviderPayoutSettings",
+    "ProviderWorkingHours",
     "Report",
     "AuditLog",
+    "AuditOutbox",
+    "IdempotencyKey",
+    "DailyMetric",
+    "ProviderEarning",
+    "PayoutRun",
+    "PayoutLine",
+    "ProviderTrustScore",
 ]
 
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class AuditOutbox(Base):
+    """
+    Audit events written inside the business transaction. A background writer
+    (app.core.audit) moves them into ``audit_logs`` in batches.
+    """
+
+    __tablename__ = "audit_outbox"
+
+    id = Column(Integer, primary_key=True)
+    actor_id = Column(Integer, nullable=True)
+    action = Column(String, nullable=False)
+    target_type = Column(String, nullable=False)
+    target_id = Column(Integer, nullable=True)
+    meta = Column("metadata", Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
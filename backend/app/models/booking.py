@@ -1,24 +1,79 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import DDL, Column, DateTime, ForeignKey, Index, Integer, Numeric, Sequence, String, Text, event, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base import Base
 
+# bookings that count as work done: revenue, provider earnings, payouts and
+# trust scores all count these (completed follows accepted, see app.api.booking_state)
+EARNING_STATUSES = ("accepted", "completed")
+
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # keyset pagination for provider schedules and customer history
+        Index("ix_bookings_provider_scheduled_at", "provider_id", "scheduled_at"),
+        Index("ix_bookings_user_created_at", "user_id", "created_at"),
+        # calendar sync: a provider's bookings changed since a token
+        Index("ix_bookings_provider_updated_at", "provider_id", "updated_at"),
+        # trust scoring and earnings reconciliation: counts/sums per provider and status
+        Index("ix_bookings_provider_status", "provider_id", "status", postgresql_include=["price"]),
+        # workload: upcoming active bookings per provider
+        Index(
+            "ix_bookings_active_scheduled_at",
+            "scheduled_at",
+            "provider_id",
+            postgresql_where=text("status IN ('pending', 'accepted')"),
+        ),
+        # analytics windows (last 24h / 30 days)
+        Index("ix_bookings_created_at", "created_at"),
+        # payout runs: payable bookings not yet claimed by a run
+        Index(
+            "ix_bookings_unpaid_scheduled_at",
+            "scheduled_at",
+            postgresql_where=text("payout_run_id IS NULL AND status IN ('accepted', 'completed')"),
+        ),
+        # a provider can't hold two active bookings whose time ranges overlap;
+        # the backing GiST index also serves availability range queries
+        ExcludeConstraint(
+            ("provider_id", "="),
+            (func.tsrange(text("scheduled_at"), text("ends_at")), "&&"),
+            name="ex_bookings_provider_overlap",
+            using="gist",
+            where=text("status IN ('pending', 'accepted') AND ends_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("app_users.id"), nullable=False)
     provider_id = Column(Integer, ForeignKey("providers.id"), nullable=False)
     scheduled_at = Column(DateTime, nullable=False)
+    ends_at = Column(DateTime, nullable=True)  # scheduled_at + service duration
     notes = Column(Text)
     status = Column(String, default="pending")  # pending, accepted, rejected, cancelled, completed
     price = Column(Numeric, nullable=True)  # Price at time of booking
+    series_id = Column(Integer, ForeignKey("booking_series.id"), nullable=True, index=True)
+    # set when a payout run claims the booking (see app.core.payouts)
+    payout_run_id = Column(Integer, ForeignKey("payout_runs.id"), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
+    # bumped by every UPDATE, ORM or Core (calendar sync tokens)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
     service = relationship("Service")
     user = relationship("User")
     provider = relationship("Provider")
+    series = relationship("BookingSeries", back_populates="bookings")
+
+
+# booking event stream ids, drawn at commit (see app.core.events)
+booking_event_ids = Sequence("booking_event_ids", metadata=Base.metadata)
 
+# btree_gist provides the "=" operator class for provider_id in the exclusion constraint
+event.listen(
+    Booking.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist"),
+)
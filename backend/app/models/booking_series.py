@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class BookingSeries(Base):
+    """A recurrence rule whose occurrences were expanded into ``bookings`` up front."""
+
+    __tablename__ = "booking_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("app_users.id"), nullable=False, index=True)
+    provider_id = Column(Integer, ForeignKey("providers.id"), nullable=False)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
+    frequency = Column(String, nullable=False)  # daily, weekly, monthly
+    interval = Column(Integer, nullable=False, default=1)
+    occurrences = Column(Integer, nullable=False)
+    starts_at = Column(DateTime, nullable=False)
+    notes = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+
+    bookings = relationship("Booking", back_populates="series")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Date, Integer, Numeric, SmallInteger
+
+from app.db.base import Base
+
+
+class DailyMetric(Base):
+    """Per-day deltas behind the admin dashboard, split over shards summed on read (see app.core.rollups)."""
+
+    __tablename__ = "daily_metrics"
+
+    day = Column(Date, primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, default=0, server_default="0")
+    users = Column(Integer, nullable=False, default=0, server_default="0")
+    providers = Column(Integer, nullable=False, default=0, server_default="0")
+    services = Column(Integer, nullable=False, default=0, server_default="0")
+    bookings = Column(Integer, nullable=False, default=0, server_default="0")
+    # change in the value of accepted and completed bookings (bookings leaving them subtract)
+    revenue = Column(Numeric, nullable=False, default=0, server_default="0")
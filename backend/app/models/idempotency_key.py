@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    """Stored responses for ``Idempotency-Key`` retries (see app.api.idempotency)."""
+
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path and body
+    status_code = Column(Integer, nullable=True)
+    response = Column(Text, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
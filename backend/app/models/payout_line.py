@@ -0,0 +1,21 @@
+from sqlalchemy import Column, ForeignKey, Integer, Numeric, String
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+
+class PayoutLine(Base):
+    """A provider's total in a payout run, with the destination it is paid to."""
+
+    __tablename__ = "payout_lines"
+
+    run_id = Column(Integer, ForeignKey("payout_runs.id", ondelete="CASCADE"), primary_key=True)
+    provider_id = Column(Integer, ForeignKey("providers.id"), primary_key=True)
+    amount = Column(Numeric, nullable=False)
+    booking_count = Column(Integer, nullable=False)
+    method = Column(String, nullable=False)  # upi, bank
+    # UPI id or bank account number, copied from the payout settings at run time
+    destination = Column(String, nullable=False)
+    bank_ifsc = Column(String, nullable=True)
+
+    run = relationship("PayoutRun", back_populates="lines")
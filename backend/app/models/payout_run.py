@@ -0,0 +1,26 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class PayoutRun(Base):
+    """One payout batch: the bookings it claimed carry its id (see app.core.payouts)."""
+
+    __tablename__ = "payout_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # bookings scheduled in [period_start, period_end)
+    period_start = Column(DateTime, nullable=False)
+    period_end = Column(DateTime, nullable=False)
+    created_by = Column(Integer, ForeignKey("app_users.id", ondelete="SET NULL"), nullable=True)
+    provider_count = Column(Integer, nullable=False, default=0, server_default="0")
+    booking_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_amount = Column(Numeric, nullable=False, default=0, server_default="0")
+    # providers with payable bookings in the window but no payout destination;
+    # their bookings stay unclaimed for a later run
+    skipped_providers = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, server_default=func.now())
+
+    lines = relationship("PayoutLine", back_populates="run", cascade="all, delete-orphan")
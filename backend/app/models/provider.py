@@ -9,7 +9,7 @@ class Provider(Base):
     __tablename__ = "providers"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("app_users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("app_users.id"), nullable=False, index=True)
     business_name = Column(String)
     bio = Column(Text)
     rating = Column(Float, default=0, server_default="0")
@@ -17,6 +17,8 @@ class Provider(Base):
     is_verified = Column("verified", Boolean, default=False, server_default="false")
     is_active = Column(Boolean, default=True, server_default="true")
     is_suspended = Column(Boolean, default=False, server_default="false")
+    # sha256 of the iCal feed key; null until one is issued or after revoking (see app.api.calendar)
+    calendar_feed_hash = Column(String(64), nullable=True, unique=True)
     created_at = Column(DateTime, server_default=func.now())
 
     # backward compatible attribute (legacy code reads provider.verified)
@@ -26,4 +28,5 @@ class Provider(Base):
     services = relationship("Service", back_populates="provider")
     bookings = relationship("Booking", back_populates="provider")
     payout_settings = relationship("ProviderPayoutSettings", back_populates="provider", uselist=False)
+    working_hours = relationship("ProviderWorkingHours", back_populates="provider")
 
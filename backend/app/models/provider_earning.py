@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, Numeric
+
+from app.db.base import Base
+
+
+class ProviderEarning(Base):
+    """
+    Monthly earnings ledger: accepted and completed bookings per provider and
+    month (see app.core.rollups).
+    """
+
+    __tablename__ = "provider_earnings"
+
+    provider_id = Column(Integer, ForeignKey("providers.id", ondelete="CASCADE"), primary_key=True)
+    # first day of the month the bookings are scheduled in
+    month = Column(Date, primary_key=True)
+    amount = Column(Numeric, nullable=False, default=0, server_default="0")
+    booking_count = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+
+from app.db.base import Base
+
+
+class ProviderTrustScore(Base):
+    """Snapshot of the trust leaderboard, rebuilt by app.core.trust.refresh_snapshot."""
+
+    __tablename__ = "provider_trust_scores"
+
+    provider_id = Column(Integer, ForeignKey("providers.id", ondelete="CASCADE"), primary_key=True)
+    trust_score = Column(Float, nullable=False, index=True)
+    accepted_ratio = Column(Float, nullable=False)
+    cancel_ratio = Column(Float, nullable=False)
+    rating_norm = Column(Float, nullable=False)
+    reports_penalty = Column(Float, nullable=False)
+    total_bookings = Column(Integer, nullable=False)
+    reports_count = Column(Integer, nullable=False)
+    computed_at = Column(DateTime, nullable=False)
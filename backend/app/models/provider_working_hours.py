@@ -0,0 +1,17 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, Time
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+
+class ProviderWorkingHours(Base):
+    __tablename__ = "provider_working_hours"
+    __table_args__ = (Index("ix_provider_working_hours_provider_weekday", "provider_id", "weekday"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    provider_id = Column(Integer, ForeignKey("providers.id"), nullable=False)
+    weekday = Column(Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+
+    provider = relationship("Provider", back_populates="working_hours")
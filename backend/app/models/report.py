@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -7,6 +7,10 @@ from app.db.base import Base
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        # reports against a provider/service (trust scoring)
+        Index("ix_reports_target", "target_id", "target_type"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reporter_id = Column(Integer, ForeignKey("app_users.id"), nullable=False)
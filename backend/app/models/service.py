@@ -1,20 +1,32 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, Numeric, String, Text, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from geoalchemy2 import Geography
 
 from app.db.base import Base
+from app.db.types import Geography
 
 
 class Service(Base):
     __tablename__ = "services"
+    __table_args__ = (
+        Index("idx_services_location", "location", postgresql_using="gist"),
+        # search and matching only ever look at approved services
+        Index(
+            "ix_services_location_approved",
+            "location",
+            postgresql_using="gist",
+            postgresql_where=text("approved"),
+        ),
+        Index("ix_services_approved_created_at", "created_at", postgresql_where=text("approved")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    provider_id = Column(Integer, ForeignKey("providers.id"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("providers.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(Text)
     category = Column(String, index=True)
     price = Column(Numeric)
+    duration_minutes = Column(Integer, default=60, server_default="60")
     location = Column(Geography(geometry_type="POINT", srid=4326))
     flagged = Column(Boolean, default=False)
     flag_reason = Column(Text, nullable=True)
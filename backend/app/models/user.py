@@ -15,6 +15,8 @@ class User(Base):
     name = Column(String, nullable=True)
     role = Column(String, default="user", nullable=False)
     is_active = Column(Boolean, default=True)
+    # bumped to revoke every token issued so far (see app.core.revocation)
+    token_epoch = Column(Integer, nullable=False, default=0, server_default="0")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, field_validator, Field
-from typing import Optional, List
-from datetime import datetime
+from typing import Literal, Optional, List
+from datetime import date, datetime, time
 import re
 
 class UserCreate(BaseModel):
@@ -38,6 +38,7 @@ class ServiceCreate(BaseModel):
     price: float
     lat: Optional[float]
     lon: Optional[float]
+    duration_minutes: Optional[int] = Field(default=None, gt=0, le=24 * 60)
 
     @field_validator("price")
     @classmethod
@@ -58,6 +59,7 @@ class ServiceOut(BaseModel):
     flagged: Optional[bool] = False
     flag_reason: Optional[str] = None
     approved: Optional[bool] = True
+    duration_minutes: Optional[int] = None
     created_at: Optional[str]
 
     class Config:
@@ -98,8 +100,10 @@ class BookingOut(BaseModel):
     user_id: int
     provider_id: int
     scheduled_at: datetime
+    ends_at: Optional[datetime] = None
     notes: Optional[str]
     status: str
+    series_id: Optional[int] = None
     service: Optional[ServiceOut]
     created_at: Optional[str]
 
@@ -107,10 +111,57 @@ class BookingOut(BaseModel):
         from_attributes = True
 
 
+class BookingSeriesCreate(BaseModel):
+    service_id: int
+    provider_id: Optional[int] = Field(default=None, description="Optional override; must own the service")
+    starts_at: datetime = Field(validation_alias="when", description="First occurrence")
+    frequency: Literal["daily", "weekly", "monthly"]
+    interval: int = Field(default=1, ge=1, le=12, description="Every N days/weeks/months")
+    occurrences: int = Field(ge=1, le=104)
+    notes: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+
+
+class BookingSeriesOut(BaseModel):
+    id: int
+    service_id: int
+    provider_id: int
+    frequency: str
+    interval: int
+    occurrences: int
+    starts_at: datetime
+    bookings: List[BookingOut]
+
+
 class BookingStatusUpdate(BaseModel):
     status: str
 
 
+class BookingTransitionItem(BaseModel):
+    booking_id: int
+    action: str  # accept, reject, complete
+
+
+class BulkTransitionRequest(BaseModel):
+    items: List[BookingTransitionItem] = Field(min_length=1, max_length=200)
+
+
+class BulkTransitionResult(BaseModel):
+    booking_id: int
+    action: str
+    ok: bool
+    status: Optional[str] = None  # new status on success, current status on conflict
+    detail: Optional[str] = None
+
+
+class BulkTransitionResponse(BaseModel):
+    items: List[BulkTransitionResult]
+    succeeded: int
+    failed: int
+
+
 # ========== USER DASHBOARD SCHEMAS ==========
 
 class AddressCreate(BaseModel):
@@ -155,11 +206,65 @@ class ProviderCalendarEvent(BaseModel):
     id: int
     service_title: str
     when_at: str
+    ends_at: Optional[str] = None
     status: str
     user_name: Optional[str]
     notes: Optional[str]
 
 
+class ProviderCalendarSync(BaseModel):
+    events: List[ProviderCalendarEvent]
+    # pass back as ?token= for the next page (has_more) or the next sync
+    sync_token: str
+    has_more: bool
+
+
+class CalendarFeedOut(BaseModel):
+    # shown once: only a hash of the key is stored
+    url: str
+    key: str
+
+
+class StreamTicketOut(BaseModel):
+    # for GET /bookings/events?ticket=..., which EventSource can't send headers to
+    ticket: str
+    expires_in: int
+
+
+class WorkingHoursIn(BaseModel):
+    weekday: int = Field(ge=0, le=6, description="0 = Monday")
+    start_time: time
+    end_time: time
+
+    @field_validator("end_time")
+    @classmethod
+    def end_after_start(cls, v, info):
+        start = info.data.get("start_time")
+        if start is not None and v <= start:
+            raise ValueError("end_time must be after start_time")
+        return v
+
+
+class WorkingHoursOut(WorkingHoursIn):
+    id: int
+    provider_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class AvailabilitySlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class ProviderSlotsOut(BaseModel):
+    provider_id: int
+    date: date
+    duration_minutes: int
+    slots: List[AvailabilitySlot]
+
+
 class PayoutSettingsCreate(BaseModel):
     upi_id: Optional[str] = None
     bank_acc_no: Optional[str] = None
@@ -179,6 +284,27 @@ class PayoutSettingsOut(BaseModel):
         from_attributes = True
 
 
+class PayoutRunCreate(BaseModel):
+    # bookings scheduled in [period_start, period_end)
+    period_start: datetime
+    period_end: datetime
+
+
+class PayoutRunOut(BaseModel):
+    id: int
+    period_start: datetime
+    period_end: datetime
+    created_by: Optional[int]
+    provider_count: int
+    booking_count: int
+    total_amount: float
+    skipped_providers: int
+    created_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
 # ========== ADMIN SCHEMAS ==========
 
 class UserUpdate(BaseModel):
@@ -284,3 +410,11 @@ class TrustScoreOut(BaseModel):
     reports_penalty: float
     total_bookings: int
     reports_count: int
+
+
+class TrustLeaderboardResponse(BaseModel):
+    items: List[TrustScoreOut]
+    total: int
+    page: int
+    page_size: int
+    computed_at: Optional[datetime] = None  # snapshot time; None when scored live
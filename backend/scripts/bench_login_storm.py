@@ -0,0 +1,99 @@
+"""
+Login storm benchmark: login throughput and the latency of other requests
+while logins are hashing.
+
+Start the API, then run:
+    python scripts/bench_login_storm.py --base-url http://localhost:8000
+
+Compare PASSWORD_HASH_WORKERS=0 (hash in the threadpool) against the default
+process pool; the probe percentiles are the interesting part. Pass
+--admin-token to also print the hashing pool metrics (admin only).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def _pct(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _login_worker(client, email, password, remaining, latencies):
+    while remaining:
+        remaining.pop()
+        started = time.perf_counter()
+        res = await client.post("/auth/login", json={"email": email, "password": password, "name": ""})
+        res.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def _probe(client, path, stop, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def main(args):
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    password = "bench-pass-1234"
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        res = await client.post("/auth/register", json={"email": email, "password": password, "name": "Bench"})
+        res.raise_for_status()
+
+        baseline = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, args.probe_path, stop, baseline))
+        await asyncio.sleep(2)
+        stop.set()
+        await probe
+
+        login_ms, during = [], []
+        remaining = list(range(args.logins))
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, args.probe_path, stop, during))
+        started = time.perf_counter()
+        await asyncio.gather(
+            *[_login_worker(client, email, password, remaining, login_ms) for _ in range(args.concurrency)]
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+        hashing = None
+        if args.admin_token:
+            res = await client.get(
+                "/metrics/password-hashing", headers={"Authorization": f"Bearer {args.admin_token}"}
+            )
+            hashing = res.json()
+
+    print(f"logins: {len(login_ms)} in {elapsed:.2f}s -> {len(login_ms) / elapsed:.1f}/s")
+    print(
+        f"login latency ms: p50={statistics.median(login_ms):.1f} "
+        f"p95={_pct(login_ms, 95):.1f} p99={_pct(login_ms, 99):.1f}"
+    )
+    for label, values in (("idle", baseline), ("storm", during)):
+        print(
+            f"{args.probe_path} {label} ms: p50={_pct(values, 50):.1f} "
+            f"p95={_pct(values, 95):.1f} p99={_pct(values, 99):.1f} (n={len(values)})"
+        )
+    if hashing is not None:
+        print(f"hashing pool: {hashing}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--probe-path", default="/services/")
+    parser.add_argument("--admin-token", help="bearer token for /metrics/password-hashing")
+    asyncio.run(main(parser.parse_args()))
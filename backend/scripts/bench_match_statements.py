@@ -0,0 +1,120 @@
+"""
+Statement preparation microbenchmark for /match/providers.
+
+Measures the CPU a request spends turning its queries into SQL, without a
+database: building the ORM constructs, generating their cache keys and
+fetching the compiled form from a compiled cache, exactly as
+``Connection.execute`` does. "per-request" rebuilds the candidate query and
+five trust-score queries per candidate on every call (the previous handler);
+"pre-built" executes the statements from ``app.api.match_queries``.
+
+    DATABASE_URL=postgresql://... python scripts/bench_match_statements.py --candidates 20
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql import psycopg2
+from sqlalchemy.util import LRUCache
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.api import availability, match_queries  # noqa: E402
+from app.models import Booking, Provider, Report, Service  # noqa: E402
+
+DIALECT = psycopg2.dialect()
+
+
+def _prepare(stmt, cache):
+    compiled, *_ = stmt._compile_w_cache(DIALECT, compiled_cache=cache, column_keys=[])
+    return compiled
+
+
+def per_request(cache, candidates, with_availability):
+    user_point = func.ST_SetSRID(func.ST_MakePoint(77.59, 12.97), 4326)
+    workload = (
+        select(Booking.provider_id.label("provider_id"), func.count(Booking.id).label("active_bookings"))
+        .where(Booking.status.in_({"pending", "accepted"}), Booking.scheduled_at >= func.now())
+        .group_by(Booking.provider_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Service.id.label("service_id"),
+            Service.provider_id.label("provider_id"),
+            func.ST_Distance(Service.location, user_point).label("distance_m"),
+            Provider.rating.label("rating"),
+            func.coalesce(workload.c.active_bookings, 0).label("active_bookings"),
+        )
+        .join(Provider, Provider.id == Service.provider_id)
+        .outerjoin(workload, workload.c.provider_id == Provider.id)
+        .where(
+            Service.category == "cleaning",
+            Service.location.isnot(None),
+            Service.approved == True,  # noqa: E712
+            Provider.is_active == True,  # noqa: E712
+            Provider.is_verified == True,  # noqa: E712
+            Provider.is_suspended == False,  # noqa: E712
+            func.ST_DWithin(Service.location, user_point, 5000.0),
+        )
+    )
+    if with_availability:
+        start, end = datetime(2030, 1, 1, 10), datetime(2030, 1, 1, 11)
+        stmt = stmt.where(
+            ~exists().where(availability.overlapping_bookings(Provider.id, start, end)),
+            availability.within_working_hours(Provider.id, start, end),
+        )
+    _prepare(stmt, cache)
+    for provider_id in range(candidates):
+        _prepare(select(func.count(Booking.id)).where(Booking.provider_id == provider_id), cache)
+        for status in ("accepted", "cancelled"):
+            _prepare(
+                select(func.count(Booking.id)).where(Booking.provider_id == provider_id, Booking.status == status),
+                cache,
+            )
+        _prepare(select(Provider).where(Provider.id == provider_id).limit(1), cache)
+        _prepare(
+            select(func.count(Report.id)).where(
+                Report.target_id == provider_id,
+                func.coalesce(Report.target_type, Report.report_type) == "provider",
+            ),
+            cache,
+        )
+
+
+def pre_built(cache, candidates, with_availability):
+    stmt = match_queries.CANDIDATES_AVAILABLE if with_availability else match_queries.CANDIDATES
+    _prepare(stmt, cache)
+    if candidates:
+        _prepare(match_queries.TRUST_INPUTS, cache)
+
+
+def _bench(fn, args, iterations):
+    cache = LRUCache(500)
+    fn(cache, args.candidates, args.availability)  # warm the compiled cache
+    started = time.process_time()
+    for _ in range(iterations):
+        fn(cache, args.candidates, args.availability)
+    return (time.process_time() - started) / iterations * 1e6
+
+
+def main(args):
+    results = {
+        name: _bench(fn, args, args.iterations)
+        for name, fn in (("per-request", per_request), ("pre-built", pre_built))
+    }
+    for name, us in results.items():
+        print(f"{name:>12}: {us:8.1f} us CPU per request")
+    saved = results["per-request"] - results["pre-built"]
+    print(f"{'saved':>12}: {saved:8.1f} us per request ({saved / results['per-request']:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--availability", action="store_true", help="include the available_at filters")
+    main(parser.parse_args())
@@ -0,0 +1,56 @@
+"""
+Startup benchmark: time from process start to the first successful request.
+
+Each run spawns a fresh uvicorn for the given SCHEMA_STARTUP_MODE and polls
+``GET /`` until it answers. Needs a reachable DATABASE_URL; run from backend/:
+    python scripts/bench_startup.py --modes create_all check --runs 5
+
+For "check" the database must already be at head (``alembic upgrade head``).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def _time_to_first_request(mode: str, port: int, timeout: float) -> float:
+    env = dict(os.environ, SCHEMA_STARTUP_MODE=mode)
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"{mode}: no response within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(args):
+    for mode in args.modes:
+        samples = [_time_to_first_request(mode, args.port, args.timeout) for _ in range(args.runs)]
+        print(
+            f"{mode}: median={statistics.median(samples) * 1000:.0f}ms "
+            f"min={min(samples) * 1000:.0f}ms max={max(samples) * 1000:.0f}ms (n={len(samples)})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["create_all", "check"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60)
+    main(parser.parse_args())
@@ -0,0 +1,83 @@
+"""
+Payout runs from the command line (no statement budget, for large windows).
+
+Run from backend/ with DATABASE_URL set:
+    python scripts/payouts.py run --start 2030-01-01 --end 2030-02-01 --format csv --output jan.csv
+    python scripts/payouts.py export 12 --format ndjson > run-12.ndjson
+
+run claims the window's unpaid accepted/completed bookings into a new run and
+writes its payout file; rerunning a window only pays bookings not yet claimed.
+export rewrites the file of an earlier run.
+"""
+import argparse
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.core import exports, payouts  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+
+
+@contextmanager
+def _output(path):
+    if not path or path == "-":
+        yield sys.stdout
+        return
+    with open(path, "w", newline="") as out:
+        yield out
+
+
+def _export(db, run_id, args) -> None:
+    with _output(args.output) as out:
+        for chunk in payouts.export_lines(db, run_id, args.format):
+            out.write(chunk)
+
+
+def run(args) -> None:
+    if args.end <= args.start:
+        sys.exit("--end must be after --start")
+    db = SessionLocal()
+    try:
+        payout_run = payouts.create_run(db, args.start, args.end)
+        db.commit()
+        print(
+            f"payout run {payout_run.id}: {payout_run.provider_count} providers, "
+            f"{payout_run.booking_count} bookings, {payout_run.total_amount} total, "
+            f"{payout_run.skipped_providers} providers skipped (no payout destination)",
+            file=sys.stderr,
+        )
+        _export(db, payout_run.id, args)
+    finally:
+        db.close()
+
+
+def export(args) -> None:
+    db = SessionLocal()
+    try:
+        _export(db, args.run_id, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="create a payout run and write its file")
+    run_parser.add_argument("--start", type=datetime.fromisoformat, required=True)
+    run_parser.add_argument("--end", type=datetime.fromisoformat, required=True, help="exclusive")
+    run_parser.set_defaults(handler=run)
+
+    export_parser = commands.add_parser("export", help="write the file of an existing run")
+    export_parser.add_argument("run_id", type=int)
+    export_parser.set_defaults(handler=export)
+
+    for sub in (run_parser, export_parser):
+        sub.add_argument("--format", choices=exports.FORMATS, default="csv")
+        sub.add_argument("--output", help="file to write (default: stdout)")
+
+    args = parser.parse_args()
+    args.handler(args)
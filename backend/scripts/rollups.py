@@ -0,0 +1,89 @@
+"""
+Maintenance commands for the rollup tables.
+
+Run from backend/ with DATABASE_URL set:
+    python scripts/rollups.py backfill-daily-metrics
+    python scripts/rollups.py backfill-earnings
+    python scripts/rollups.py reconcile-earnings [--fix]
+    python scripts/rollups.py refresh-trust-snapshot
+    python scripts/rollups.py sweep-idempotency-keys
+
+reconcile-earnings lists ledger rows that disagree with the bookings table and
+exits non-zero when there are any; --fix rewrites them.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.api import idempotency  # noqa: E402
+from app.core import rollups, trust  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+
+
+def backfill_daily_metrics(args) -> None:
+    db = SessionLocal()
+    try:
+        days = rollups.backfill(db)
+    finally:
+        db.close()
+    print(f"daily_metrics rebuilt: {days} days")
+
+
+def backfill_earnings(args) -> None:
+    db = SessionLocal()
+    try:
+        rows = rollups.backfill_earnings(db)
+    finally:
+        db.close()
+    print(f"provider_earnings rebuilt: {rows} rows")
+
+
+def reconcile_earnings(args) -> None:
+    db = SessionLocal()
+    try:
+        drift = rollups.reconcile_earnings(db, fix=args.fix)
+    finally:
+        db.close()
+    for row in drift:
+        print(
+            f"provider {row.provider_id} {row.month:%Y-%m}: ledger {row.ledger_amount} ({row.ledger_count}), "
+            f"bookings {row.amount} ({row.booking_count})"
+        )
+    if not drift:
+        print("provider_earnings matches bookings")
+    elif args.fix:
+        print(f"provider_earnings: {len(drift)} rows rewritten")
+    else:
+        sys.exit(1)
+
+
+def refresh_trust_snapshot(args) -> None:
+    db = SessionLocal()
+    try:
+        rows = trust.refresh_snapshot(db, wait=True)
+    finally:
+        db.close()
+    print(f"provider_trust_scores rebuilt: {rows} providers")
+
+
+def sweep_idempotency_keys(args) -> None:
+    print(f"idempotency_keys swept: {idempotency.sweep_expired()} expired keys")
+
+
+COMMANDS = {
+    "backfill-daily-metrics": backfill_daily_metrics,
+    "backfill-earnings": backfill_earnings,
+    "reconcile-earnings": reconcile_earnings,
+    "refresh-trust-snapshot": refresh_trust_snapshot,
+    "sweep-idempotency-keys": sweep_idempotency_keys,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--fix", action="store_true", help="reconcile-earnings: rewrite drifted rows")
+    args = parser.parse_args()
+    COMMANDS[args.command](args)
@@ -13,8 +13,6 @@ from app.db.session import SessionLocal
 from app.models import User, Provider, Service
 from app import crud, schemas
 from passlib.context import CryptContext
-from geoalchemy2.shape import from_shape
-from shapely.geometry import Point
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
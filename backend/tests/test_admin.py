@@ -0,0 +1,255 @@
+import csv
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func
+
+from app.api import admin as admin_api, match_queries
+from app.core import rollups, trust
+from app.db.session import SessionLocal
+from app.models import Booking, DailyMetric, PayoutRun, ProviderPayoutSettings
+
+
+def _set_statuses(db, provider_id, *statuses):
+    bookings = db.query(Booking).filter(Booking.provider_id == provider_id).order_by(Booking.id).all()
+    for booking, status in zip(bookings, statuses):
+        booking.status = status
+    db.commit()
+
+
+def test_daily_metrics_follow_writes_and_status_changes(client, accounts, create_service):
+    def _today():
+        db = SessionLocal()
+        try:
+            # summed over the day's shards
+            row = (
+                db.query(*(func.coalesce(func.sum(getattr(DailyMetric, f)), 0) for f in rollups.FIELDS))
+                .filter(DailyMetric.day == datetime.utcnow().date())
+                .one()
+            )
+            return (*row[:4], float(row[4]))
+        finally:
+            db.close()
+
+    before = _today()
+    provider, customer = accounts("provider"), accounts("customer")
+    service = create_service(provider)
+    res = client.post(
+        "/bookings/", json={"service_id": service["id"], "when": "2030-01-01T10:00"}, headers=customer.headers
+    )
+    assert res.status_code == 201
+    booking_id = res.json()["id"]
+    res = client.put(f"/provider/provider/bookings/{booking_id}/accept", headers=provider.headers)
+    assert res.status_code == 200
+
+    users, providers, services_, bookings, revenue = (a - b for a, b in zip(_today(), before))
+    assert (users, providers, services_, bookings) == (2, 1, 1, 1)
+    assert revenue == float(service["price"])
+
+    # completing keeps the revenue; cancelling takes it back out
+    res = client.put(f"/provider/provider/bookings/{booking_id}/complete", headers=provider.headers)
+    assert res.status_code == 200
+    assert _today()[4] - before[4] == float(service["price"])
+    res = client.post(
+        "/bookings/", json={"service_id": service["id"], "when": "2030-01-02T10:00"}, headers=customer.headers
+    )
+    other_id = res.json()["id"]
+    assert client.put(f"/provider/provider/bookings/{other_id}/accept", headers=provider.headers).status_code == 200
+    assert _today()[4] - before[4] == 2 * float(service["price"])
+    assert client.put(f"/bookings/{other_id}/cancel", headers=customer.headers).status_code == 200
+    assert _today()[4] - before[4] == float(service["price"])
+
+
+def test_payout_runs_pay_each_booking_once(client, admin, provider, customer, create_service):
+    db = SessionLocal()
+    try:
+        db.add(ProviderPayoutSettings(provider_id=provider.provider_id, upi_id="prov@upi"))
+        db.commit()
+    finally:
+        db.close()
+    service = create_service(provider)
+    run_ids = []
+
+    def book_and_accept(when):
+        res = client.post("/bookings/", json={"service_id": service["id"], "when": when}, headers=customer.headers)
+        assert res.status_code == 201
+        res = client.put(f"/provider/provider/bookings/{res.json()['id']}/accept", headers=provider.headers)
+        assert res.status_code == 200
+
+    def run_and_export():
+        res = client.post(
+            "/admin/payout-runs",
+            json={"period_start": "2030-01-01T00:00:00", "period_end": "2030-02-01T00:00:00"},
+            headers=admin.headers,
+        )
+        assert res.status_code == 201
+        run_ids.append(res.json()["id"])
+        res = client.get(f"/admin/payout-runs/{run_ids[-1]}/export?format=csv", headers=admin.headers)
+        assert res.status_code == 200 and res.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(res.text.splitlines()))
+        return [row for row in rows if row["provider_id"] == str(provider.provider_id)]
+
+    try:
+        book_and_accept("2030-01-01T10:00")
+        book_and_accept("2030-01-02T10:00")
+        res = client.post(
+            "/bookings/", json={"service_id": service["id"], "when": "2030-01-03T10:00"}, headers=customer.headers
+        )
+        assert res.status_code == 201  # still pending: not payable
+
+        [line] = run_and_export()
+        assert (line["method"], line["destination"]) == ("upi", "prov@upi")
+        assert (float(line["amount"]), line["booking_count"]) == (1000.0, "2")
+
+        # a rerun of the same window only pays what was accepted since
+        assert run_and_export() == []
+        book_and_accept("2030-01-04T10:00")
+        [line] = run_and_export()
+        assert (float(line["amount"]), line["booking_count"]) == (500.0, "1")
+    finally:
+        db = SessionLocal()
+        try:
+            if run_ids:
+                db.query(Booking).filter(Booking.payout_run_id.in_(run_ids)).update(
+                    {"payout_run_id": None}, synchronize_session=False
+                )
+                db.query(PayoutRun).filter(PayoutRun.id.in_(run_ids)).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+def test_admin_lists_paginate_and_exports_stream(client, admin, provider, create_service):
+    category = f"export-{uuid.uuid4().hex[:8]}"
+    service_ids = [
+        create_service(provider, title=f"Export {i}", category=category, price=100 + i)["id"] for i in range(3)
+    ]
+
+    res = client.get("/admin/services", params={"category": category, "limit": 2}, headers=admin.headers)
+    assert res.status_code == 200
+    assert [s["id"] for s in res.json()] == service_ids[:0:-1]
+    cursor = res.headers["X-Next-Cursor"]
+    res = client.get(
+        "/admin/services", params={"category": category, "limit": 2, "cursor": cursor}, headers=admin.headers
+    )
+    assert [s["id"] for s in res.json()] == service_ids[:1]
+    assert "X-Next-Cursor" not in res.headers
+    assert client.get("/admin/services", params={"limit": 1000}, headers=admin.headers).status_code == 422
+
+    res = client.get("/admin/exports/services", params={"category": category}, headers=admin.headers)
+    assert res.status_code == 200 and res.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(res.text.splitlines()))
+    assert [int(r["id"]) for r in rows] == service_ids
+    assert rows[0]["title"] == "Export 0" and float(rows[0]["lat"]) == 12.9
+
+    res = client.get(
+        "/admin/exports/services", params={"category": category, "format": "ndjson"}, headers=admin.headers
+    )
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [float(line["price"]) for line in lines] == [100, 101, 102]
+    assert client.get("/admin/exports/services", headers=provider.headers).status_code == 403
+
+
+def test_report_list_and_export_share_the_status_filter(client, admin, customer, service):
+    ids = []
+    for reason in ("spam", "rude"):
+        res = client.post(
+            "/reports/",
+            json={"report_type": "service", "target_id": service["id"], "reason": reason},
+            headers=customer.headers,
+        )
+        assert res.status_code == 201
+        ids.append(res.json()["id"])
+    res = client.put(f"/admin/reports/{ids[0]}/resolve", json={"status": "resolved"}, headers=admin.headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "resolved"
+
+    listed = client.get("/admin/reports", params={"status": "resolved"}, headers=admin.headers).json()
+    exported = client.get(
+        "/admin/exports/reports", params={"status": "resolved", "format": "ndjson"}, headers=admin.headers
+    )
+    exported = [json.loads(line) for line in exported.text.splitlines()]
+    assert [r["id"] for r in listed if r["id"] in ids] == [ids[0]]
+    assert [r["id"] for r in exported if r["id"] in ids] == [ids[0]]
+
+
+def test_batched_trust_inputs_match_per_provider_scores(client, customer, service, add_bookings, count_queries):
+    add_bookings(customer, service, 4)
+    # target_type decides what was reported; the legacy report_type only fills in
+    for target_type in ("provider", "service"):
+        res = client.post(
+            "/reports/",
+            json={
+                "report_type": "provider",
+                "target_type": target_type,
+                "target_id": service["provider_id"],
+                "reason": "no show",
+            },
+            headers=customer.headers,
+        )
+        assert res.status_code == 201
+    db = SessionLocal()
+    try:
+        _set_statuses(db, service["provider_id"], "accepted", "completed", "cancelled")
+
+        with count_queries() as statements:
+            inputs = match_queries.trust_inputs(db, [service["provider_id"], 0])
+        assert len(statements) == 1
+        expected = admin_api._compute_trust_score(db, service["provider_id"])
+        got = inputs[service["provider_id"]]
+        assert got.total == expected.total_bookings == 4
+        assert got.accepted == 2
+        assert got.reports == expected.reports_count == 1
+        assert round(got.score, 4) == expected.trust_score
+        assert 0 not in inputs
+    finally:
+        db.close()
+
+
+def test_trust_leaderboard_ranks_in_one_query(client, admin, customer, service, add_bookings, count_queries):
+    add_bookings(customer, service, 4)
+    db = SessionLocal()
+    try:
+        _set_statuses(db, service["provider_id"], "accepted", "completed", "cancelled")
+
+        with count_queries() as statements:
+            rows, total, computed_at = trust.leaderboard(db, min_bookings=4, page_size=200)
+        assert len(statements) == 1
+        assert computed_at is None and total >= 1
+        scores = [row.trust_score for row in rows]
+        assert scores == sorted(scores, reverse=True)
+        expected = admin_api._compute_trust_score(db, service["provider_id"])
+        assert expected.total_bookings == 4
+        # completed jobs count as accepted
+        assert expected.accepted_ratio == 0.5 and expected.cancel_ratio == 0.25
+        assert admin_api._compute_trust_score(db, 0) is None
+
+        # a page past the end still reports how many providers match
+        past_end, past_total, _ = trust.leaderboard(db, min_bookings=4, page=total + 1, page_size=1)
+        assert past_end == [] and past_total == total
+
+        assert trust.refresh_snapshot(db, wait=True) >= 1
+    finally:
+        db.close()
+
+    res = client.get(
+        "/admin/providers/trust", params={"sort": "total_bookings", "page_size": 5}, headers=admin.headers
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert body["computed_at"] is None and len(body["items"]) <= 5
+    counts = [item["total_bookings"] for item in body["items"]]
+    assert counts == sorted(counts, reverse=True)
+
+    res = client.get(
+        "/admin/providers/trust", params={"snapshot": True, "min_bookings": 4, "page_size": 200}, headers=admin.headers
+    )
+    body = res.json()
+    assert body["computed_at"] is not None
+    assert expected.model_dump() in body["items"]
+    assert client.get("/admin/providers/trust", params={"sort": "name"}, headers=admin.headers).status_code == 422
+    assert client.get(f"/admin/providers/{service['provider_id']}/trust", headers=admin.headers).json() == (
+        expected.model_dump()
+    )
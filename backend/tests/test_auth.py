@@ -0,0 +1,66 @@
+from app.core import principals, security
+from app.db.session import SessionLocal
+from app.models import User
+
+
+def test_principal_cache_skips_user_lookup_until_invalidated(client, admin, customer, count_queries):
+    try:
+        assert client.get("/bookings/", headers=customer.headers).status_code == 200
+        with count_queries() as statements:
+            assert client.get("/bookings/", headers=customer.headers).status_code == 200
+        assert not [s for s in statements if "FROM app_users" in s]
+
+        res = client.delete(f"/admin/users/{customer.user_id}", headers=admin.headers)
+        assert res.status_code == 200
+        assert client.get("/bookings/", headers=customer.headers).status_code == 401
+        res = client.post("/auth/login", json={"email": customer.email, "password": "pass1234", "name": ""})
+        assert res.status_code == 403
+    finally:
+        principals.cache.clear()
+
+
+def test_login_rehashes_passwords_with_an_outdated_cost(client, accounts, admin, customer):
+    db = SessionLocal()
+    try:
+        user = db.get(User, customer.user_id)
+        user.hashed_password = security.hash_password("pass1234", rounds=1000)
+        db.commit()
+    finally:
+        db.close()
+
+    accounts.login(customer.email)
+    assert client.post(
+        "/auth/login", json={"email": customer.email, "password": "wrong", "name": ""}
+    ).status_code == 401
+
+    db = SessionLocal()
+    try:
+        stored = db.query(User.hashed_password).filter(User.id == customer.user_id).scalar()
+    finally:
+        db.close()
+    assert f"${security.hasher.rounds}$" in stored
+    assert security.verify_password("pass1234", stored) == (True, None)
+    assert client.get("/metrics/password-hashing", headers=admin.headers).json()["completed"] >= 3
+
+
+def test_tokens_authorize_from_claims_until_revoked(client, accounts, admin, provider, customer, count_queries):
+    principals.cache.clear()
+
+    with count_queries() as statements:
+        assert client.get("/provider/provider/bookings", headers=provider.headers).status_code == 200
+    assert not [s for s in statements if "FROM app_users" in s or "FROM providers" in s]
+    # customers and admins too
+    with count_queries() as statements:
+        assert client.get("/bookings/", headers=customer.headers).status_code == 200
+        assert client.get("/metrics/password-hashing", headers=admin.headers).status_code == 200
+    assert not [s for s in statements if "FROM app_users" in s]
+
+    res = client.put(f"/admin/users/{provider.user_id}", json={"role": "user"}, headers=admin.headers)
+    assert res.status_code == 200
+    res = client.get("/provider/provider/bookings", headers=provider.headers)
+    assert res.status_code == 401
+    assert res.json()["detail"] == "Token has been revoked"
+
+    # a fresh login carries the new epoch and role
+    headers = {"Authorization": f"Bearer {accounts.login(provider.email)}"}
+    assert client.get("/provider/provider/bookings", headers=headers).status_code == 403
@@ -1,14 +1,23 @@
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 
+import pytest
 from fastapi.testclient import TestClient
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from app.main import app  # noqa: E402
+from app.api import idempotency  # noqa: E402
+from app.core.audit import writer as audit_writer  # noqa: E402
 from app.db.session import SessionLocal  # noqa: E402
-from app.models import Booking, Service, User  # noqa: E402
+from app.models import AuditLog, AuditOutbox, Booking, IdempotencyKey, Service, User  # noqa: E402
+
+# test_booking_happy_path manages its own accounts; the tests after it use the
+# fixtures in conftest.py
+pytestmark = pytest.mark.usefixtures("database")
 
 client = TestClient(app)
 
@@ -78,6 +87,8 @@ def test_booking_happy_path():
         )
         assert svc_res.status_code == 200
         service_id = svc_res.json()["id"]
+        # creating the provider profile revoked the token issued without it
+        provider_token = _login(provider_email)
 
         # create booking as consumer
         booking_res = client.post(
@@ -120,3 +131,351 @@ def test_booking_happy_path():
     finally:
         _cleanup_users([provider_email, user_email])
 
+
+def _book(client, account, service, when, **fields):
+    return client.post(
+        "/bookings/", json={"service_id": service["id"], "when": when, **fields}, headers=account.headers
+    )
+
+
+def test_booking_lists_use_constant_query_count(client, provider, customer, service, add_bookings, count_queries):
+    def _query_counts():
+        counts = {}
+        for path, account in (("/bookings/", customer), ("/bookings/provider/", provider)):
+            with count_queries() as statements:
+                res = client.get(path, headers=account.headers)
+            assert res.status_code == 200
+            counts[path] = (len(statements), len(res.json()))
+        return counts
+
+    add_bookings(customer, service, 1)
+    small = _query_counts()
+    add_bookings(customer, service, 9)
+    large = _query_counts()
+
+    for path in small:
+        assert small[path][1] == 1
+        assert large[path][1] == 10
+        assert small[path][0] == large[path][0]
+
+    # the joined hydration still carries service coordinates
+    first = client.get("/bookings/", headers=customer.headers).json()[0]["service"]
+    assert first["id"] == service["id"]
+    assert first["lat"] == service["lat"]
+    assert first["lon"] == service["lon"]
+
+
+def test_booking_lists_are_cursor_paginated(client, provider, customer, service, add_bookings):
+    add_bookings(customer, service, 5)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get("/bookings/provider/", params=params, headers=provider.headers)
+        assert res.status_code == 200
+        assert len(res.json()) <= 2
+        seen.extend(res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len({b["id"] for b in seen}) == 5
+    assert [b["scheduled_at"] for b in seen] == sorted(b["scheduled_at"] for b in seen)
+
+    # date window + status filter
+    res = client.get(
+        "/bookings/provider/",
+        params={"start_date": "2030-01-01T11:00", "end_date": "2030-01-01T12:00", "status": "pending"},
+        headers=provider.headers,
+    )
+    assert res.status_code == 200
+    assert len(res.json()) == 2
+    res = client.get("/bookings/provider/", params={"status": "accepted"}, headers=provider.headers)
+    assert res.json() == []
+
+    res = client.get("/bookings/provider/", params={"cursor": "garbage"}, headers=provider.headers)
+    assert res.status_code == 400
+
+
+def test_provider_lists_default_to_upcoming_bookings(client, provider, customer, service, add_bookings):
+    add_bookings(customer, service, 2)
+    db = SessionLocal()
+    try:
+        past = Booking(
+            service_id=service["id"],
+            provider_id=service["provider_id"],
+            user_id=customer.user_id,
+            scheduled_at=datetime(2020, 1, 1, 10, 0),
+            status="pending",
+        )
+        db.add(past)
+        db.commit()
+        past_id = past.id
+    finally:
+        db.close()
+
+    for path in ("/bookings/provider/", "/provider/calendar"):
+        upcoming = client.get(path, headers=provider.headers).json()
+        assert len(upcoming) == 2 and past_id not in [b["id"] for b in upcoming]
+        history = client.get(path, params={"start_date": "2019-01-01T00:00"}, headers=provider.headers).json()
+        assert history[0]["id"] == past_id and len(history) == 3
+
+
+def test_audit_events_commit_with_booking_and_relay_in_batches(client, customer, service):
+    res = _book(client, customer, service, "2030-01-01T10:00")
+    assert res.status_code == 201
+    booking_id = res.json()["id"]
+
+    db = SessionLocal()
+    try:
+        staged = (
+            db.query(AuditOutbox)
+            .filter(AuditOutbox.target_type == "booking", AuditOutbox.target_id == booking_id)
+            .all()
+        )
+        assert [e.action for e in staged] == ["booking_created"]
+
+        audit_writer.flush()
+
+        assert (
+            db.query(AuditOutbox)
+            .filter(AuditOutbox.target_type == "booking", AuditOutbox.target_id == booking_id)
+            .count()
+            == 0
+        )
+        logged = (
+            db.query(AuditLog)
+            .filter(AuditLog.target_type == "booking", AuditLog.target_id == booking_id)
+            .all()
+        )
+        assert [e.action for e in logged] == ["booking_created"]
+    finally:
+        db.close()
+
+
+def test_idempotency_key_replays_and_collapses_duplicates(client, provider, customer, service):
+    payload = {"service_id": service["id"], "when": "2030-01-01T10:00"}
+
+    def _post(key, body=payload):
+        return client.post("/bookings/", json=body, headers={**customer.headers, "Idempotency-Key": key})
+
+    first = _post("create-1")
+    retry = _post("create-1")
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers.get("Idempotent-Replayed") == "true"
+
+    mismatch = _post("create-1", {**payload, "notes": "different"})
+    assert mismatch.status_code == 422
+
+    later = {**payload, "when": "2030-01-02T10:00"}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: _post("create-2", later), range(8)))
+    assert all(r.status_code == 201 for r in results)
+    assert len({r.json()["id"] for r in results}) == 1
+
+    db = SessionLocal()
+    try:
+        assert db.query(Booking).filter(Booking.user_id == customer.user_id).count() == 2
+    finally:
+        db.close()
+
+    # transitions replay too instead of failing the state check on retry
+    booking_id = first.json()["id"]
+    headers = {**provider.headers, "Idempotency-Key": "accept-1"}
+    accept = client.put(f"/provider/provider/bookings/{booking_id}/accept", headers=headers)
+    again = client.put(f"/provider/provider/bookings/{booking_id}/accept", headers=headers)
+    assert accept.status_code == again.status_code == 200
+    assert again.json()["status"] == "accepted"
+
+
+def test_expired_idempotency_keys_are_swept_in_batches(customer):
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.add_all(
+            [
+                IdempotencyKey(user_id=customer.user_id, key=f"old-{i}", fingerprint="x", expires_at=now - timedelta(1))
+                for i in range(5)
+            ]
+            + [IdempotencyKey(user_id=customer.user_id, key="live", fingerprint="x", expires_at=now + timedelta(1))]
+        )
+        db.commit()
+
+        assert idempotency.sweep_expired(batch_size=2) >= 5
+        keys = db.query(IdempotencyKey.key).filter(IdempotencyKey.user_id == customer.user_id).all()
+        assert [k for (k,) in keys] == ["live"]
+    finally:
+        db.close()
+
+
+def test_status_update_rejects_pending_target(client, provider, customer, service):
+    booking = _book(client, customer, service, "2030-01-01T10:00").json()
+
+    # "pending" -> "pending" would be a no-op transition, so it is refused
+    res = client.put(f"/bookings/{booking['id']}/status", json={"status": "pending"}, headers=provider.headers)
+    assert res.status_code == 400
+    res = client.put(f"/bookings/{booking['id']}/status", json={"status": "accepted"}, headers=provider.headers)
+    assert res.status_code == 200
+
+
+def test_concurrent_transitions_have_a_single_winner(
+    client, provider, customer, service, add_bookings, count_queries
+):
+    add_bookings(customer, service, 20)
+    booking_ids = [b["id"] for b in client.get("/bookings/", headers=customer.headers).json()]
+
+    # one conditional UPDATE per transition, no read-modify-write
+    with count_queries() as statements:
+        res = client.put(f"/provider/provider/bookings/{booking_ids[0]}/accept", headers=provider.headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "accepted"
+    assert res.json()["service"]["id"] == service["id"]
+    booking_statements = [s for s in statements if "bookings" in s]
+    assert len(booking_statements) == 1
+    assert "UPDATE bookings" in booking_statements[0]
+
+    def _race(booking_id):
+        # every call below is only legal from "pending"
+        calls = [
+            (f"/provider/provider/bookings/{booking_id}/accept", None),
+            (f"/provider/provider/bookings/{booking_id}/reject", None),
+            (f"/bookings/{booking_id}/status", {"status": "accepted"}),
+            (f"/bookings/{booking_id}/status", {"status": "rejected"}),
+        ] * 4
+        with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+            futures = [pool.submit(client.put, path, json=body, headers=provider.headers) for path, body in calls]
+            return [f.result().status_code for f in futures]
+
+    for booking_id in booking_ids[1:]:
+        codes = _race(booking_id)
+        assert codes.count(200) == 1, codes
+        assert all(code == 400 for code in codes if code != 200), codes
+
+
+def test_bulk_transition_reports_per_item_outcome(client, provider, customer, service, add_bookings, count_queries):
+    add_bookings(customer, service, 4)
+    ids = sorted(b["id"] for b in client.get("/bookings/", headers=customer.headers).json())
+
+    with count_queries() as statements:
+        res = client.post(
+            "/provider/bookings/bulk-transition",
+            json={
+                "items": [
+                    {"booking_id": ids[0], "action": "accept"},
+                    {"booking_id": ids[1], "action": "reject"},
+                    {"booking_id": ids[2], "action": "complete"},  # still pending
+                    {"booking_id": 0, "action": "accept"},
+                ]
+            },
+            headers=provider.headers,
+        )
+    assert res.status_code == 200
+    body = res.json()
+    assert body["succeeded"] == 2 and body["failed"] == 2
+    outcome = {item["booking_id"]: item for item in body["items"]}
+    assert outcome[ids[0]]["status"] == "accepted"
+    assert outcome[ids[1]]["status"] == "rejected"
+    assert outcome[ids[2]]["detail"] == "conflict"
+    assert outcome[ids[2]]["status"] == "pending"
+    assert outcome[0]["detail"] == "not_found"
+    assert sum(1 for s in statements if s.lstrip().startswith("UPDATE bookings")) == 1
+    assert sum(1 for s in statements if s.lstrip().startswith("INSERT INTO audit_outbox")) == 1
+
+    res = client.post(
+        "/provider/bookings/bulk-transition",
+        json={"items": [{"booking_id": ids[0], "action": "complete"}, {"booking_id": ids[3], "action": "accept"}]},
+        headers=provider.headers,
+    )
+    assert res.json()["succeeded"] == 2
+
+    res = client.post(
+        "/provider/bookings/bulk-transition",
+        json={"items": [{"booking_id": ids[3], "action": "cancel"}]},
+        headers=provider.headers,
+    )
+    assert res.status_code == 400
+
+
+def test_overlapping_bookings_are_rejected_and_slots_skip_them(client, provider, customer, service):
+    # 2030-01-01 is a Tuesday
+    res = client.put(
+        "/provider/working-hours",
+        json=[{"weekday": 1, "start_time": "09:00", "end_time": "13:00"}],
+        headers=provider.headers,
+    )
+    assert res.status_code == 200
+
+    first = _book(client, customer, service, "2030-01-01T10:00")
+    assert first.status_code == 201
+    assert first.json()["ends_at"].startswith("2030-01-01T11:00")
+    assert _book(client, customer, service, "2030-01-01T10:30").status_code == 409
+    assert _book(client, customer, service, "2030-01-01T12:30").status_code == 409  # runs past closing
+    assert _book(client, customer, service, "2030-01-01T11:00").status_code == 201  # back-to-back is fine
+
+    # concurrent requests for one free slot: the exclusion constraint picks one
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        codes = sorted(
+            pool.map(lambda _: _book(client, customer, service, "2030-01-01T12:00").status_code, range(6))
+        )
+    assert codes == [201] + [409] * 5
+
+    res = client.get(
+        f"/providers/{service['provider_id']}/slots", params={"date": "2030-01-01", "duration_minutes": 60}
+    )
+    assert res.status_code == 200
+    assert [s["start"][11:16] for s in res.json()["slots"]] == ["09:00"]
+
+    # cancelling frees the range again
+    client.put(f"/bookings/{first.json()['id']}/cancel", headers=customer.headers)
+    res = client.get(
+        f"/providers/{service['provider_id']}/slots",
+        params={"date": "2030-01-01", "duration_minutes": 60, "step_minutes": 60},
+    )
+    assert [s["start"][11:16] for s in res.json()["slots"]] == ["09:00", "10:00"]
+
+
+def test_providers_without_working_hours_are_open_all_day(client, customer, service):
+    # no working hours configured: booking and slot listing follow the same rule
+    assert _book(client, customer, service, "2030-01-02T03:00").status_code == 201
+    res = client.get(
+        f"/providers/{service['provider_id']}/slots",
+        params={"date": "2030-01-02", "duration_minutes": 60, "step_minutes": 60},
+    )
+    starts = [s["start"][11:16] for s in res.json()["slots"]]
+    assert len(starts) == 23
+    assert "03:00" not in starts
+    assert starts[0] == "00:00" and starts[-1] == "23:00"
+
+
+def test_booking_series_is_checked_and_inserted_in_bulk(client, customer, service, add_bookings, count_queries):
+    # occupies the third weekly occurrence
+    add_bookings(customer, service, 1)
+
+    def _series(when, occurrences=52):
+        return client.post(
+            "/bookings/series",
+            json={"service_id": service["id"], "when": when, "frequency": "weekly", "occurrences": occurrences},
+            headers=customer.headers,
+        )
+
+    res = _series("2029-12-18T10:00")
+    assert res.status_code == 409
+    assert "2030-01-01T10:00:00" in res.json()["detail"]
+
+    with count_queries() as statements:
+        res = _series("2029-12-18T11:00")
+    assert res.status_code == 201
+    body = res.json()
+    assert len(body["bookings"]) == 52
+    assert body["bookings"][1]["scheduled_at"].startswith("2029-12-25T11:00")
+    assert {b["series_id"] for b in body["bookings"]} == {body["id"]}
+    assert len(statements) < 20
+
+    db = SessionLocal()
+    try:
+        assert db.query(Booking).filter(Booking.user_id == customer.user_id).count() == 53
+    finally:
+        db.close()
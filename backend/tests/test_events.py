@@ -0,0 +1,93 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import events as booking_events
+from app.core.notify import listener
+from app.db.session import SessionLocal
+
+
+@pytest.fixture
+def bus(database):
+    """The in-process bus, fed by a running notification listener."""
+    booking_events.listen()
+    listener.start()
+    deadline = time.monotonic() + 10
+    while not booking_events.bus.connected:
+        assert time.monotonic() < deadline, "notification listener did not connect"
+        time.sleep(0.05)
+    yield booking_events.bus
+    listener.stop()
+
+
+def _wait_for(bus, accepts, count):
+    deadline = time.monotonic() + 10
+    while True:
+        events = bus.recent(accepts)
+        if len(events) >= count or time.monotonic() > deadline:
+            return events
+        time.sleep(0.05)
+
+
+def test_commit_points_publish_booking_events(client, bus, provider, customer, service):
+    res = client.post(
+        "/bookings/", json={"service_id": service["id"], "when": "2030-01-01T10:00"}, headers=customer.headers
+    )
+    booking_id = res.json()["id"]
+    client.put(f"/provider/provider/bookings/{booking_id}/accept", headers=provider.headers)
+    # rejected transition: nothing committed, nothing published
+    client.put(f"/provider/provider/bookings/{booking_id}/reject", headers=provider.headers)
+    client.put(f"/bookings/{booking_id}/cancel", headers=customer.headers)
+
+    mine = _wait_for(bus, lambda e: e["booking_id"] == booking_id, 3)
+    assert [e["type"] for e in mine] == ["booking_created", "booking_accepted", "booking_cancelled"]
+    assert mine[0]["provider_id"] == service["provider_id"]
+    assert bus.since(mine[0]["id"], lambda e: e["booking_id"] == booking_id) == mine[1:]
+    # resuming from an event this process never saw cannot be replayed
+    assert bus.since(-1, lambda e: True) is None
+
+    assert client.get("/bookings/events").status_code == 401
+
+
+def test_stream_tickets_are_scoped_and_revocable(client, admin, customer):
+    res = client.post("/bookings/events/ticket", headers=customer.headers)
+    assert res.status_code == 200
+    ticket = res.json()["ticket"]
+
+    # a ticket only opens the stream; it is not a bearer token
+    assert client.get("/bookings/", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+    assert client.get("/bookings/events", params={"ticket": "not-a-ticket"}).status_code == 401
+
+    client.delete(f"/admin/users/{customer.user_id}", headers=admin.headers)
+    assert client.get("/bookings/events", params={"ticket": ticket}).status_code == 401
+
+
+def test_resume_follows_commit_order_not_id_order(bus, customer, service):
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        # fake booking ids keep these events apart from real traffic
+        for db, booking_id in ((first, -1), (second, -2)):
+            booking = SimpleNamespace(
+                id=booking_id,
+                status="pending",
+                user_id=customer.user_id,
+                provider_id=service["provider_id"],
+                service_id=service["id"],
+                scheduled_at=None,
+            )
+            booking_events.stage_booking_event(db, "booking_created", booking)
+        # the first draws its id, then the second commits before it does
+        booking_events._notify_staged(first)
+        second.commit()
+        first.commit()
+
+        accepts = lambda e: e["booking_id"] in (-1, -2)  # noqa: E731
+        mine = _wait_for(bus, accepts, 2)
+        assert [e["booking_id"] for e in mine] == [-2, -1]
+        assert mine[0]["id"] > mine[1]["id"]
+        # a client that saw the higher id still gets the one committed after it
+        assert bus.since(mine[0]["id"], accepts) == mine[1:]
+    finally:
+        first.close()
+        second.close()
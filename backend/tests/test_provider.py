@@ -0,0 +1,117 @@
+from app.core import rollups
+from app.db.session import SessionLocal
+from app.models import Provider
+
+
+def _book_all(client, customer, service, whens, **fields):
+    booking_ids = []
+    for when in whens:
+        res = client.post(
+            "/bookings/", json={"service_id": service["id"], "when": when, **fields}, headers=customer.headers
+        )
+        assert res.status_code == 201
+        booking_ids.append(res.json()["id"])
+    return booking_ids
+
+
+def test_earnings_ledger_follows_transitions(client, provider, customer, service):
+    booking_ids = _book_all(client, customer, service, ("2030-01-01T10:00", "2030-01-02T10:00", "2030-02-01T10:00"))
+    res = client.post(
+        "/provider/bookings/bulk-transition",
+        json={"items": [{"booking_id": booking_id, "action": "accept"} for booking_id in booking_ids]},
+        headers=provider.headers,
+    )
+    assert res.status_code == 200 and res.json()["succeeded"] == 3
+
+    res = client.get("/provider/earnings/monthly", headers=provider.headers)
+    assert res.status_code == 200
+    assert res.json() == [
+        {"month": "2030-02", "total_earnings": 500.0, "booking_count": 1},
+        {"month": "2030-01", "total_earnings": 1000.0, "booking_count": 2},
+    ]
+
+    assert client.put(f"/bookings/{booking_ids[0]}/cancel", headers=customer.headers).status_code == 200
+    # finishing a job keeps it in earnings, as payout runs pay it
+    res = client.put(f"/provider/provider/bookings/{booking_ids[1]}/complete", headers=provider.headers)
+    assert res.status_code == 200
+    summary = {
+        "total_earnings": 1000.0,
+        "booking_count": 2,
+        "monthly": [{"month": "2030-01", "amount": 500.0}, {"month": "2030-02", "amount": 500.0}],
+    }
+    assert client.get("/provider/earnings", headers=provider.headers).json() == summary
+    assert client.get("/providers/earnings", headers=provider.headers).json() == summary
+
+    db = SessionLocal()
+    try:
+        assert not [row for row in rollups.reconcile_earnings(db) if row.provider_id == provider.provider_id]
+    finally:
+        db.close()
+
+
+def test_calendar_is_one_query_and_syncs_incrementally(client, provider, customer, service, count_queries):
+    booking_ids = _book_all(
+        client, customer, service, [f"2030-01-0{day}T10:00" for day in range(1, 6)], notes="Gate code; 42"
+    )
+
+    window = {"start_date": "2030-01-01T00:00:00", "end_date": "2030-01-31T00:00:00"}
+    client.get("/provider/calendar", params=window, headers=provider.headers)  # warm the principal cache
+    with count_queries() as statements:
+        res = client.get("/provider/calendar", params=window, headers=provider.headers)
+    assert res.status_code == 200
+    assert [e["id"] for e in res.json()] == booking_ids
+    assert res.json()[0]["service_title"] == "Test Service" and res.json()[0]["user_name"] == "Test User"
+    assert len([s for s in statements if "FROM bookings" in s]) == 1
+    assert not [s for s in statements if s.lstrip().startswith("SELECT") and "FROM bookings" not in s]
+
+    # full sync in pages of two, then nothing new
+    token, seen = None, []
+    while True:
+        res = client.get("/provider/calendar/sync", params={"token": token, "limit": 2}, headers=provider.headers)
+        assert res.status_code == 200
+        body = res.json()
+        seen += [e["id"] for e in body["events"]]
+        token = body["sync_token"]
+        if not body["has_more"]:
+            break
+    assert seen == booking_ids
+
+    # a change shows up in the next sync (along with anything in the overlap window)
+    assert client.put(f"/bookings/{booking_ids[2]}/cancel", headers=customer.headers).status_code == 200
+    body = client.get("/provider/calendar/sync", params={"token": token}, headers=provider.headers).json()
+    assert {e["id"]: e["status"] for e in body["events"]}[booking_ids[2]] == "cancelled"
+
+    key = client.post("/provider/calendar/feed", headers=provider.headers).json()["key"]
+    res = client.get("/provider/calendar.ics", params={**window, "key": key})
+    assert res.status_code == 200 and res.headers["content-type"].startswith("text/calendar")
+    assert res.text.count("BEGIN:VEVENT") == 5
+    assert f"UID:booking-{booking_ids[2]}@helpx\r\n" in res.text
+    assert "STATUS:CANCELLED" in res.text and "Gate code\\; 42" in res.text
+
+
+def test_calendar_feed_keys_are_scoped_and_revocable(client, provider, customer):
+    assert client.post("/provider/calendar/feed", headers=customer.headers).status_code == 403
+    res = client.post("/provider/calendar/feed", headers=provider.headers)
+    assert res.status_code == 201
+    first = res.json()
+    assert first["url"].endswith(f"/provider/calendar.ics?key={first['key']}")
+    assert client.get(first["url"]).status_code == 200
+
+    db = SessionLocal()
+    try:
+        stored = db.query(Provider.calendar_feed_hash).filter(Provider.id == provider.provider_id).scalar()
+    finally:
+        db.close()
+    assert stored and first["key"] not in stored
+
+    # access tokens don't open the feed, in the query string or the header
+    assert client.get("/provider/calendar.ics", params={"token": provider.token}).status_code == 422
+    assert client.get("/provider/calendar.ics", params={"key": provider.token}).status_code == 404
+    assert client.get("/provider/calendar.ics", headers=provider.headers).status_code == 422
+
+    # rotating retires the old URL; revoking retires the current one
+    second = client.post("/provider/calendar/feed", headers=provider.headers).json()
+    assert client.get(first["url"]).status_code == 404
+    assert client.get(second["url"]).status_code == 200
+    assert client.delete("/provider/calendar/feed", headers=provider.headers).status_code == 204
+    assert client.get(second["url"]).status_code == 404
@@ -0,0 +1,248 @@
+"""
+Query-plan regression checks for the hot read paths.
+
+A scaled dataset is seeded inside one transaction (rolled back at the end),
+then each handler runs against it while its SQL is captured. Every distinct
+SELECT is explained with ``EXPLAIN (FORMAT JSON)``; the test fails when a
+sequential scan filters one of the scaled tables, or when the summed plan cost
+grows past ``QUERY_PLAN_COST_TOLERANCE`` over ``query_plan_baseline.json``.
+A case missing from the baseline fails too. The file is only written with
+``UPDATE_QUERY_PLAN_BASELINE=1``: run that after adding a case or an intended
+plan change, and commit the result.
+"""
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.api import admin, match, provider, services  # noqa: E402
+from app.api.pagination import encode_cursor  # noqa: E402
+from app.core.principals import Principal  # noqa: E402
+from app.db.session import engine  # noqa: E402
+
+BASELINE = Path(__file__).with_name("query_plan_baseline.json")
+TOLERANCE = float(os.getenv("QUERY_PLAN_COST_TOLERANCE", 0.5))
+SCALED_TABLES = {"bookings", "services", "reports", "provider_earnings"}
+
+USERS, PROVIDERS, SERVICES_PER_PROVIDER, BOOKINGS, REPORTS = 5000, 1000, 5, 50000, 3000
+LAT, LON = 12.97, 77.59
+
+
+def _seed(conn, tag: str) -> dict:
+    prefix = f"plan-{tag}-%"
+    conn.execute(text("SELECT setseed(0.42)"))
+    conn.execute(
+        text(
+            "INSERT INTO app_users (email, hashed_password, name, role, is_active, token_epoch) "
+            "SELECT 'plan-' || :tag || '-' || g || '@example.com', 'x', 'Plan ' || g, "
+            "CASE WHEN g <= :providers THEN 'provider' ELSE 'user' END, true, 0 "
+            "FROM generate_series(1, :users) g"
+        ),
+        {"tag": tag, "providers": PROVIDERS, "users": USERS},
+    )
+    conn.execute(
+        text(
+            "INSERT INTO providers (user_id, business_name, rating, verified, is_active, is_suspended) "
+            "SELECT id, name, round((random() * 5)::numeric, 1), random() < 0.9, true, random() < 0.02 "
+            "FROM app_users WHERE email LIKE :prefix AND role = 'provider'"
+        ),
+        {"prefix": prefix},
+    )
+    conn.execute(
+        text(
+            "INSERT INTO services (provider_id, title, description, category, price, duration_minutes, "
+            "location, approved, flagged) "
+            "SELECT p.id, 'plan-' || :tag || '-' || p.id || '-' || g, 'seeded', "
+            "'plan-' || :tag || '-cat-' || ((p.id + g) % 10), 20 + (random() * 180)::int, 60, "
+            "ST_SetSRID(ST_MakePoint(:lon + random() - 0.5, :lat + random() - 0.5), 4326)::geography, "
+            "random() < 0.9, false "
+            "FROM providers p JOIN app_users u ON u.id = p.user_id "
+            "CROSS JOIN generate_series(1, :per_provider) g WHERE u.email LIKE :prefix"
+        ),
+        {"tag": tag, "prefix": prefix, "lat": LAT, "lon": LON, "per_provider": SERVICES_PER_PROVIDER},
+    )
+    # one booking per hour from ~5.5 years ago: mostly history, a few weeks ahead,
+    # and never two overlapping bookings for a provider
+    conn.execute(
+        text(
+            "WITH s AS (SELECT id, provider_id, price, row_number() OVER (ORDER BY id) AS rn "
+            "           FROM services WHERE title LIKE :prefix), "
+            "     u AS (SELECT id, row_number() OVER (ORDER BY id) AS rn "
+            "           FROM app_users WHERE email LIKE :prefix AND role = 'user') "
+            "INSERT INTO bookings (service_id, user_id, provider_id, scheduled_at, ends_at, status, price, created_at) "
+            "SELECT s.id, u.id, s.provider_id, t.at, t.at + interval '1 hour', "
+            "CASE WHEN r < 0.15 THEN 'pending' WHEN r < 0.35 THEN 'accepted' WHEN r < 0.5 THEN 'cancelled' "
+            "     WHEN r < 0.6 THEN 'rejected' ELSE 'completed' END, "
+            "s.price, now()::timestamp - random() * interval '730 days' "
+            "FROM generate_series(1, :bookings) g "
+            "CROSS JOIN LATERAL (SELECT date_trunc('hour', now()::timestamp) - interval '48000 hours' "
+            "                           + g * interval '1 hour' AS at, random() AS r) t "
+            "JOIN s ON s.rn = 1 + g % (SELECT count(*) FROM s) "
+            "JOIN u ON u.rn = 1 + g % (SELECT count(*) FROM u)"
+        ),
+        {"prefix": prefix, "bookings": BOOKINGS},
+    )
+    conn.execute(
+        text(
+            "WITH u AS (SELECT id, row_number() OVER (ORDER BY id) AS rn "
+            "           FROM app_users WHERE email LIKE :prefix AND role = 'user' ORDER BY id LIMIT 100), "
+            "     p AS (SELECT p.id, row_number() OVER (ORDER BY p.id) AS rn "
+            "           FROM providers p JOIN app_users pu ON pu.id = p.user_id WHERE pu.email LIKE :prefix) "
+            "INSERT INTO reports (reporter_id, report_type, target_type, target_id, reason, status) "
+            "SELECT u.id, 'provider', 'provider', p.id, 'seeded', 'open' "
+            "FROM generate_series(1, :reports) g "
+            "JOIN u ON u.rn = 1 + g % (SELECT count(*) FROM u) "
+            "JOIN p ON p.rn = 1 + (g * 7) % (SELECT count(*) FROM p)"
+        ),
+        {"prefix": prefix, "reports": REPORTS},
+    )
+    conn.execute(
+        text(
+            "INSERT INTO provider_earnings (provider_id, month, amount, booking_count) "
+            "SELECT b.provider_id, date_trunc('month', b.scheduled_at)::date, sum(b.price), count(*) "
+            "FROM bookings b JOIN services s ON s.id = b.service_id "
+            "WHERE s.title LIKE :prefix AND b.status = 'accepted' GROUP BY 1, 2"
+        ),
+        {"prefix": prefix},
+    )
+    for table in ("app_users", "providers", "services", "bookings", "reports", "provider_earnings"):
+        conn.execute(text(f"ANALYZE {table}"))
+
+    service = conn.execute(
+        text(
+            "SELECT s.id, s.category, s.provider_id, pu.id AS provider_user_id FROM services s "
+            "JOIN providers p ON p.id = s.provider_id JOIN app_users pu ON pu.id = p.user_id "
+            "WHERE s.title LIKE :prefix AND s.approved ORDER BY s.id LIMIT 1"
+        ),
+        {"prefix": prefix},
+    ).one()
+    customer_id = conn.execute(
+        text("SELECT id FROM app_users WHERE email LIKE :prefix AND role = 'user' ORDER BY id LIMIT 1"),
+        {"prefix": prefix},
+    ).scalar()
+    return {
+        "service_id": service.id,
+        "category": service.category,
+        "provider": Principal(
+            id=service.provider_user_id, role="provider", is_active=True, provider_id=service.provider_id
+        ),
+        "customer": Principal(id=customer_id, role="user", is_active=True, provider_id=None),
+        "admin": Principal(id=customer_id, role="admin", is_active=True, provider_id=None),
+    }
+
+
+@pytest.fixture(scope="module")
+def scaled(database):
+    conn = engine.connect()
+    trans = conn.begin()
+    try:
+        yield conn, _seed(conn, uuid.uuid4().hex[:8])
+    finally:
+        trans.rollback()
+        conn.close()
+
+
+def _match(db, ctx, available_at=None):
+    return match.match_providers(
+        service_id=ctx["service_id"],
+        user_lat=LAT,
+        user_lon=LON,
+        radius_km=5,
+        top_n=10,
+        algorithm="trust_hybrid",
+        debug=False,
+        available_at=available_at,
+        duration_minutes=None,
+        db=db,
+        current_user=ctx["customer"],
+    )
+
+
+HOT_QUERIES = {
+    "matching": lambda db, ctx: _match(db, ctx),
+    "matching_available": lambda db, ctx: _match(db, ctx, datetime.utcnow() + timedelta(days=3, hours=2)),
+    "listing": lambda db, ctx: services.list_services(
+        q=None, category=ctx["category"], min_price=None, max_price=None,
+        lat=LAT, lon=LON, radius_km=5, page=1, page_size=10, db=db,
+    ),
+    "earnings_monthly": lambda db, ctx: provider.get_monthly_earnings(
+        months=6, db=db, current_user=ctx["provider"]
+    ),
+    "earnings_summary": lambda db, ctx: provider.get_earnings_summary(db=db, current_user=ctx["provider"]),
+    "analytics": lambda db, ctx: admin.get_analytics(db=db, admin=ctx["admin"]),
+    "trust_provider": lambda db, ctx: admin.provider_trust_score(
+        provider_id=ctx["provider"].provider_id, db=db, admin=ctx["admin"]
+    ),
+    "calendar": lambda db, ctx: provider.get_calendar(
+        response=Response(), start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(days=30),
+        cursor=None, limit=50, status_filter=None, db=db, current_user=ctx["provider"],
+    ),
+    "calendar_sync": lambda db, ctx: provider.sync_calendar(
+        token=encode_cursor(datetime.utcnow() - timedelta(days=1), 0), limit=50, db=db, current_user=ctx["provider"]
+    ),
+}
+
+
+def _capture(conn, run) -> list:
+    statements = {}
+
+    def _record(conn_, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.setdefault(statement, parameters)
+
+    event.listen(conn, "before_cursor_execute", _record)
+    try:
+        run()
+    finally:
+        event.remove(conn, "before_cursor_execute", _record)
+    return list(statements.items())
+
+
+def _filtered_seq_scans(node: dict) -> list:
+    found = []
+    if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in SCALED_TABLES and "Filter" in node:
+        found.append(f"{node['Relation Name']}: {node['Filter']}")
+    for child in node.get("Plans", []):
+        found.extend(_filtered_seq_scans(child))
+    return found
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_plans(scaled, name):
+    conn, ctx = scaled
+    db = Session(bind=conn)
+    try:
+        statements = _capture(conn, lambda: HOT_QUERIES[name](db, ctx))
+    finally:
+        db.close()
+    assert statements, f"{name} ran no queries"
+
+    total_cost = 0.0
+    problems = []
+    for statement, parameters in statements:
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+        total_cost += plan["Total Cost"]
+        problems.extend(f"{scan}\n  in: {statement}" for scan in _filtered_seq_scans(plan))
+    assert not problems, f"{name}: sequential scans on scaled tables:\n" + "\n".join(problems)
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    if os.getenv("UPDATE_QUERY_PLAN_BASELINE"):
+        baseline[name] = round(total_cost, 2)
+        BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        return
+    assert name in baseline, (
+        f"{name}: no recorded plan cost in {BASELINE.name}; rerun with UPDATE_QUERY_PLAN_BASELINE=1 and commit it"
+    )
+    assert total_cost <= baseline[name] * (1 + TOLERANCE), (
+        f"{name}: plan cost {total_cost:.0f} regressed from baseline {baseline[name]:.0f}"
+    )
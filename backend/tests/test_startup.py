@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db import migrations
+from app.main import app
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+# everything a "check" startup imports, up to the revision lookup
+STARTUP_IMPORTS = """
+import json, sys
+import app.main
+import app.core.audit, app.core.events, app.core.notify, app.core.revocation, app.core.trust
+from app.db import migrations
+migrations.head_revision()
+print(json.dumps(sorted(name for name in sys.modules if name.split(".")[0] in ("shapely", "geoalchemy2"))))
+"""
+
+
+def test_check_mode_refuses_a_stale_schema(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEMA_STARTUP_MODE", "check")
+    monkeypatch.setattr(migrations, "current_revision", lambda: "0001_baseline")
+    with pytest.raises(migrations.SchemaOutOfDate, match="expected"):
+        with TestClient(app):
+            pass
+
+
+def test_check_mode_refuses_an_unreadable_revision(monkeypatch):
+    def unreachable():
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(settings, "SCHEMA_STARTUP_MODE", "check")
+    monkeypatch.setattr(migrations, "current_revision", unreachable)
+    with pytest.raises(migrations.SchemaOutOfDate, match="database is down"):
+        with TestClient(app):
+            pass
+
+
+def test_startup_does_not_import_the_geometry_stack():
+    res = subprocess.run(
+        [sys.executable, "-c", STARTUP_IMPORTS], cwd=BACKEND, capture_output=True, text=True, check=True
+    )
+    assert json.loads(res.stdout.strip().splitlines()[-1]) == []
@@ -75,4 +75,19 @@ if (saved && saved !== "null") {
   API.clearToken();
 }
 
+// GET a cursor-paginated list, following X-Next-Cursor; resolves like API.get
+// with every page's items in `data` (stops after maxPages)
+API.getAllPages = async (url, params = {}, maxPages = 20) => {
+  const items = [];
+  let cursor = null;
+  for (let page = 0; page < maxPages; page += 1) {
+    const res = await API.get(url, { params: cursor ? { ...params, cursor } : params });
+    items.push(...(res.data || []));
+    cursor = res.headers["x-next-cursor"];
+    if (!cursor) return { ...res, data: items };
+  }
+  console.warn(`[API] ${url}: stopped after ${maxPages} pages`);
+  return { data: items };
+};
+
 export default API;
@@ -46,7 +46,7 @@ export default function Dashboard() {
   const [actioningId, setActioningId] = useState(null);
   const [earningsSummary, setEarningsSummary] = useState({
     total_earnings: 0,
-    total_bookings: 0,
+    booking_count: 0,
     monthly: [],
   });
   const [calendar, setCalendar] = useState([]);
@@ -85,14 +85,15 @@ export default function Dashboard() {
     try {
       const [svcRes, bookingRes, earningsRes, calendarRes, payoutRes] = await Promise.all([
         API.get("/services/provider/"),
-        API.get("/bookings/provider/"),
-        API.get("/providers/earnings").catch(() => ({ data: { total_earnings: 0, total_bookings: 0, monthly: [] } })),
-        API.get("/provider/calendar").catch(() => ({ data: [] })),
+        // both default to upcoming bookings, soonest first, one page at a time
+        API.getAllPages("/bookings/provider/"),
+        API.get("/providers/earnings").catch(() => ({ data: { total_earnings: 0, booking_count: 0, monthly: [] } })),
+        API.getAllPages("/provider/calendar").catch(() => ({ data: [] })),
         API.get("/provider/payout").catch(() => ({ data: null })),
       ]);
       setServices(svcRes.data || []);
       setBookings(bookingRes.data || []);
-      setEarningsSummary(earningsRes.data || { total_earnings: 0, total_bookings: 0, monthly: [] });
+      setEarningsSummary(earningsRes.data || { total_earnings: 0, booking_count: 0, monthly: [] });
       setCalendar(calendarRes.data || []);
       setPayoutSettings(payoutRes.data);
       if (payoutRes.data) {